@@ -0,0 +1,86 @@
+"""In-process microbenchmarks for hot helpers: menu price bands, token checks, metrics and serialization.
+
+    python benchmarks/bench_micro.py --repeat 7 --output results.jsonl
+
+Prints one JSON object per case with the best per-call time in microseconds
+(the minimum over ``--repeat`` timed loops). The serialization cases are the
+ones from bench_serialization.py, at ``--rows`` rows.
+"""
+import argparse
+import json
+import sys
+import timeit
+
+import common
+
+common.setup()
+
+import menus  # noqa: E402
+import metrics  # noqa: E402
+import oauth2  # noqa: E402
+import bench_serialization  # noqa: E402
+
+
+def menu_json(items: int) -> str:
+    per_category = max(items // 3, 1)
+    return json.dumps([
+        {"category": category, "items": [
+            {"name": f"Dish {i}", "description": "House special", "price": 6.5 + i}
+            for i in range(per_category)
+        ]}
+        for category in ("Starters", "Mains", "Desserts")
+    ])
+
+
+def token_cases() -> dict:
+    token = oauth2.create_access_token({"uid": 7, "user_type": "user"})
+
+    def cold():
+        # every call decodes and validates the JWT
+        oauth2.token_cache.pop(token)
+        return oauth2.verify_access_token(token)
+
+    return {
+        "verify_access_token/decode": cold,
+        "verify_access_token/cached": lambda: oauth2.verify_access_token(token),
+    }
+
+
+def cases(rows: int) -> dict:
+    small, large = menu_json(12), menu_json(90)
+    return {
+        "calculate_price_range/12_items": lambda: menus.calculate_price_range(small),
+        "calculate_price_range/90_items": lambda: menus.calculate_price_range(large),
+        **token_cases(),
+        # per-request cost of MetricsMiddleware's bookkeeping
+        "metrics/observe_request": lambda: metrics.request_duration.observe(("GET", "/restaurants/{restaurant_id}", "200"), 0.012),
+        **{f"serialization/{name}": fn for name, fn in bench_serialization.cases(rows).items()},
+    }
+
+
+def best_per_call(fn, repeat: int) -> tuple:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return number, best / number
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time hot helper functions in-process.")
+    parser.add_argument("--rows", type=int, default=100, help="rows per serialization call")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--case", help="only run cases whose name contains this")
+    parser.add_argument("--output", help="also append the JSON lines to this file")
+    args = parser.parse_args(argv)
+
+    info = common.run_info()
+    for name, fn in cases(args.rows).items():
+        if args.case and args.case not in name:
+            continue
+        number, seconds = best_per_call(fn, args.repeat)
+        common.emit({"case": name, "number": number, "best_us": round(seconds * 1e6, 3)}, info, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Memory-per-row benchmark: ORM entity reads vs the read_models.py Core path.
+
+    python benchmarks/bench_read_models.py --rows 5000
+
+Seeds an in-memory SQLite database and, for each endpoint query, prints one
+JSON object per path with the bytes retained per row by the result and the
+peak allocation while running it (tracemalloc).
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "routes"))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+import models  # noqa: E402
+import read_models  # noqa: E402
+
+MENU = json.dumps([{"category": "Mains", "items": [{"name": f"Dish {i}", "price": 10 + i} for i in range(10)]}])
+
+
+def seed(db, rows: int):
+    db.execute(insert(models.User), [
+        {"uid": 1, "username": "owner", "email": "owner@example.com", "password": "x" * 60, "user_type": "owner"},
+        {"uid": 2, "username": "reviewer", "email": "r@example.com", "password": "x" * 60, "user_type": "user"},
+    ])
+    db.execute(insert(models.Restaurant), [
+        {"rid": i, "name": f"Restaurant {i}", "owner_id": 1, "address": f"{i} Main St", "zip_code": "78701",
+         "opentime": "09:00", "closetime": "21:00", "description": "Neighbourhood spot " * 20, "menu": MENU}
+        for i in range(1, rows + 1)
+    ])
+    db.execute(insert(models.Review), [
+        {"rid": 1, "uid": 2, "rating": 1 + i % 5, "comment": "Great food " * 5, "created": datetime(2024, 1, 1)}
+        for i in range(rows)
+    ])
+    db.commit()
+
+
+def orm_reviews(db):
+    reviews = db.query(models.Review, models.User.username)\
+        .join(models.User, models.Review.uid == models.User.uid)\
+        .filter(models.Review.rid == 1).all()
+    return [
+        {"rvid": r.rvid, "rating": r.rating, "comment": r.comment, "rid": r.rid, "uid": r.uid,
+         "created": r.created, "username": username}
+        for r, username in reviews
+    ]
+
+
+def read_model_reviews(db):
+    return [review.as_dict() for review in read_models.restaurant_reviews(db, 1)]
+
+
+def orm_listings(db):
+    return db.query(models.Restaurant).filter(models.Restaurant.owner_id == 1).all()
+
+
+def read_model_listings(db):
+    return read_models.owner_listings(db, 1)
+
+
+CASES = {
+    "reviews/orm": orm_reviews,
+    "reviews/read_models": read_model_reviews,
+    "owner_listings/orm": orm_listings,
+    "owner_listings/read_models": read_model_listings,
+}
+
+
+def measure(session_factory, fn):
+    db = session_factory()
+    try:
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn(db)
+        # the ORM path keeps its entities alive in the session's identity map too
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return len(result), retained - before, peak - before
+    finally:
+        db.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare memory per row of ORM and read-model queries.")
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    with session_factory() as db:
+        seed(db, args.rows)
+
+    for name, fn in CASES.items():
+        count, retained, peak = measure(session_factory, fn)
+        print(json.dumps({
+            "case": name,
+            "rows": count,
+            "bytes_per_row": round(retained / max(count, 1)),
+            "peak_bytes_per_row": round(peak / max(count, 1)),
+        }))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
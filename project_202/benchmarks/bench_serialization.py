@@ -0,0 +1,92 @@
+"""Serialization microbenchmark: FastAPI's default encoding path vs serialization.py.
+
+    python benchmarks/bench_serialization.py --rows 1000 --repeat 20
+
+Prints one JSON object per case with the best per-call time in milliseconds.
+"""
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "routes"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+import schemas  # noqa: E402
+import serialization  # noqa: E402
+
+MENU = json.dumps([{"category": "Mains", "items": [
+    {"name": f"Dish {i}", "description": "House special with a long description " * 2, "price": 9.5 + i}
+    for i in range(12)
+]}])
+
+
+def restaurant_rows(n: int) -> list:
+    return [
+        {
+            "rid": i, "name": f"Restaurant {i}", "address": f"{i} Main St", "city": "Austin",
+            "state": "TX", "zip_code": "78701", "latitude": 30.26 + i / 1e4, "longitude": -97.74,
+            "phone": 5125550100, "website": None, "overall_rating": 4.25, "price_range": "$$",
+            "min_price": 9.5, "avg_price": 15.0, "max_price": 20.5, "owner_id": 1,
+            "opentime": "09:00", "closetime": "21:00", "description": "Neighbourhood spot " * 10,
+            "status": "1", "menu": MENU, "menu_photo": "",
+        }
+        for i in range(n)
+    ]
+
+
+def user_rows(n: int) -> list:
+    created = datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        SimpleNamespace(uid=i, email=f"user{i}@example.com", username=f"user{i}", created=created)
+        for i in range(n)
+    ]
+
+
+def fastapi_default(content) -> bytes:
+    # What a route returning plain data costs: jsonable_encoder, then JSONResponse.render
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fastapi_response_model(rows) -> bytes:
+    # response_model=list[UserOut]: validate each row, dump back to dicts, encode
+    models = [schemas.UserOut.model_validate(row) for row in rows]
+    return fastapi_default([m.model_dump(mode="json") for m in models])
+
+
+def cases(rows: int) -> dict:
+    restaurants = {"restaurants": restaurant_rows(rows), "next_cursor": None}
+    users = user_rows(rows)
+    return {
+        "restaurant_list/jsonable_encoder+json": lambda: fastapi_default(restaurants),
+        "restaurant_list/serialization.dumps": lambda: serialization.dumps(restaurants),
+        "user_list/response_model": lambda: fastapi_response_model(users),
+        "user_list/model_serializer": lambda: serialization.users_out.dump_json(users),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare response serialization paths.")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    for name, fn in cases(args.rows).items():
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(json.dumps({
+            "case": name,
+            "rows": args.rows,
+            "best_ms": round(best * 1000, 3),
+            "bytes": len(fn()),
+            "orjson": serialization.orjson is not None,
+        }))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Shared setup for the benchmark scripts.
+
+Every script prints one JSON object per line; ``run_info()`` is merged into
+each so results from different commits can be told apart and compared with
+``python benchmarks/compare.py``.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+ROUTES_DIR = PROJECT_DIR / "routes"
+
+# Settings the app refuses to start without; benchmarks never talk to a real database
+BENCH_ENV = {
+    "DATABASE_URL": "sqlite://",
+    "SECRET_KEY": "benchmark-secret-key-0123456789abcdef",
+    "ALGORITHM": "HS256",
+}
+
+
+def setup():
+    """Put routes/ on sys.path and fill in the settings the app needs."""
+    if str(ROUTES_DIR) not in sys.path:
+        sys.path.insert(0, str(ROUTES_DIR))
+    for name, value in BENCH_ENV.items():
+        os.environ.setdefault(name, value)
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_DIR, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_info() -> dict:
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def emit(result: dict, info: dict, output=None):
+    """Print ``result`` (with ``info``) as a JSON line, appending it to ``output`` too if given."""
+    line = json.dumps({**result, **info})
+    print(line, flush=True)
+    if output is not None:
+        with open(output, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
@@ -0,0 +1,72 @@
+"""Compare two benchmark result files (JSON lines), e.g. from before and after a change.
+
+    python benchmarks/bench_micro.py --output before.jsonl
+    python benchmarks/load.py --output before.jsonl
+    (check out the change)
+    python benchmarks/bench_micro.py --output after.jsonl
+    python benchmarks/load.py --output after.jsonl
+    python benchmarks/compare.py before.jsonl after.jsonl
+
+Prints one JSON object per case and metric found in both files with the
+relative change; with several runs of a case in one file the last one wins.
+"""
+import argparse
+import json
+import sys
+
+# metric -> True when higher is better
+METRICS = {
+    "best_us": False,
+    "best_ms": False,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "rps": True,
+    "bytes_per_row": False,
+}
+
+
+def load(path: str) -> dict:
+    results = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                result = json.loads(line)
+                results[result["case"]] = result
+    return results
+
+
+def compare(baseline: dict, candidate: dict) -> list:
+    rows = []
+    for case, before in baseline.items():
+        after = candidate.get(case)
+        if after is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in before or metric not in after or not before[metric]:
+                continue
+            change = (after[metric] - before[metric]) / before[metric] * 100
+            rows.append({
+                "case": case,
+                "metric": metric,
+                "baseline": before[metric],
+                "candidate": after[metric],
+                "change_pct": round(change, 1),
+                "better": change > 0 if higher_is_better else change < 0,
+            })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+
+    for row in compare(load(args.baseline), load(args.candidate)):
+        print(json.dumps(row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Seeded synthetic data for benchmarks: users, restaurants (with menus), reviews, photos and cuisines.
+
+    python benchmarks/datagen.py --scale 100k --database-url sqlite:///bench-100k.db
+
+``--scale`` is the number of reviews (1k, 100k or 1m, or any integer); the
+other tables are sized from it (see ``table_sizes``). The same seed always
+produces the same rows, so runs against different commits see identical data.
+Restaurant rating aggregates and menu price stats are filled in the way the
+write paths keep them, and the schema is created with create_all plus the
+versioned migrations.
+"""
+import argparse
+import json
+import sys
+import time
+from array import array
+from datetime import datetime, timedelta
+from random import Random
+
+import common
+
+common.setup()
+
+from sqlalchemy import create_engine, func, insert, select  # noqa: E402
+import menus  # noqa: E402
+import migrations  # noqa: E402
+import models  # noqa: E402
+import utils  # noqa: E402
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+BATCH_SIZE = 5_000
+# Every generated user can log in with this password
+PASSWORD = "benchmark"
+ADMIN_UID = 1
+FIRST_OWNER_UID = 2
+
+CITIES = (
+    # city, state, zip prefix, latitude, longitude
+    ("San Jose", "CA", "951", 37.3382, -121.8863),
+    ("San Francisco", "CA", "941", 37.7749, -122.4194),
+    ("Austin", "TX", "787", 30.2672, -97.7431),
+    ("Seattle", "WA", "981", 47.6062, -122.3321),
+    ("Chicago", "IL", "606", 41.8781, -87.6298),
+    ("New York", "NY", "100", 40.7128, -74.0060),
+)
+CUISINES = ("Mexican", "Italian", "Indian", "Thai", "Japanese", "Chinese", "American", "Mediterranean", "Korean", "Vegan")
+NAME_WORDS = ("Golden", "Spicy", "Little", "Blue", "Corner", "Garden", "Urban", "Old Town", "Sunset", "Harbor")
+NAME_NOUNS = ("Kitchen", "Bistro", "Grill", "Cafe", "Diner", "Taqueria", "Noodle Bar", "Trattoria", "Curry House", "Deli")
+DISHES = ("Tacos", "Burrito", "Pad Thai", "Ramen", "Margherita Pizza", "Butter Chicken", "Falafel Wrap", "Bibimbap", "Burger", "Pho")
+MENU_CATEGORIES = ("Starters", "Mains", "Desserts")
+COMMENTS = (
+    "Great food and friendly staff.",
+    "Portions were small for the price.",
+    "Best tacos in the neighbourhood, will come back.",
+    "Slow service on a busy night but worth the wait.",
+    "Solid spot for a quick lunch.",
+    "Too salty for my taste.",
+)
+EPOCH = datetime(2023, 1, 1)
+
+
+def scale_rows(scale) -> int:
+    if isinstance(scale, int):
+        return scale
+    return SCALES[scale] if scale in SCALES else int(scale)
+
+
+def table_sizes(reviews: int) -> dict:
+    restaurants = max(reviews // 20, 10)
+    return {
+        "user": max(reviews // 10, 20),
+        "restaurant": restaurants,
+        "review": reviews,
+        # photos and cuisines per restaurant are fixed so their counts do not depend on the seed
+        "photo": restaurants * 2,
+        "cuisine": restaurants * 2,
+    }
+
+
+def owner_uids(sizes: dict) -> range:
+    # the first 5% of users after the admin own all the restaurants
+    return range(FIRST_OWNER_UID, FIRST_OWNER_UID + max(sizes["user"] // 20, 1))
+
+
+def _batches(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _users(sizes: dict, password_hash: str):
+    owners = owner_uids(sizes)
+    for uid in range(1, sizes["user"] + 1):
+        user_type = "admin" if uid == ADMIN_UID else "owner" if uid in owners else "user"
+        yield {
+            "uid": uid, "username": f"user{uid}", "email": f"user{uid}@example.com",
+            "password": password_hash, "user_type": user_type, "status": "1",
+        }
+
+
+def _menu(rng: Random) -> str:
+    return json.dumps([
+        {"category": category, "items": [
+            {"name": rng.choice(DISHES), "description": "House special", "price": round(rng.uniform(4, 35), 2)}
+            for _ in range(rng.randint(2, 4))
+        ]}
+        for category in MENU_CATEGORIES
+    ])
+
+
+def _review_draws(rng: Random, sizes: dict):
+    """(rid, rating) per review, drawn up front so restaurants can be inserted with their aggregates."""
+    rids, ratings = array("i"), array("b")
+    for _ in range(sizes["review"]):
+        # skew reviews towards low rids, as popular restaurants collect more of them
+        rids.append(1 + int(sizes["restaurant"] * rng.random() ** 2))
+        ratings.append(rng.randint(1, 5))
+    return rids, ratings
+
+
+def _restaurants(rng: Random, sizes: dict, rids: array, ratings: array, menu_rows: list):
+    counts = [0] * (sizes["restaurant"] + 1)
+    sums = [0] * (sizes["restaurant"] + 1)
+    for rid, rating in zip(rids, ratings):
+        counts[rid] += 1
+        sums[rid] += rating
+    owners = owner_uids(sizes)
+
+    for rid in range(1, sizes["restaurant"] + 1):
+        city, state, zip_prefix, lat, lng = rng.choice(CITIES)
+        menu = _menu(rng)
+        items = menus.parse_menu(menu)
+        menu_rows.extend({"rid": rid, **item} for item in items)
+        yield {
+            "rid": rid,
+            "name": f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_NOUNS)} {rid}",
+            "address": f"{rng.randint(1, 9999)} Main St",
+            "city": city, "state": state, "zip_code": f"{zip_prefix}{rng.randint(0, 99):02d}",
+            "latitude": round(lat + rng.uniform(-0.1, 0.1), 6),
+            "longitude": round(lng + rng.uniform(-0.1, 0.1), 6),
+            "phone": 4085550000 + rid % 10000,
+            "owner_id": owners[rid % len(owners)],
+            "opentime": "09:00", "closetime": "21:00",
+            "description": "Neighbourhood restaurant serving seasonal dishes. " * 3,
+            "status": "1", "menu": menu,
+            "review_count": counts[rid], "rating_sum": sums[rid],
+            "overall_rating": round(sums[rid] / counts[rid], 1) if counts[rid] else 0,
+            **menus.price_stats(items),
+        }
+
+
+def _reviews(rng: Random, sizes: dict, rids: array, ratings: array):
+    span = 2 * 365 * 24 * 3600
+    for rid, rating in zip(rids, ratings):
+        yield {
+            "rid": rid, "uid": rng.randint(1, sizes["user"]), "rating": rating,
+            "comment": rng.choice(COMMENTS), "created": EPOCH + timedelta(seconds=rng.randrange(span)),
+        }
+
+
+def _photos(sizes: dict):
+    for rid in range(1, sizes["restaurant"] + 1):
+        for n in range(2):
+            yield {"rid": rid, "url": f"https://example.com/photos/{rid}/{n}.jpg"}
+
+
+def _cuisines(rng: Random, sizes: dict):
+    for rid in range(1, sizes["restaurant"] + 1):
+        for name in rng.sample(CUISINES, 2):
+            yield {"rid": rid, "name": name}
+
+
+def generate(engine, scale, seed: int = 42) -> dict:
+    """Create the schema on ``engine`` and fill it; returns the row count per table."""
+    sizes = table_sizes(scale_rows(scale))
+    rng = Random(seed)
+    models.Base.metadata.create_all(bind=engine)
+    migrations.migrate(engine)
+
+    with engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(models.Restaurant)).scalar():
+            raise RuntimeError("database already has restaurants; use a fresh database or --reset")
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+
+        password_hash = utils.get_password_hash(PASSWORD, rounds=4)
+        for batch in _batches(_users(sizes, password_hash)):
+            conn.execute(insert(models.User), batch)
+
+        rids, ratings = _review_draws(rng, sizes)
+        menu_rows = []
+        for batch in _batches(_restaurants(rng, sizes, rids, ratings, menu_rows)):
+            conn.execute(insert(models.Restaurant), batch)
+        for batch in _batches(menu_rows):
+            conn.execute(insert(models.MenuItem), batch)
+        for batch in _batches(_reviews(rng, sizes, rids, ratings)):
+            conn.execute(insert(models.Review), batch)
+        for batch in _batches(_photos(sizes)):
+            conn.execute(insert(models.Photo), batch)
+        for batch in _batches(_cuisines(rng, sizes)):
+            conn.execute(insert(models.Cuisine), batch)
+    return {**sizes, "menu_item": len(menu_rows)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fill a database with seeded synthetic data.")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--scale", default="1k", help="reviews to generate: 1k, 100k, 1m or a number")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="drop the app's tables first")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    if args.reset:
+        models.Base.metadata.drop_all(bind=engine)
+        migrations.schema_version.drop(bind=engine, checkfirst=True)
+    start = time.perf_counter()
+    rows = generate(engine, args.scale, args.seed)
+    common.emit({
+        "case": "datagen",
+        "scale": scale_rows(args.scale),
+        "seed": args.seed,
+        "rows": rows,
+        "seconds": round(time.perf_counter() - start, 3),
+    }, common.run_info())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""HTTP load driver: latency percentiles and throughput per route against a local uvicorn + SQLite.
+
+    python benchmarks/load.py --scale 100k --requests 2000 --concurrency 32
+
+Seeds a SQLite database with datagen.py (or reuses ``--database``, which must
+have been generated at the same ``--scale``), starts uvicorn on a free port,
+and for each route sends ``--warmup`` unmeasured requests followed by
+``--requests`` measured ones from ``--concurrency`` concurrent clients. Request
+paths are drawn from ``--seed``, so two runs hit the same rows. Prints one
+JSON object per route with p50/p95/p99/max latency in milliseconds and
+requests per second.
+"""
+import argparse
+import asyncio
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from random import Random
+
+import common
+
+common.setup()
+
+import datagen  # noqa: E402
+import httpx  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+import oauth2  # noqa: E402
+
+SEARCH_TERMS = ("taqueria", "curry", "noodle", "bistro", "grill", "kitchen")
+
+
+def routes(sizes: dict) -> dict:
+    """Route name -> function of a Random returning (path, headers)."""
+    restaurant = lambda rng: rng.randint(1, sizes["restaurant"])  # noqa: E731
+    owner = datagen.owner_uids(sizes)[0]
+    owner_token = oauth2.create_access_token({"uid": owner, "user_type": "owner"})
+    auth = {"Authorization": f"Bearer {owner_token}"}
+
+    def nearby(rng):
+        _, _, _, lat, lng = rng.choice(datagen.CITIES)
+        return f"/restaurants/nearby?lat={lat}&lng={lng}&radius_km=5", None
+
+    return {
+        "GET /restaurants": lambda rng: ("/restaurants?limit=20&fields=rid,name,address,overall_rating", None),
+        "GET /restaurants?sort=rating": lambda rng: ("/restaurants?limit=20&sort=rating", None),
+        "GET /restaurants/{id}": lambda rng: (f"/restaurants/{restaurant(rng)}", None),
+        "GET /restaurants/{id}/menu": lambda rng: (f"/restaurants/{restaurant(rng)}/menu", None),
+        "GET /restaurants/{id}/page": lambda rng: (f"/restaurants/{restaurant(rng)}/page", None),
+        "GET /restaurants/{id}/reviews": lambda rng: (f"/restaurants/{restaurant(rng)}/reviews?limit=20", None),
+        "GET /restaurants/{id}/rating": lambda rng: (f"/restaurants/{restaurant(rng)}/rating", None),
+        "GET /restaurants/search": lambda rng: (f"/restaurants/search?q={rng.choice(SEARCH_TERMS)}", None),
+        "GET /restaurants/nearby": nearby,
+        "GET /users/{uid}/reviews": lambda rng: (f"/users/{rng.randint(1, sizes['user'])}/reviews?limit=20", None),
+        "GET /owner/view-listings": lambda rng: ("/owner/view-listings", auth),
+    }
+
+
+def percentile(ordered: list, pct: float) -> float:
+    # nearest-rank percentile of an already sorted list
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+async def drive(client: httpx.AsyncClient, requests: list, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    pending = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for path, headers in pending:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]),
+    }
+
+
+async def run(base_url: str, sizes: dict, args, info: dict):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        for name, make_request in routes(sizes).items():
+            if args.route and args.route not in name:
+                continue
+            rng = Random(f"{args.seed}:{name}")
+            await drive(client, [make_request(rng) for _ in range(args.warmup)], args.concurrency)
+            result = await drive(client, [make_request(rng) for _ in range(args.requests)], args.concurrency)
+            common.emit({
+                "case": f"load/{name}",
+                "scale": sizes["review"],
+                "concurrency": args.concurrency,
+                "workers": args.workers,
+                **result,
+            }, info, args.output)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "DATABASE_URL": database_url}
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+    ]
+    return subprocess.Popen(command, cwd=common.ROUTES_DIR, env=env)
+
+
+def wait_until_ready(server: subprocess.Popen, base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/restaurants?limit=1", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"uvicorn did not answer within {timeout:.0f}s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure per-route latency and throughput over HTTP.")
+    parser.add_argument("--scale", default="1k", help="datagen scale: 1k, 100k, 1m or a number")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database", help="reuse this SQLite file instead of generating one")
+    parser.add_argument("--requests", type=int, default=1000, help="measured requests per route")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per route")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--route", help="only run routes whose name contains this")
+    parser.add_argument("--output", help="also append the JSON lines to this file")
+    args = parser.parse_args(argv)
+
+    sizes = datagen.table_sizes(datagen.scale_rows(args.scale))
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(args.database) if args.database else Path(tmp) / "bench.db"
+        database_url = f"sqlite:///{database.resolve()}"
+        if not args.database:
+            datagen.generate(create_engine(database_url), args.scale, args.seed)
+
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(database_url, port, args.workers)
+        try:
+            wait_until_ready(server, base_url)
+            asyncio.run(run(base_url, sizes, args, common.run_info()))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
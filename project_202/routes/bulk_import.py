@@ -0,0 +1,254 @@
+"""Streaming bulk import of restaurants and reviews from CSV or NDJSON.
+
+Rows are validated with the API schemas and inserted in batches, one
+transaction and one executemany INSERT per batch. A failing row is reported
+and skipped; a failing batch is rolled back and reported without stopping the
+import.
+
+    python bulk_import.py restaurants listings.csv
+    python bulk_import.py reviews reviews.ndjson --batch-size 5000
+"""
+import argparse
+import csv
+import json
+import sys
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+from pydantic import ValidationError
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+import models, schemas, rating_aggregates
+import menus
+from search_index import restaurant_index
+from geo_index import restaurant_geo_index
+import http_cache
+
+DEFAULT_BATCH_SIZE = 1000
+FORMATS = ("csv", "ndjson")
+
+
+def detect_format(filename: str | None, default: str = "csv") -> str:
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if filename and filename.lower().endswith(".csv"):
+        return "csv"
+    return default
+
+
+def iter_records(lines, fmt: str):
+    """Yield (line number, raw dict or error message) without reading the whole input."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            # empty CSV cells mean "not provided", not an empty string
+            yield reader.line_num, {k: (None if v == "" else v) for k, v in record.items() if k}
+    elif fmt == "ndjson":
+        for line_num, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_num, f"Invalid JSON: {e}"
+                continue
+            yield line_num, record if isinstance(record, dict) else "Expected a JSON object"
+    else:
+        raise ValueError(f"Unsupported format {fmt!r}, expected one of {FORMATS}")
+
+
+def _restaurant_row(record: dict) -> dict:
+    restaurant = schemas.RestaurantImport(**record)
+    opentime = datetime.strptime(restaurant.opentime, "%H:%M").time()
+    closetime = datetime.strptime(restaurant.closetime, "%H:%M").time()
+    if opentime >= closetime:
+        raise ValueError("Opening time must be before closing time")
+    return {
+        "name": restaurant.name,
+        "owner_id": restaurant.owner_id,
+        "address": restaurant.address,
+        "city": restaurant.city,
+        "state": restaurant.state,
+        "zip_code": str(restaurant.zip),
+        "phone": restaurant.phone,
+        "website": restaurant.website,
+        "opentime": opentime.strftime("%H:%M"),
+        "closetime": closetime.strftime("%H:%M"),
+        "description": restaurant.description,
+        "status": str(restaurant.status),
+        "overall_rating": 0.0,
+        "review_count": 0,
+        "rating_sum": 0.0,
+        "menu": restaurant.menu,
+        "menu_photo": restaurant.menu_photo,
+        "latitude": restaurant.latitude,
+        "longitude": restaurant.longitude,
+    }
+
+
+def _review_row(record: dict) -> dict:
+    review = schemas.ReviewImport(**record)
+    if not 1 <= review.rating <= 5:
+        raise ValueError("Rating must be between 1 and 5")
+    return {
+        "rid": review.rid,
+        "uid": review.uid,
+        "rating": review.rating,
+        "comment": review.comment,
+        "created": datetime.now(),
+    }
+
+
+def _error_text(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    return str(e)
+
+
+def _insert_restaurants(db: Session, rows: list, errors: list) -> list:
+    if not rows:
+        return []
+    # One lookup per batch replaces the per-listing existence query of /add-listing
+    keys = [(row["name"], row["address"]) for _, row in rows]
+    existing = set(db.query(models.Restaurant.name, models.Restaurant.address).filter(
+        tuple_(models.Restaurant.name, models.Restaurant.address).in_(keys)
+    ).all())
+    accepted, seen = [], set()
+    for line_num, row in rows:
+        key = (row["name"], row["address"])
+        if key in existing or key in seen:
+            errors.append({"line": line_num, "error": "A restaurant with this name and address already exists"})
+            continue
+        seen.add(key)
+        accepted.append(row)
+    if not accepted:
+        return accepted
+
+    items_by_key = {}
+    for row in accepted:
+        items = menus.parse_menu(row["menu"])
+        row.update(menus.price_stats(items))
+        items_by_key[(row["name"], row["address"])] = items
+    db.execute(insert(models.Restaurant), accepted)
+
+    # executemany cannot portably return ids (no RETURNING on MySQL), so the new
+    # rids are looked up by the batch's unique (name, address) keys
+    new_rids = db.query(models.Restaurant.rid, models.Restaurant.name, models.Restaurant.address).filter(
+        tuple_(models.Restaurant.name, models.Restaurant.address).in_(list(items_by_key))
+    ).all()
+    menu_rows = [
+        {"rid": row.rid, **item}
+        for row in new_rids
+        for item in items_by_key[(row.name, row.address)]
+    ]
+    if menu_rows:
+        db.execute(insert(models.MenuItem), menu_rows)
+    return accepted
+
+
+def _insert_reviews(db: Session, rows: list, errors: list) -> list:
+    if not rows:
+        return []
+    # One lookup per batch; SQLite does not enforce the foreign key, so an orphan
+    # review would otherwise be inserted and counted against no restaurant
+    rids = {row["rid"] for _, row in rows}
+    existing = {rid for (rid,) in db.query(models.Restaurant.rid).filter(models.Restaurant.rid.in_(rids))}
+    accepted = []
+    for line_num, row in rows:
+        if row["rid"] not in existing:
+            errors.append({"line": line_num, "error": f"Restaurant {row['rid']} does not exist"})
+            continue
+        accepted.append(row)
+    if not accepted:
+        return accepted
+    db.execute(insert(models.Review), accepted)
+    totals = defaultdict(lambda: [0, 0.0])
+    for row in accepted:
+        totals[row["rid"]][0] += 1
+        totals[row["rid"]][1] += row["rating"]
+    for rid, (count, rating_total) in totals.items():
+        rating_aggregates.record_reviews(db, rid, count, rating_total)
+    return accepted
+
+
+IMPORTERS = {
+    "restaurants": (_restaurant_row, _insert_restaurants),
+    "reviews": (_review_row, _insert_reviews),
+}
+
+
+def import_records(db: Session, kind: str, records, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    if kind not in IMPORTERS:
+        raise ValueError(f"Unknown import kind {kind!r}, expected one of {tuple(IMPORTERS)}")
+    to_row, insert_batch = IMPORTERS[kind]
+
+    report = {"inserted": 0, "failed": 0, "batches": []}
+    records = iter(records)
+    batch_num = 0
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+        batch_num += 1
+        errors, rows = [], []
+        for line_num, record in chunk:
+            if isinstance(record, str):
+                errors.append({"line": line_num, "error": record})
+                continue
+            try:
+                rows.append((line_num, to_row(record)))
+            except (ValidationError, ValueError, TypeError) as e:
+                errors.append({"line": line_num, "error": _error_text(e)})
+
+        try:
+            inserted = len(insert_batch(db, rows, errors))
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            inserted = 0
+            errors.append({"line": None, "error": f"Batch rolled back: {getattr(e, 'orig', None) or e}"})
+
+        failed = len(chunk) - inserted
+        report["inserted"] += inserted
+        report["failed"] += failed
+        report["batches"].append({"batch": batch_num, "inserted": inserted, "failed": failed, "errors": errors})
+
+    if kind == "restaurants" and report["inserted"]:
+        # cheaper to rebuild the listing indexes in the background than to upsert row by row
+        restaurant_index.invalidate()
+        restaurant_geo_index.invalidate()
+        http_cache.purge(http_cache.LIST_KEY)
+    if kind == "reviews" and report["inserted"]:
+        # ratings changed on an unknown set of restaurants
+        http_cache.purge_all()
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import restaurants or reviews.")
+    parser.add_argument("kind", choices=tuple(IMPORTERS))
+    parser.add_argument("path", help="CSV or NDJSON file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension, then csv")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    import db_config
+    db_config._get_engine()
+    db = db_config._session_local()
+    fmt = args.format or detect_format(args.path)
+    stream = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+    try:
+        report = import_records(db, args.kind, iter_records(stream, fmt), args.batch_size)
+    finally:
+        db.close()
+        if stream is not sys.stdin:
+            stream.close()
+
+    json.dump(report, sys.stdout, indent=2, default=str)
+    print()
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""gzip/brotli response compression with a cache of compressed bodies.
+
+Brotli is used when the ``brotli`` package is installed and the client accepts
+it, gzip otherwise. Bodies under ``COMPRESSION_MINIMUM_SIZE`` are sent as is,
+and bodies over ``COMPRESSION_OFFLOAD_SIZE`` are compressed in the threadpool
+so a large list payload does not stall the event loop.
+
+Compressed bytes of publicly cacheable responses are kept in a TTLCache keyed
+by the body's ETag (or a digest of it), so identical payloads are compressed
+once. The key is derived from the content itself, so no invalidation is needed.
+"""
+import gzip
+import hashlib
+from starlette.concurrency import run_in_threadpool
+from cache import TTLCache
+from config import settings
+import metrics
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+# (encoding, etag or body digest) -> compressed bytes
+compressed_bodies = TTLCache(
+    maxsize=settings.COMPRESSION_CACHE_SIZE,
+    ttl=settings.COMPRESSION_CACHE_TTL_SECONDS,
+)
+metrics.register_cache("compressed_bodies", compressed_bodies)
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(body, compresslevel=settings.GZIP_LEVEL, mtime=0)
+
+
+def _header(headers, name: bytes):
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware; streamed responses (more_body) pass through untouched."""
+
+    def __init__(self, app, minimum_size: int | None = None, offload_size: int | None = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        self.offload_size = settings.COMPRESSION_OFFLOAD_SIZE if offload_size is None else offload_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if message.get("more_body", False):
+                # streaming response: flush what we held back and stop interfering
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            await self._send_body(send, start, message.get("body", b""), encoding)
+
+        await self.app(scope, receive, send_compressed)
+
+    async def _send_body(self, send, start, body: bytes, encoding: str):
+        headers = list(start.get("headers", []))
+        content_type = _header(headers, b"content-type") or ""
+        if (
+            len(body) < self.minimum_size
+            or start["status"] in (204, 206, 304)
+            or _header(headers, b"content-encoding") is not None
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+        ):
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = _header(headers, b"etag")
+        cache_control = _header(headers, b"cache-control") or ""
+        cache_key = None
+        if etag:
+            cache_key = (encoding, etag)
+        elif cache_control.startswith("public"):
+            cache_key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+
+        compressed = compressed_bodies.get(cache_key) if cache_key else None
+        if compressed is None:
+            if len(body) >= self.offload_size:
+                compressed = await run_in_threadpool(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            if cache_key:
+                compressed_bodies.set(cache_key, compressed)
+
+        headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"etag", b"vary")]
+        vary = _header(start.get("headers", []), b"vary")
+        headers.append((b"vary", (f"{vary}, Accept-Encoding" if vary else "Accept-Encoding").encode("latin-1")))
+        headers.append((b"content-encoding", encoding.encode("latin-1")))
+        headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+        if etag:
+            # a different representation of the same resource: the validator becomes weak
+            headers.append((b"etag", (etag if etag.startswith("W/") else f"W/{etag}").encode("latin-1")))
+        await send({**start, "headers": headers})
+        await send({"type": "http.response.body", "body": compressed})
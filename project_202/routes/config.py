@@ -1,3 +1,4 @@
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
@@ -19,11 +20,81 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
     SECRET_KEY: str = ""
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+
+    # bcrypt work factor; stored hashes with a different cost are rehashed on login.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
     MAPS_KEY: str = ""
 
+    # Resolved principals and decoded tokens are cached to skip a user lookup per request.
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_SIZE: int = 4096
+
+    # Google Places proxy; point PLACES_BASE_URL at a local stand-in for tests.
+    PLACES_BASE_URL: str = "https://maps.googleapis.com/maps/api/place"
+    PLACES_TIMEOUT_SECONDS: float = 5.0
+    PLACES_MAX_CONNECTIONS: int = 20
+    PLACES_CACHE_TTL_SECONDS: int = 600
+    PLACES_CACHE_SIZE: int = 1024
+
+    # Connection pooling. "auto" picks "serverless" on Vercel/Lambda and "server" elsewhere;
+    # serverless uses NullPool unless SERVERLESS_POOL_SIZE asks for a tiny pool.
+    DB_POOL_PROFILE: str = "auto"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    SERVERLESS_POOL_SIZE: int = 0
+
     # Comma-separated list, for example: https://app.vercel.app,https://www.app.com
     CORS_ORIGINS: str = "*"
 
+    # Configure mappers and create the engines in the lifespan startup (see warmup.py)
+    WARM_UP_ON_STARTUP: bool = True
+
+    # Pre-encoded restaurant detail/menu bodies, revalidated against Restaurant.revision
+    RESPONSE_CACHE_TTL_SECONDS: int = 600
+    RESPONSE_CACHE_SIZE: int = 2048
+
+    # Response compression (brotli needs the optional `brotli` package); see compression.py
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_OFFLOAD_SIZE: int = 64 * 1024
+    COMPRESSION_CACHE_SIZE: int = 256
+    COMPRESSION_CACHE_TTL_SECONDS: int = 600
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+
+    # Per-request query instrumentation; see query_stats.py. QUERY_BUDGET_MODE is
+    # "off", "log" (warn on budget/N+1 violations) or "raise" (used by the tests).
+    SERVER_TIMING: bool = True
+    QUERY_BUDGET: int = 25
+    QUERY_REPEAT_LIMIT: int = 5
+    QUERY_BUDGET_MODE: str = "log"
+
+    # Prometheus metrics on /metrics; see metrics.py. With several uvicorn workers, point
+    # METRICS_DIR at a directory they share so each scrape covers all of them.
+    METRICS_ENABLED: bool = True
+    METRICS_DIR: str = ""
+    METRICS_FLUSH_SECONDS: float = 5.0
+
+    # Request profiling (see profiling.py): admins send X-Profile: 1; PROFILE_SAMPLE_EVERY=N > 0
+    # also profiles every Nth request per route. The last PROFILE_BUFFER_SIZE profiles are kept per worker.
+    PROFILE_SAMPLE_EVERY: int = 0
+    PROFILE_BUFFER_SIZE: int = 50
+    PROFILE_INTERVAL_SECONDS: float = 0.001
+    PROFILE_MAX_SECONDS: float = 30.0
+
+    # Seconds before a worker rebuilds its in-process listing indexes (search, geo) from the database;
+    # the rebuild runs in the background while the stale copy keeps serving.
+    # SEARCH_INDEX_MAX_AGE_SECONDS is its earlier name, still read so existing environments keep their value.
+    LISTING_INDEX_MAX_AGE_SECONDS: int = Field(
+        300, validation_alias=AliasChoices("LISTING_INDEX_MAX_AGE_SECONDS", "SEARCH_INDEX_MAX_AGE_SECONDS"),
+    )
+    # Grid cell size for the nearby-restaurants index (0.1 degrees is roughly 11 km).
+    GEO_INDEX_CELL_DEGREES: float = 0.1
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -1,11 +1,11 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from dotenv import load_dotenv
-
-
-load_dotenv()
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from config import settings
+import pool_metrics
 
 
 def _resolve_database_url() -> str:
@@ -31,17 +31,93 @@ Base = declarative_base()
 
 _engine = None
 _session_local = None
+_async_engine = None
+_async_session_local = None
 
+# Sync driver (or bare dialect) -> asyncio driver for the same database
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
 
-def _get_engine():
-    global _engine, _session_local
-    if _engine is None:
-        url = _resolve_database_url()
-        _engine = create_engine(
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url.replace("postgres://", "postgresql://", 1) if url.startswith("postgres://") else url)
+    if parsed.drivername in ASYNC_DRIVERS.values():
+        return parsed.render_as_string(hide_password=False)
+    if parsed.drivername not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No asyncio driver configured for {parsed.drivername}")
+    parsed = parsed.set(drivername=ASYNC_DRIVERS[parsed.drivername])
+    if parsed.drivername == "postgresql+asyncpg" and "sslmode" in parsed.query:
+        # asyncpg spells libpq's sslmode as ssl
+        parsed = parsed.difference_update_query(["sslmode"]).update_query_dict({"ssl": parsed.query["sslmode"]})
+    return parsed.render_as_string(hide_password=False)
+
+
+def pool_profile() -> str:
+    if settings.DB_POOL_PROFILE != "auto":
+        return settings.DB_POOL_PROFILE
+    # Vercel and Lambda freeze instances between requests; idle pooled connections go stale
+    serverless = os.getenv("VERCEL") or os.getenv("AWS_LAMBDA_FUNCTION_NAME")
+    return "serverless" if serverless else "server"
+
+
+def pool_options(url: str, profile: str, is_async: bool = False) -> dict:
+    """create_engine pool arguments for a deployment profile ("server" or "serverless")."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}  # in-memory SQLite keeps SQLAlchemy's per-thread pool
+    queue_pool = AsyncAdaptedQueuePool if is_async else QueuePool
+    if profile == "serverless":
+        if settings.SERVERLESS_POOL_SIZE <= 0:
+            return {"poolclass": NullPool}
+        return {
+            "poolclass": queue_pool,
+            "pool_size": settings.SERVERLESS_POOL_SIZE,
+            "max_overflow": 0,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": min(settings.DB_POOL_RECYCLE, 300),
+            "pool_pre_ping": True,
+        }
+    if profile != "server":
+        raise RuntimeError(f"Unknown DB_POOL_PROFILE {profile!r}, expected auto, server or serverless")
+    return {
+        "poolclass": queue_pool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def create_db_engine(url: str, name: str, profile: str | None = None, is_async: bool = False):
+    """Engine with the profile's pool, instrumented under ``name`` in pool_metrics."""
+    options = pool_options(url, profile or pool_profile(), is_async)
+    stats = pool_metrics.PoolStats(name)
+    if "poolclass" in options:
+        options["poolclass"] = pool_metrics.timed_pool_class(options["poolclass"], stats)
+    if is_async:
+        # sqlalchemy.ext.asyncio (and greenlet) load on the first async request, not at import
+        from sqlalchemy.ext.asyncio import create_async_engine
+        engine = create_async_engine(url, **options)
+    else:
+        engine = create_engine(
             url,
             connect_args={"check_same_thread": False} if url.startswith("sqlite") else {},
-            pool_pre_ping=True,
+            **options,
         )
+    pool_metrics.registry[name] = stats.attach(engine)
+    return engine
+
+
+def _get_engine():
+    global _engine, _session_local
+    if _engine is None:
+        _engine = create_db_engine(_resolve_database_url(), "sync")
         _session_local = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
     return _engine
 
@@ -54,3 +130,23 @@ def get_db():
     finally:
         db.close()
 
+
+
+def _get_async_engine():
+    global _async_engine, _async_session_local
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+        _async_engine = create_db_engine(async_database_url(_resolve_database_url()), "async", is_async=True)
+        # expire_on_commit=False: attributes stay readable after commit without a lazy load
+        _async_session_local = async_sessionmaker(_async_engine, class_=AsyncSession, expire_on_commit=False)
+    return _async_engine
+
+
+async def get_async_db():
+    """AsyncSession dependency for routes that await the database instead of holding a threadpool worker.
+
+    Sync helpers can be reused unchanged with ``await db.run_sync(fn, *args)``.
+    """
+    _get_async_engine()
+    async with _async_session_local() as db:
+        yield db
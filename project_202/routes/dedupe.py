@@ -0,0 +1,191 @@
+import re
+from collections import defaultdict
+from itertools import combinations
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import models
+from geo_index import haversine_km
+
+NAME_STOPWORDS = {"the", "and", "restaurant", "restaurants", "cafe", "grill", "bar", "kitchen", "co", "inc", "llc"}
+# Blocks larger than this are skipped; a very common token carries no signal and
+# comparing every pair inside it would be quadratic.
+MAX_BLOCK_SIZE = 1000
+SAME_PLACE_KM = 0.25
+DELETE_BATCH_SIZE = 500
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_name(name: str | None) -> str:
+    # drop apostrophes first so possessives match ("Joe's" == "Joes")
+    text = (name or "").lower().replace("'", "").replace("\u2019", "").replace("&", " and ")
+    tokens = _WORD_RE.findall(text)
+    kept = [t for t in tokens if t not in NAME_STOPWORDS]
+    return " ".join(kept or tokens)
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+class _DisjointSet:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # the lowest rid (first created) is always the cluster root
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def exact_duplicates(db: Session) -> list:
+    """(duplicate rid, kept rid) pairs for listings sharing an exact name in the same zip and city.
+
+    Listings with neither a zip code nor a city are left to the fuzzy pass,
+    which can still match them on coordinates or address. Resolved in SQL with
+    a GROUP BY; only the rids come back to Python.
+    """
+    # NULLs folded to '' so a missing zip or city groups and joins like a value
+    zip_key = func.coalesce(models.Restaurant.zip_code, "")
+    city_key = func.lower(func.coalesce(models.Restaurant.city, ""))
+    located = models.Restaurant.zip_code.isnot(None) | models.Restaurant.city.isnot(None)
+    keep = db.query(
+        models.Restaurant.name.label("name"),
+        zip_key.label("zip_key"),
+        city_key.label("city_key"),
+        func.min(models.Restaurant.rid).label("keep_rid"),
+    ).filter(located)\
+        .group_by(models.Restaurant.name, zip_key, city_key)\
+        .having(func.count(models.Restaurant.rid) > 1)\
+        .subquery()
+
+    rows = db.query(models.Restaurant.rid, keep.c.keep_rid)\
+        .join(keep, (keep.c.name == models.Restaurant.name)
+              & (keep.c.zip_key == zip_key)
+              & (keep.c.city_key == city_key))\
+        .filter(models.Restaurant.rid != keep.c.keep_rid)\
+        .all()
+    return [(row.rid, row.keep_rid) for row in rows]
+
+
+def _same_place(a, b) -> bool:
+    if a.zip_code and b.zip_code and a.zip_code == b.zip_code:
+        return True
+    if None not in (a.latitude, a.longitude, b.latitude, b.longitude):
+        return haversine_km(a.latitude, a.longitude, b.latitude, b.longitude) <= SAME_PLACE_KM
+    if a.address and b.address:
+        return similarity(normalize_name(a.address), normalize_name(b.address)) >= 0.8
+    return False
+
+
+def fuzzy_duplicates(db: Session, threshold: float = 0.8) -> list:
+    """(rid, rid, score) pairs whose normalized names are similar and that sit in the same place.
+
+    Candidates are generated from a blocking index (normalized name tokens, zip
+    code, ~1 km geo cell) so only listings sharing a block are compared.
+    """
+    rows = db.query(
+        models.Restaurant.rid,
+        models.Restaurant.name,
+        models.Restaurant.address,
+        models.Restaurant.zip_code,
+        models.Restaurant.latitude,
+        models.Restaurant.longitude,
+    ).all()
+
+    names = {}
+    blocks = defaultdict(list)
+    for row in rows:
+        names[row.rid] = normalize_name(row.name)
+        for token in set(names[row.rid].split()):
+            if len(token) > 1:
+                blocks[("name", token)].append(row)
+        if row.zip_code:
+            blocks[("zip", row.zip_code)].append(row)
+        if row.latitude is not None and row.longitude is not None:
+            blocks[("geo", round(row.latitude, 2), round(row.longitude, 2))].append(row)
+
+    seen = set()
+    pairs = []
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > MAX_BLOCK_SIZE:
+            continue
+        for a, b in combinations(members, 2):
+            key = (min(a.rid, b.rid), max(a.rid, b.rid))
+            if key in seen:
+                continue
+            seen.add(key)
+            score = similarity(names[a.rid], names[b.rid])
+            if score >= threshold and _same_place(a, b):
+                pairs.append((key[0], key[1], round(score, 3)))
+    return pairs
+
+
+def find_duplicates(db: Session, fuzzy: bool = False, threshold: float = 0.8) -> list:
+    """Group duplicates into clusters, keeping the first-created listing of each."""
+    clusters = _DisjointSet()
+    scores = {}
+    for duplicate, kept in exact_duplicates(db):
+        clusters.union(duplicate, kept)
+        scores[duplicate] = 1.0
+    if fuzzy:
+        for a, b, score in fuzzy_duplicates(db, threshold):
+            clusters.union(a, b)
+            scores[max(a, b)] = max(scores.get(max(a, b), 0), score)
+
+    groups = defaultdict(list)
+    for rid in list(clusters.parent):
+        root = clusters.find(rid)
+        if rid != root:
+            groups[root].append(rid)
+    return [
+        {
+            "keep": keep,
+            "remove": sorted(removed),
+            "score": min(scores.get(rid, 1.0) for rid in removed),
+        }
+        for keep, removed in sorted(groups.items())
+    ]
+
+
+def listing_owners(db: Session, rids: list, batch_size: int = DELETE_BATCH_SIZE) -> set:
+    """Owner ids of the given listings, read before they are deleted so their caches can be purged."""
+    owners = set()
+    for start in range(0, len(rids), batch_size):
+        batch = rids[start:start + batch_size]
+        owners.update(
+            owner_id for (owner_id,) in db.query(models.Restaurant.owner_id)
+            .filter(models.Restaurant.rid.in_(batch), models.Restaurant.owner_id.isnot(None))
+            .distinct()
+        )
+    return owners
+
+
+def delete_listings(db: Session, rids: list, batch_size: int = DELETE_BATCH_SIZE) -> int:
+    # Set-based deletes in batches, children first, one transaction per batch.
+    deleted = 0
+    for start in range(0, len(rids), batch_size):
+        batch = rids[start:start + batch_size]
+        for child in (models.Review, models.Photo, models.Cuisine, models.MenuItem):
+            db.query(child).filter(child.rid.in_(batch)).delete(synchronize_session=False)
+        deleted += db.query(models.Restaurant)\
+            .filter(models.Restaurant.rid.in_(batch))\
+            .delete(synchronize_session=False)
+        db.commit()
+    return deleted
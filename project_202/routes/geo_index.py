@@ -0,0 +1,108 @@
+import heapq
+import math
+from sqlalchemy.orm import Session
+import models
+from listing_index import ListingIndex
+from config import settings
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoIndex(ListingIndex):
+    """Uniform lat/lng grid over restaurant coordinates.
+
+    A query only visits the cells overlapping the search radius' bounding box,
+    then refines candidates with an exact haversine distance. Loading and
+    staleness follow ``listing_index.ListingIndex``.
+    """
+
+    _state = ("_cells", "_points")
+
+    def __init__(self, cell_degrees: float = 0.1, max_age: float = 300):
+        self.cell_degrees = cell_degrees
+        self._lng_cells = math.ceil(360 / cell_degrees)
+        super().__init__(max_age)
+
+    def _reset(self):
+        self._cells = {}   # (lat cell, lng cell) -> {rid: (lat, lng)}
+        self._points = {}  # rid -> cell key, needed for moves/removal
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat: float, lng: float) -> tuple:
+        return (
+            math.floor((lat + 90) / self.cell_degrees),
+            math.floor((lng + 180) / self.cell_degrees) % self._lng_cells,
+        )
+
+    def _read(self, db: Session) -> list:
+        return db.query(
+            models.Restaurant.rid,
+            models.Restaurant.latitude,
+            models.Restaurant.longitude,
+        ).filter(
+            models.Restaurant.latitude.isnot(None),
+            models.Restaurant.longitude.isnot(None),
+        ).all()
+
+    def _entry(self, restaurant) -> tuple | None:
+        if restaurant.latitude is None or restaurant.longitude is None:
+            return None
+        return (restaurant.latitude, restaurant.longitude)
+
+    def _add(self, rid: int, point: tuple):
+        key = self._cell(*point)
+        self._cells.setdefault(key, {})[rid] = point
+        self._points[rid] = key
+
+    def _remove(self, rid: int):
+        key = self._points.pop(rid, None)
+        if key is None:
+            return
+        cell = self._cells[key]
+        cell.pop(rid, None)
+        if not cell:
+            del self._cells[key]
+
+    def nearby(self, lat: float, lng: float, radius_km: float, limit: int = 20) -> list:
+        # Bounding box of the search circle, in degrees.
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = math.cos(math.radians(lat))
+        dlng = 180 if cos_lat < 1e-9 else min(180, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+
+        lat_lo = math.floor((max(-90, lat - dlat) + 90) / self.cell_degrees)
+        lat_hi = math.floor((min(90, lat + dlat) + 90) / self.cell_degrees)
+        lng_lo = math.floor((lng - dlng + 180) / self.cell_degrees)
+        lng_hi = math.floor((lng + dlng + 180) / self.cell_degrees)
+        lng_span = range(lng_lo, lng_hi + 1)
+        if len(lng_span) >= self._lng_cells:
+            lng_span = range(self._lng_cells)
+
+        matches = []
+        with self._lock:
+            for lat_cell in range(lat_lo, lat_hi + 1):
+                for lng_cell in lng_span:
+                    cell = self._cells.get((lat_cell, lng_cell % self._lng_cells))
+                    if not cell:
+                        continue
+                    for rid, (plat, plng) in cell.items():
+                        distance = haversine_km(lat, lng, plat, plng)
+                        if distance <= radius_km:
+                            matches.append((distance, rid))
+        return [(rid, distance) for distance, rid in heapq.nsmallest(limit, matches)]
+
+
+restaurant_geo_index = GeoIndex(
+    cell_degrees=settings.GEO_INDEX_CELL_DEGREES,
+    max_age=settings.LISTING_INDEX_MAX_AGE_SECONDS,
+)
@@ -0,0 +1,170 @@
+"""HTTP caching headers for anonymous reads, plus surrogate-key purging.
+
+``HTTPCacheMiddleware`` adds ``Cache-Control`` and ``Surrogate-Key`` headers to
+GET/HEAD responses of the routes in ``POLICIES`` so a CDN (or a local reverse
+proxy stand-in) can serve repeat reads. Handlers add ``Last-Modified`` and
+extra keys through ``tag()``. Write routes call ``purge_restaurant()``; purge
+handlers registered with ``register_purge_handler()`` forward the keys to the
+CDN and drop in-process caches.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+LIST_KEY = "list"
+
+
+class CachePolicy:
+    def __init__(self, max_age: int, s_maxage: int | None = None, stale_while_revalidate: int = 0,
+                 keys=(), public: bool = True):
+        self.public = public
+        self.keys = keys  # surrogate keys; "{name}" is filled from the path params
+        if not public:
+            self.cache_control = "private, no-store"
+            return
+        parts = ["public", f"max-age={max_age}"]
+        if s_maxage is not None:
+            parts.append(f"s-maxage={s_maxage}")
+        if stale_while_revalidate:
+            parts.append(f"stale-while-revalidate={stale_while_revalidate}")
+        self.cache_control = ", ".join(parts)
+
+
+NO_STORE = CachePolicy(0, public=False)
+
+# Keyed by the route's path template. Routes a user's own write invalidates
+# (restaurant pages, their reviews, a user's review history) use max-age=0: only
+# the purgeable shared cache holds them, and browsers revalidate with
+# ETag/Last-Modified instead of showing a stale page after an edit or review.
+POLICIES = {
+    "/restaurants": CachePolicy(30, s_maxage=300, stale_while_revalidate=60, keys=(LIST_KEY,)),
+    "/restaurants/search": CachePolicy(30, s_maxage=120, keys=(LIST_KEY,)),
+    "/restaurants/nearby": CachePolicy(30, s_maxage=120, keys=(LIST_KEY,)),
+    "/restaurants/google-places/{zipcode}": CachePolicy(600, s_maxage=3600),
+    "/restaurants/{restaurant_id}": CachePolicy(0, s_maxage=600, stale_while_revalidate=60, keys=("restaurant-{restaurant_id}",)),
+    "/restaurants/{restaurant_id}/menu": CachePolicy(0, s_maxage=600, stale_while_revalidate=60, keys=("restaurant-{restaurant_id}",)),
+    "/restaurants/{restaurant_id}/page": CachePolicy(0, s_maxage=300, stale_while_revalidate=60, keys=("restaurant-{restaurant_id}",)),
+    "/restaurants/{restaurant_id}/reviews": CachePolicy(0, s_maxage=120, stale_while_revalidate=30, keys=("restaurant-{restaurant_id}",)),
+    "/restaurants/{restaurant_id}/rating": CachePolicy(0, s_maxage=120, stale_while_revalidate=30, keys=("restaurant-{restaurant_id}",)),
+    "/users/": NO_STORE,
+    "/users/{uid}": NO_STORE,
+    "/users/{uid}/reviews": CachePolicy(0, s_maxage=120, stale_while_revalidate=30, keys=("user-{uid}",)),
+}
+
+_purge_handlers = []
+
+
+def restaurant_keys(rid: int, owner_id: int | None = None) -> list:
+    keys = [f"restaurant-{rid}", LIST_KEY]
+    if owner_id is not None:
+        keys.append(f"owner-{owner_id}")
+    return keys
+
+
+def register_purge_handler(handler):
+    """``handler(keys)`` is called with a tuple of surrogate keys, or None for everything."""
+    _purge_handlers.append(handler)
+    return handler
+
+
+def purge(*keys):
+    for handler in _purge_handlers:
+        handler(tuple(keys))
+
+
+def purge_all():
+    for handler in _purge_handlers:
+        handler(None)
+
+
+def purge_restaurant(rid: int, owner_id: int | None = None):
+    purge(*restaurant_keys(rid, owner_id))
+
+
+def tag(request, last_modified: datetime | None = None, keys=()):
+    # Handlers call this; the middleware turns it into response headers.
+    if last_modified is not None:
+        request.state.last_modified = last_modified
+    if keys:
+        request.state.surrogate_keys = list(getattr(request.state, "surrogate_keys", [])) + list(keys)
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # timestamps are stored in UTC
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def not_modified_since(if_modified_since: str | None, last_modified: datetime) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+class HTTPCacheMiddleware:
+    """Pure ASGI middleware, so streaming bodies are passed through untouched."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        anonymous = b"authorization" not in request_headers
+        suppress_body = False
+
+        async def send_with_cache_headers(message):
+            nonlocal suppress_body
+            if message["type"] == "http.response.start":
+                message = self._with_headers(scope, message, anonymous, request_headers)
+                suppress_body = message["status"] == 304
+            elif suppress_body:
+                if not message.get("more_body", False):
+                    await send({"type": "http.response.body", "body": b""})
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_headers)
+
+    def _with_headers(self, scope, message, anonymous, request_headers):
+        route = scope.get("route")
+        policy = POLICIES.get(getattr(route, "path", None))
+        status = message["status"]
+        if policy is None or status not in (200, 304):
+            return message
+
+        headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"cache-control"]
+        if not anonymous and policy.public:
+            # never let a shared cache store a response to an authenticated request
+            headers.append((b"cache-control", b"private, no-cache"))
+            return {**message, "headers": headers}
+        headers.append((b"cache-control", policy.cache_control.encode("latin-1")))
+        if not policy.public:
+            return {**message, "headers": headers}
+
+        state = scope.get("state", {})
+        path_params = scope.get("path_params", {})
+        keys = [key.format(**path_params) for key in policy.keys]
+        keys.extend(k for k in state.get("surrogate_keys", ()) if k not in keys)
+        if keys:
+            headers.append((b"surrogate-key", " ".join(keys).encode("latin-1")))
+
+        last_modified = state.get("last_modified")
+        if last_modified is not None:
+            headers.append((b"last-modified", http_date(last_modified).encode("latin-1")))
+            if (
+                status == 200
+                and b"if-none-match" not in request_headers
+                and not_modified_since(request_headers.get(b"if-modified-since", b"").decode("latin-1"), last_modified)
+            ):
+                status = 304
+                headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"content-type")]
+        return {**message, "status": status, "headers": headers}
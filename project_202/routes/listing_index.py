@@ -0,0 +1,120 @@
+import copy
+import threading
+import time
+from sqlalchemy.orm import Session
+
+
+class ListingIndex:
+    """Loading and refresh shared by the in-process listing indexes.
+
+    The first request builds the index from the database and waits for it.
+    After that the index is kept current by the owner/admin write routes
+    (``upsert``/``remove``). Each worker process holds its own copy, so once it
+    is older than ``max_age`` seconds, or after ``invalidate()``, the next
+    request starts a rebuild on a background thread and keeps serving the
+    stale copy until the new one is swapped in. Writes made while a rebuild is
+    reading are replayed onto the new copy.
+
+    Subclasses define ``_reset`` (empty the index state), ``_read`` (rows to
+    index), ``_entry`` (what a row or restaurant contributes, None for
+    nothing) and ``_add``/``_remove`` for one rid, and list the attributes
+    ``_reset`` creates in ``_state``.
+    """
+
+    _state = ()
+
+    def __init__(self, max_age: float = 300):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()  # one rebuild at a time per index
+        self._generation = 0
+        self._pending = None
+        self._refresh_thread = None
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self._loaded_at = None
+            self._generation += 1
+
+    def invalidate(self):
+        """Mark the index stale; it is still served until the background rebuild lands."""
+        with self._lock:
+            if self.loaded:
+                self._loaded_at = float("-inf")
+            self._generation += 1
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    @property
+    def stale(self) -> bool:
+        return not self.loaded or time.monotonic() - self._loaded_at >= self.max_age
+
+    def ensure_loaded(self, db: Session):
+        if not self.stale:
+            return
+        if not self.loaded:
+            with self._build_lock:
+                if not self.loaded:
+                    self._rebuild(db)
+            return
+        if self._build_lock.acquire(blocking=False):
+            self._refresh_thread = threading.Thread(
+                target=self._refresh, args=(db.get_bind(),), name=f"{type(self).__name__}-refresh", daemon=True,
+            )
+            self._refresh_thread.start()
+
+    def _refresh(self, bind):
+        try:
+            with Session(bind=bind) as db:
+                self._rebuild(db)
+        finally:
+            self._build_lock.release()
+
+    def _rebuild(self, db: Session):
+        with self._lock:
+            generation = self._generation
+            self._pending = []
+        try:
+            rows = self._read(db)
+            # built off the lock on a copy sharing only the configuration
+            fresh = copy.copy(self)
+            fresh._reset()
+            for row in rows:
+                entry = self._entry(row)
+                if entry is not None:
+                    fresh._add(row.rid, entry)
+            with self._lock:
+                if generation != self._generation:
+                    # cleared or invalidated while reading; the next request rebuilds again
+                    return
+                for name in self._state:
+                    setattr(self, name, getattr(fresh, name))
+                for rid, entry in self._pending:
+                    self._put_locked(rid, entry)
+                self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def upsert(self, restaurant):
+        self._put(restaurant.rid, self._entry(restaurant))
+
+    def remove(self, rid: int):
+        self._put(rid, None)
+
+    def _put(self, rid: int, entry):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((rid, entry))
+            # Writes before the first build are picked up by it.
+            if self.loaded:
+                self._put_locked(rid, entry)
+
+    def _put_locked(self, rid: int, entry):
+        self._remove(rid)
+        if entry is not None:
+            self._add(rid, entry)
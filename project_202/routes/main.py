@@ -1,12 +1,50 @@
-from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Optional
+from fastapi import FastAPI, HTTPException, Depends, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-import models
-from db_config import get_db
+import read_models
+import db_config
+from db_config import get_async_db
+from pagination import decode_cursor, encode_cursor, parse_fields
 from routers import restaurants, users, auth, owners
 from config import settings
+from places_client import places_client
+from http_cache import HTTPCacheMiddleware
+from compression import CompressionMiddleware
+from serialization import FastJSONResponse
+from query_stats import QueryStatsMiddleware
+import metrics
+from profiling import ProfilingMiddleware, follow_handler_threads
 
-app = FastAPI()
+if TYPE_CHECKING:
+    # annotation only: sqlalchemy.ext.asyncio loads with the first async engine (see db_config)
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # workers share their metrics through METRICS_DIR snapshots
+    flusher = asyncio.create_task(metrics.flush_periodically()) if settings.METRICS_DIR else None
+    # mappers and engines before the first request rather than during it (see warmup.py)
+    if settings.WARM_UP_ON_STARTUP:
+        import warmup
+        await asyncio.to_thread(warmup.warm_up)
+    yield
+    if flusher is not None:
+        flusher.cancel()
+        metrics.write_snapshot()
+    await places_client.aclose()
+    if db_config._async_engine is not None:
+        await db_config._async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# Cache-Control/Surrogate-Key/Last-Modified for public reads (see http_cache.py)
+app.add_middleware(HTTPCacheMiddleware)
+# gzip/brotli; added after (so outside) the cache middleware to see its Cache-Control
+app.add_middleware(CompressionMiddleware)
 
 cors_origins = [origin.strip() for origin in settings.CORS_ORIGINS.split(',') if origin.strip()]
 if not cors_origins:
@@ -21,38 +59,78 @@ app.add_middleware(
     allow_headers=['*'],
 )
 
+# Query count/DB time per request as Server-Timing, plus query budgets (see query_stats.py).
+# Its timing covers the cache, compression and CORS middlewares it wraps, but not metrics or
+# profiling, which are added after it and wrap it. That keeps ProfilingMiddleware's admin
+# lookup out of the request's query count and budget.
+app.add_middleware(QueryStatsMiddleware)
+# Prometheus latency histograms and in-flight gauge per route (see metrics.py)
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+# Admin on-demand (X-Profile: 1) and 1-in-N sampled stack profiles (see profiling.py); outermost
+app.add_middleware(ProfilingMiddleware)
+
 app.include_router(restaurants.router)
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(owners.router)
 
+# Columns exposed by the list endpoint, in response order. Clients can narrow
+# this with ?fields= so list views can skip the heavy menu/description blobs.
+RESTAURANT_LIST_FIELDS = (
+    "rid", "name", "address", "city", "state", "zip_code", "latitude",
+    "longitude", "phone", "website", "overall_rating", "price_range",
+    "min_price", "avg_price", "max_price",
+    "owner_id", "opentime", "closetime", "description", "status", "menu",
+    "menu_photo",
+)
+MAX_PAGE_SIZE = 100
+
+
 @app.get("/restaurants")
-async def get_all_restaurants(db: Session = Depends(get_db)):
+async def get_all_restaurants(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: str = Query("rid", pattern="^(rid|rating)$"),
+    price_band: Optional[str] = Query(None, pattern=r"^\${1,3}$"),
+    max_dish_price: Optional[float] = Query(None, ge=0),
+    db: "AsyncSession" = Depends(get_async_db),
+):
+    # rid is always returned so clients can link to the detail page.
+    selected = ("rid",) + tuple(f for f in parse_fields(fields, RESTAURANT_LIST_FIELDS) if f != "rid")
+    after = decode_cursor(cursor, 2 if sort == "rating" else 1) if cursor else None
+
     try:
-        restaurants_list = db.query(models.Restaurant).all()
-        result = []
-        for r in restaurants_list:
-            result.append({
-                "rid": r.rid,
-                "name": r.name,
-                "address": r.address,
-                "city": r.city,
-                "state": r.state,
-                "zip_code": r.zip_code,
-                "latitude": r.latitude,
-                "longitude": r.longitude,
-                "phone": r.phone,
-                "website": r.website,
-                "overall_rating": r.overall_rating,
-                "price_range": r.price_range,
-                "owner_id": r.owner_id,
-                "opentime": r.opentime,
-                "closetime": r.closetime,
-                "description": r.description,
-                "status": r.status,
-                "menu": r.menu,
-                "menu_photo": r.menu_photo,
-            })
-        return {"restaurants": result}
+        result = await db.execute(read_models.restaurant_list_query(
+            selected, sort=sort, after=after, limit=limit,
+            price_band=price_band, max_dish_price=max_dish_price,
+        ))
+        rows = result.all()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            if sort == "rating":
+                next_cursor = encode_cursor([last.sort_rating, last.rid])
+            else:
+                next_cursor = encode_cursor([last.rid])
+
+        # rows are tuples in `selected` order (sort_rating, if any, comes last)
+        result = [dict(zip(selected, row)) for row in rows]
+        # Returned as a response so FastAPI skips its jsonable_encoder pass
+        return FastJSONResponse({"restaurants": result, "next_cursor": next_cursor})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Prometheus scrape target, in the text exposition format
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# Profiles of sync routes sample the worker thread running the handler; after every route is added
+follow_handler_threads(app)
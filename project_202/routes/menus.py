@@ -0,0 +1,159 @@
+"""Menus as normalized menu_item rows with price stats stored on the restaurant.
+
+``Restaurant.menu`` keeps the JSON document owners submit, as an export; reads,
+price bands and price filters use the menu_item table. To create the table and
+columns on an existing database and backfill them from the JSON:
+
+    python menus.py
+"""
+import json
+import sys
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+import models
+
+PRICE_COLUMNS = {
+    "min_price": "FLOAT",
+    "avg_price": "FLOAT",
+    "max_price": "FLOAT",
+}
+
+
+def parse_menu(menu_items) -> list:
+    """Flatten a menu JSON document into menu_item column dicts; [] if it does not parse."""
+    try:
+        menu_data = json.loads(menu_items)
+    except (TypeError, ValueError):
+        return []
+    if isinstance(menu_data, dict):
+        menu_data = list(menu_data.values())
+    if not isinstance(menu_data, list):
+        return []
+
+    items = []
+    for category in menu_data:
+        if not isinstance(category, dict):
+            continue
+        for item in category.get("items") or []:
+            if not isinstance(item, dict) or not item.get("name"):
+                continue
+            try:
+                price = float(item["price"]) if item.get("price") not in (None, "") else None
+            except (TypeError, ValueError):
+                price = None
+            items.append({
+                "position": len(items),
+                "category": str(category.get("category") or "")[:50],
+                "name": str(item["name"])[:100],
+                "description": item.get("description"),
+                "price": price,
+            })
+    return items
+
+
+def price_band(avg_price: float | None) -> str:
+    if avg_price is None:
+        return "$$"
+    if avg_price < 10:
+        return "$"
+    elif avg_price < 20:
+        return "$$"
+    return "$$$"
+
+
+def price_stats(items: list) -> dict:
+    prices = [item["price"] for item in items if item["price"] is not None]
+    if not prices:
+        return {"min_price": None, "avg_price": None, "max_price": None, "price_range": "$$"}
+    avg_price = sum(prices) / len(prices)
+    return {
+        "min_price": min(prices),
+        "avg_price": round(avg_price, 2),
+        "max_price": max(prices),
+        "price_range": price_band(avg_price),
+    }
+
+
+def calculate_price_range(menu_items):
+    return price_stats(parse_menu(menu_items))["price_range"]
+
+
+def replace_menu_items(db: Session, restaurant_id: int, menu_items) -> dict:
+    """Rewrite a restaurant's menu_item rows and stored price stats from its menu JSON.
+
+    Runs in the caller's transaction; returns the stats written to the restaurant.
+    """
+    items = parse_menu(menu_items)
+    stats = price_stats(items)
+    db.query(models.MenuItem).filter(models.MenuItem.rid == restaurant_id).delete(synchronize_session=False)
+    if items:
+        db.execute(models.MenuItem.__table__.insert(), [{"rid": restaurant_id, **item} for item in items])
+    db.query(models.Restaurant).filter(models.Restaurant.rid == restaurant_id).update(
+        {getattr(models.Restaurant, k): v for k, v in stats.items()},
+        synchronize_session=False,
+    )
+    return stats
+
+
+def load_menu(db: Session, restaurant_id: int) -> list | None:
+    """Menu in the submitted JSON shape, built from menu_item rows; None if the restaurant has none."""
+    rows = db.query(
+        models.MenuItem.category,
+        models.MenuItem.name,
+        models.MenuItem.description,
+        models.MenuItem.price,
+    ).filter(models.MenuItem.rid == restaurant_id).order_by(models.MenuItem.position).all()
+    if not rows:
+        return None
+
+    categories = {}
+    for row in rows:
+        category = categories.get(row.category)
+        if category is None:
+            category = categories[row.category] = {"category": row.category, "items": []}
+        category["items"].append({"name": row.name, "description": row.description, "price": row.price})
+    return list(categories.values())
+
+
+def ensure_schema(engine):
+    models.MenuItem.__table__.create(bind=engine, checkfirst=True)
+    existing = {c["name"] for c in inspect(engine).get_columns(models.Restaurant.__tablename__)}
+    with engine.begin() as conn:
+        for name, ddl in PRICE_COLUMNS.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE {models.Restaurant.__tablename__} ADD COLUMN {name} {ddl}"))
+
+
+def backfill(db: Session, batch_size: int = 500) -> int:
+    count = 0
+    last_rid = 0
+    while True:
+        rows = db.query(models.Restaurant.rid, models.Restaurant.menu)\
+            .filter(models.Restaurant.rid > last_rid)\
+            .order_by(models.Restaurant.rid)\
+            .limit(batch_size)\
+            .all()
+        if not rows:
+            return count
+        for row in rows:
+            replace_menu_items(db, row.rid, row.menu)
+        db.commit()
+        count += len(rows)
+        last_rid = rows[-1].rid
+
+
+def main() -> int:
+    import db_config
+    engine = db_config._get_engine()
+    ensure_schema(engine)
+    db = db_config._session_local()
+    try:
+        count = backfill(db)
+    finally:
+        db.close()
+    print(f"{count} restaurant menu(s) normalized")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
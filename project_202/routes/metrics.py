@@ -0,0 +1,305 @@
+"""Prometheus text-format metrics for ``GET /metrics``, without a client library.
+
+Registry metrics are plain dicts keyed by label tuples and are only updated
+from the event loop (``MetricsMiddleware``, ``PlacesClient``), so recording is
+a few dict operations with no locks: ``Histogram.observe`` costs well under a
+microsecond. Values that already exist elsewhere are read by collectors at
+scrape time instead of being double-counted on the hot path. Those are not
+loop-only: TTLCache hit/miss counts are bumped by threadpool workers too (the
+oauth2 caches), under the cache's own lock, and read through
+``TTLCache.stats()`` under that lock; pool_metrics keeps its own.
+
+Multiple uvicorn workers: set ``METRICS_DIR`` to a directory shared by the
+workers (emptied on deploy). Each worker writes its snapshot there every
+METRICS_FLUSH_SECONDS and on shutdown, named by PID and start time so a
+restarted worker that reuses a PID does not overwrite its predecessor;
+``/metrics`` merges all snapshots, summing counters and histograms across
+every worker that ever wrote one and gauges across the workers still running. Without METRICS_DIR the endpoint
+reports the worker that answered.
+"""
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from config import settings
+
+# Seconds; request latency and upstream Places calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> metric updated in-process
+registry = {}
+# callables returning metrics built at scrape time
+collectors = []
+# cache name -> TTLCache
+caches = {}
+# tells this process's snapshots apart from an earlier worker's with the same PID
+STARTED_NS = time.time_ns()
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), register: bool = True):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values = {}
+        if register:
+            registry[name] = self
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def family(self) -> dict:
+        return {
+            "name": self.name, "kind": self.kind, "help": self.help, "labelnames": list(self.labelnames),
+            "values": [[list(labels), value] for labels, value in self.values.items()],
+        }
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, labels: tuple = (), value: float = 0):
+        self.values[labels] = value
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+
+class Histogram(Counter):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS, register: bool = True):
+        super().__init__(name, help, labelnames, register)
+        self.buckets = buckets
+
+    def observe(self, labels: tuple, value: float):
+        # per-bucket (not yet cumulative) counts, then +Inf, sum and count
+        slot = self.values.get(labels)
+        if slot is None:
+            slot = self.values[labels] = [0] * (len(self.buckets) + 3)
+        slot[bisect_left(self.buckets, value)] += 1
+        slot[-2] += value
+        slot[-1] += 1
+
+    def family(self) -> dict:
+        return {**super().family(), "buckets": list(self.buckets)}
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Request latency by route template.", ("method", "route", "status"),
+)
+requests_in_flight = Gauge("http_requests_in_flight", "Requests being handled.")
+places_upstream = Histogram(
+    "places_upstream_seconds", "Google Places upstream call latency.", ("outcome",),
+)
+
+
+def register_cache(name: str, cache):
+    """Expose a TTLCache's hit/miss counters and size as cache_* metrics under ``name``."""
+    caches[name] = cache
+
+
+def _cache_metrics() -> list:
+    hits = Counter("cache_hits_total", "Cache lookups that found a live entry.", ("cache",), register=False)
+    misses = Counter("cache_misses_total", "Cache lookups that missed or found an expired entry.", ("cache",), register=False)
+    entries = Gauge("cache_entries", "Entries currently stored.", ("cache",), register=False)
+    for name, cache in caches.items():
+        cache_hits, cache_misses, size = cache.stats()
+        hits.inc((name,), cache_hits)
+        misses.inc((name,), cache_misses)
+        entries.set((name,), size)
+    return [hits, misses, entries]
+
+
+def _pool_metrics() -> list:
+    import pool_metrics
+
+    gauges = {
+        "checked_out": Gauge("db_pool_checked_out", "Connections checked out of the pool.", ("engine",), register=False),
+        "size": Gauge("db_pool_size", "Configured pool size.", ("engine",), register=False),
+        "idle": Gauge("db_pool_idle", "Connections idle in the pool.", ("engine",), register=False),
+        "overflow": Gauge("db_pool_overflow", "Connections open beyond pool_size.", ("engine",), register=False),
+    }
+    counters = {
+        "connects": Counter("db_pool_connects_total", "New DBAPI connections opened.", ("engine",), register=False),
+        "timeouts": Counter("db_pool_timeouts_total", "Checkouts that timed out waiting for a connection.", ("engine",), register=False),
+        "invalidations": Counter("db_pool_invalidations_total", "Connections invalidated.", ("engine",), register=False),
+    }
+    wait_max = Gauge("db_pool_wait_seconds_max", "Longest wait for a pooled connection.", ("engine",), register=False)
+    for engine, stats in pool_metrics.snapshot().items():
+        for key, metric in (*gauges.items(), *counters.items()):
+            if key in stats:
+                metric.inc((engine,), stats[key])
+        wait_max.set((engine,), stats["wait_ms_max"] / 1000)
+    return [*gauges.values(), *counters.values(), wait_max]
+
+
+collectors.extend((_cache_metrics, _pool_metrics))
+
+
+def snapshot() -> list:
+    """This process's metric families, collectors included, as JSON-ready dicts."""
+    metrics = list(registry.values())
+    for collect in collectors:
+        metrics.extend(collect())
+    return [metric.family() for metric in metrics]
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency per route template and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            requests_in_flight.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_duration.observe((scope["method"], route, str(status)), time.perf_counter() - start)
+
+
+# --- multi-process aggregation -------------------------------------------------
+
+def _snapshot_path(pid: int, started: int) -> str:
+    return os.path.join(settings.METRICS_DIR, f"metrics-{pid}-{started}.json")
+
+
+def write_snapshot(families: list | None = None):
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = _snapshot_path(os.getpid(), STARTED_NS)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({
+            "pid": os.getpid(), "started": STARTED_NS,
+            "families": snapshot() if families is None else families,
+        }, f)
+    os.replace(tmp, path)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_snapshots() -> list:
+    """(pid, started, families) for every worker snapshot, this worker's taken live."""
+    snapshots = [(os.getpid(), STARTED_NS, snapshot())]
+    for name in sorted(os.listdir(settings.METRICS_DIR)) if os.path.isdir(settings.METRICS_DIR) else ():
+        if not (name.startswith("metrics-") and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(settings.METRICS_DIR, name), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue  # being replaced mid-read
+        started = data.get("started", 0)
+        if (data["pid"], started) != (os.getpid(), STARTED_NS):
+            snapshots.append((data["pid"], started, data["families"]))
+    return snapshots
+
+
+def merge(snapshots: list) -> dict:
+    """Sum families by name; gauges only from processes that are still running.
+
+    Of several snapshots sharing a PID, only the latest-started can be that
+    running process; the rest are workers that exited before the PID was reused.
+    """
+    latest = {}
+    for pid, started, _ in snapshots:
+        latest[pid] = max(started, latest.get(pid, started))
+    latest[os.getpid()] = STARTED_NS
+
+    merged = {}
+    for pid, started, families in snapshots:
+        running = started == latest[pid] and (pid == os.getpid() or _alive(pid))
+        for family in families:
+            if family["kind"] == "gauge" and not running:
+                continue
+            target = merged.setdefault(family["name"], {**family, "values": {}})
+            for labels, value in family["values"]:
+                key = tuple(labels)
+                current = target["values"].get(key)
+                if current is None:
+                    target["values"][key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    target["values"][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    target["values"][key] = current + value
+    return merged
+
+
+async def flush_periodically():
+    """Lifespan task writing this worker's snapshot for the other workers' /metrics."""
+    while True:
+        await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
+        # snapshot on the event loop, the registry's only writer; write the file off it
+        await asyncio.to_thread(write_snapshot, snapshot())
+
+
+# --- text exposition -----------------------------------------------------------
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_families(families: dict) -> str:
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        names = family["labelnames"]
+        for labels, value in sorted(family["values"].items()):
+            if family["kind"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*family["buckets"], "+Inf"], value[:-2]):
+                cumulative += count
+                le = bound if bound == "+Inf" else _number(float(bound))
+                bucket_labels = _labels(names, labels, 'le="' + le + '"')
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(float(value[-2]))}")
+            lines.append(f"{name}_count{_labels(names, labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def render() -> str:
+    if settings.METRICS_DIR:
+        return render_families(merge(_read_snapshots()))
+    return render_families(merge([(os.getpid(), STARTED_NS, snapshot())]))
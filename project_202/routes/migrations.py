@@ -0,0 +1,139 @@
+"""Versioned schema migrations for databases created before a model change.
+
+New databases get the whole schema from ``models.Base.metadata.create_all``.
+Existing ones are brought up to date here; applied versions are recorded in
+the schema_version table so each step runs once, and every step is safe to
+re-run on a schema that already has its changes.
+
+    python migrations.py             # apply pending migrations
+    python migrations.py --status    # list applied and pending versions
+
+Data backfills stay with their modules (rating_aggregates.py, menus.py).
+"""
+import argparse
+import sys
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+import models, menus, rating_aggregates
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Secondary indexes for the columns the routers filter and sort on
+INDEX_PACK = (
+    "ix_review_rid_created",
+    "ix_review_uid_created",
+    "ix_photo_rid",
+    "ix_cuisine_rid",
+    "ix_restaurant_owner_id",
+    "ix_restaurant_zip_code",
+    "ix_restaurant_city",
+    "ix_restaurant_name_address",
+    "ix_restaurant_price_range",
+)
+
+# Index-ordered pages of a restaurant's reviews sorted by rating
+REVIEW_RATING_INDEXES = (
+    "ix_review_rid_rating",
+    "ix_review_rid_rating_low",
+)
+
+
+def create_indexes(engine, names):
+    """Create the named indexes declared in models.py that the database does not have yet."""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    created = []
+    for table in models.Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in names and index.name not in existing:
+                index.create(bind=engine)
+                created.append(index.name)
+    return created
+
+
+def add_user_token_version(engine):
+    existing = {c["name"] for c in inspect(engine).get_columns(models.User.__tablename__)}
+    if "token_version" not in existing:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {models.User.__tablename__} ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+
+
+def add_restaurant_revision(engine):
+    existing = {c["name"] for c in inspect(engine).get_columns(models.Restaurant.__tablename__)}
+    if "revision" not in existing:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {models.Restaurant.__tablename__} ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"))
+
+
+def backfill_review_created(engine):
+    # review pages seek on created, so a NULL there cannot be encoded into a cursor
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"UPDATE {models.Review.__tablename__} SET created = COALESCE(updated, CURRENT_TIMESTAMP) "
+            "WHERE created IS NULL"
+        ))
+
+
+MIGRATIONS = (
+    (1, "restaurant rating aggregate columns", rating_aggregates.ensure_columns),
+    (2, "menu_item table and restaurant price stats", menus.ensure_schema),
+    (3, "index pack for router filters", lambda engine: create_indexes(engine, INDEX_PACK)),
+    (4, "user token_version for refresh token revocation", add_user_token_version),
+    (5, "backfill NULL review.created", backfill_review_created),
+    (6, "review rating-order indexes", lambda engine: create_indexes(engine, REVIEW_RATING_INDEXES)),
+    (7, "restaurant revision for response cache versions", add_restaurant_revision),
+)
+
+
+def applied_versions(engine) -> set:
+    schema_version.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        return set(conn.execute(select(schema_version.c.version)).scalars())
+
+
+def pending(engine) -> list:
+    done = applied_versions(engine)
+    return [migration for migration in MIGRATIONS if migration[0] not in done]
+
+
+def migrate(engine) -> list:
+    applied = []
+    for version, description, step in pending(engine):
+        step(engine)
+        with engine.begin() as conn:
+            conn.execute(schema_version.insert().values(
+                version=version, description=description, applied_at=datetime.now(),
+            ))
+        applied.append(version)
+    return applied
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Apply or list schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list versions without applying anything")
+    args = parser.parse_args(argv)
+
+    import db_config
+    engine = db_config._get_engine()
+    if args.status:
+        done = applied_versions(engine)
+        for version, description, _ in MIGRATIONS:
+            print(f"{version:>3} {'applied' if version in done else 'pending':8} {description}")
+        return 0
+
+    applied = migrate(engine)
+    print(f"{len(applied)} migration(s) applied" + (f": {', '.join(map(str, applied))}" if applied else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
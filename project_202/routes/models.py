@@ -1,7 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, BigInteger, TIMESTAMP, Text, CHAR, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, BigInteger, TIMESTAMP, Text, CHAR, ForeignKey, Index, literal_column
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
 from sqlalchemy.sql import func
 from db_config import Base
 
+# SQLite keeps timestamps as text. Store and bind them in CURRENT_TIMESTAMP's own
+# "YYYY-MM-DD HH:MM:SS" form (second precision, as MySQL's TIMESTAMP) so rows from
+# the server default and from Python compare correctly in keyset seeks.
+SECOND_TIMESTAMP = TIMESTAMP().with_variant(
+    SQLITE_DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 class User(Base):
     __tablename__ = "user"
 
@@ -13,11 +22,21 @@ class User(Base):
     phone = Column(BigInteger)
     status = Column(String(20))
     photo = Column(String(255))
+    # Stamped into refresh tokens; bumping it (logout, password change) revokes them all
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created = Column(TIMESTAMP, server_default=func.now())
     updated = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
 class Restaurant(Base):
     __tablename__ = "restaurant"
+    __table_args__ = (
+        # router filters: owner listings, zip/city lookups, duplicate-listing check, price band
+        Index("ix_restaurant_owner_id", "owner_id"),
+        Index("ix_restaurant_zip_code", "zip_code"),
+        Index("ix_restaurant_city", "city"),
+        Index("ix_restaurant_name_address", "name", "address"),
+        Index("ix_restaurant_price_range", "price_range"),
+    )
 
     rid = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), nullable=False)
@@ -30,7 +49,14 @@ class Restaurant(Base):
     phone = Column(BigInteger)
     website = Column(String(255))
     overall_rating = Column(Float, default=0)
+    # Running aggregates over this restaurant's reviews, kept in step by create_review
+    review_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Float, nullable=False, default=0, server_default="0")
     price_range = Column(String(10))
+    # Derived from the restaurant's menu_item rows whenever the menu is written
+    min_price = Column(Float)
+    avg_price = Column(Float)
+    max_price = Column(Float)
     owner_id = Column(Integer, ForeignKey("user.uid"))
     opentime = Column(String(10))
     closetime = Column(String(10))
@@ -38,11 +64,32 @@ class Restaurant(Base):
     status = Column(String(20), default='1')
     menu = Column(Text)
     menu_photo = Column(String(255))
+    # Bumped by every UPDATE (ORM or Core) that does not set it; the response cache
+    # version, since `updated` cannot tell two writes in the same second apart
+    revision = Column(Integer, nullable=False, default=0, server_default="0", onupdate=literal_column("revision") + 1)
     created = Column(TIMESTAMP, server_default=func.now())
     updated = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
+class MenuItem(Base):
+    __tablename__ = "menu_item"
+    __table_args__ = (
+        Index("ix_menu_item_rid_position", "rid", "position"),
+        Index("ix_menu_item_price_rid", "price", "rid"),
+    )
+
+    miid = Column(Integer, primary_key=True, autoincrement=True)
+    rid = Column(Integer, ForeignKey("restaurant.rid"), nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+    category = Column(String(50))
+    name = Column(String(100), nullable=False)
+    description = Column(Text)
+    price = Column(Float)
+
 class Cuisine(Base):
     __tablename__ = "cuisine"
+    __table_args__ = (
+        Index("ix_cuisine_rid", "rid"),
+    )
 
     cid = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(50), nullable=False)
@@ -50,6 +97,9 @@ class Cuisine(Base):
 
 class Photo(Base):
     __tablename__ = "photo"
+    __table_args__ = (
+        Index("ix_photo_rid", "rid"),
+    )
 
     pid = Column(Integer, primary_key=True, autoincrement=True)
     url = Column(String(255), nullable=False)
@@ -59,11 +109,22 @@ class Photo(Base):
 
 class Review(Base):
     __tablename__ = "review"
+    __table_args__ = (
+        # keyset pages of a restaurant's / a user's reviews, newest first
+        Index("ix_review_rid_created", "rid", "created"),
+        Index("ix_review_uid_created", "uid", "created"),
+    )
 
     rvid = Column(Integer, primary_key=True, autoincrement=True)
     rating = Column(Float, nullable=False)
     comment = Column(Text)
     rid = Column(Integer, ForeignKey("restaurant.rid"))
     uid = Column(Integer, ForeignKey("user.uid"))
-    created = Column(TIMESTAMP, server_default=func.now())
-    updated = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    # review pages seek on it; every write sets it explicitly
+    created = Column(SECOND_TIMESTAMP, server_default=func.now())
+    updated = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+# a restaurant's reviews by rating: "highest" walks this backwards; "lowest" keeps
+# newest-first within a rating, so it needs its own mixed-direction index
+Index("ix_review_rid_rating", Review.rid, Review.rating, Review.created, Review.rvid)
+Index("ix_review_rid_rating_low", Review.rid, Review.rating, Review.created.desc(), Review.rvid.desc())
\ No newline at end of file
@@ -2,14 +2,24 @@ import jwt
 from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from jwt.exceptions import InvalidTokenError
 import schemas, models
+from cache import TTLCache
 from db_config import get_db
 from config import settings
+import metrics
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth")
 
+# token -> TokenData, never kept past the token's own expiry
+token_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+# uid -> schemas.CurrentUser, dropped whenever the user row is written
+principal_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+metrics.register_cache("auth_token", token_cache)
+metrics.register_cache("auth_principal", principal_cache)
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -21,25 +31,95 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
+# users in these states can no longer trade a refresh token for an access token
+DISABLED_USER_STATUSES = ("disabled", "inactive")
+
+
+def create_refresh_token(data: dict, expires_delta: timedelta | None = None):
+    # Long-lived token that can only be exchanged at /auth/refresh for a new access token;
+    # "ver" is the user's token_version, so bumping it revokes every refresh token issued before
+    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+    to_encode = {"uid": data["uid"], "ver": data.get("ver", 0), "type": "refresh", "exp": expire}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def verify_refresh_token(token: str, db: Session, credentials_exception) -> models.User:
+    """The user a refresh token was issued to, if the token is unrevoked and the user still allowed."""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except InvalidTokenError:
+        raise credentials_exception
+    if payload.get("type") != "refresh" or payload.get("uid") is None:
+        raise credentials_exception
+
+    # read from the database, not principal_cache: revocation must take effect immediately
+    user = db.query(models.User).filter(models.User.uid == payload["uid"]).first()
+    if user is None or payload.get("ver", 0) != (user.token_version or 0):
+        raise credentials_exception
+    if user.status in DISABLED_USER_STATUSES:
+        raise credentials_exception
+    return user
+
+
+def revoke_refresh_tokens(user: models.User):
+    # The caller commits; refresh tokens stamped with the old version stop verifying
+    user.token_version = (user.token_version or 0) + 1
+
+
 def verify_access_token(token: str, credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")):
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         uid: int = payload.get("uid")
         user_type: str = payload.get("user_type")
-        if uid is None or user_type is None:
+        # refresh tokens are not accepted as bearer credentials
+        if uid is None or user_type is None or payload.get("type", "access") != "access":
             raise credentials_exception
         token_data = schemas.TokenData(uid=uid, user_type=user_type)
     except InvalidTokenError as e:
         raise credentials_exception
-    
+
+    expires_in = payload["exp"] - datetime.now(timezone.utc).timestamp() if "exp" in payload else None
+    token_cache.set(token, token_data, ttl=None if expires_in is None else min(expires_in, token_cache.ttl))
     return token_data
 
 
+def invalidate_principal(uid: int):
+    principal_cache.pop(uid)
+
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
     #gets the current user
     token =  verify_access_token(token, credentials_exception)
 
-    user = db.query(models.User).filter(token.uid == models.User.uid).first()
+    user = principal_cache.get(token.uid)
+    if user is None:
+        db_user = db.query(models.User).filter(token.uid == models.User.uid).first()
+        if db_user is None:
+            raise credentials_exception
+        user = schemas.CurrentUser.model_validate(db_user)
+        principal_cache.set(token.uid, user)
     return user
+
+
+# Drop cached principals when a user row changes (status/user_type edits, deletes).
+# Invalidated at flush and again after commit so a concurrent request cannot
+# re-cache the pre-commit row for a full TTL.
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_on_write(mapper, connection, target):
+    invalidate_principal(target.uid)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("stale_principals", set()).add(target.uid)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for uid in session.info.pop("stale_principals", ()):
+        invalidate_principal(uid)
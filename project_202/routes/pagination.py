@@ -0,0 +1,53 @@
+import base64
+import json
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+
+# Keyset cursors are opaque to clients: a url-safe base64 encoded JSON list of
+# the sort-key values of the last row on the previous page.
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+
+def keyset_after(order, after: list):
+    """WHERE clause for the rows after ``after`` in ``order``, a list of (column, descending).
+
+    Expands the row-value comparison so columns can sort in mixed directions:
+    (a, b) after (x, y) is a > x OR (a = x AND b > y), flipped for descending keys.
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(order):
+        seek = column < after[i] if descending else column > after[i]
+        ties = [col == value for (col, _), value in zip(order[:i], after[:i])]
+        clauses.append(and_(*ties, seek))
+    return or_(*clauses)
+
+
+def parse_fields(fields: str | None, allowed: tuple) -> tuple:
+    # Comma-separated projection, e.g. ?fields=rid,name,address
+    if not fields:
+        return allowed
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return requested
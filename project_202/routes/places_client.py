@@ -0,0 +1,99 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING
+from cache import TTLCache
+from config import settings
+import metrics
+
+if TYPE_CHECKING:
+    import httpx
+
+# Google answers most errors (bad key, quota) with HTTP 200; only these are cacheable.
+CACHEABLE_STATUSES = {"OK", "ZERO_RESULTS"}
+
+
+class PlacesClient:
+    """Async Google Places text-search client.
+
+    Responses are cached per zip code, and concurrent lookups for the same zip
+    share a single upstream request. The underlying ``httpx.AsyncClient`` keeps
+    a connection pool and is created lazily on the running event loop; httpx
+    itself is only imported then, keeping it off the cold-start import path.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        timeout: float = 5.0,
+        max_connections: int = 20,
+        cache: TTLCache | None = None,
+        transport: "httpx.AsyncBaseTransport | None" = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.cache = cache if cache is not None else TTLCache()
+        self.upstream_calls = 0
+        self._transport = transport
+        self._client = None
+        self._inflight = {}  # zip code -> asyncio.Task of the upstream call
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        if self._client is None or self._client.is_closed:
+            import httpx
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.max_connections),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def text_search(self, zip_code: int) -> dict:
+        cached = self.cache.get(zip_code)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(zip_code)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(zip_code))
+            self._inflight[zip_code] = task
+            task.add_done_callback(lambda _: self._inflight.pop(zip_code, None))
+        # shield: one caller disconnecting must not cancel the shared lookup
+        return await asyncio.shield(task)
+
+    async def _fetch(self, zip_code: int) -> dict:
+        self.upstream_calls += 1
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self._get_client().get(
+                "/textsearch/json",
+                params={"query": f"restaurants in {zip_code}", "key": self.api_key},
+            )
+            response.raise_for_status()
+            # ValueError when the body is not JSON (an HTML error page, an empty 502)
+            data = response.json()
+            outcome = "ok"
+        finally:
+            metrics.places_upstream.observe((outcome,), time.perf_counter() - start)
+        if data.get("status", "OK") in CACHEABLE_STATUSES:
+            self.cache.set(zip_code, data)
+        return data
+
+
+places_client = PlacesClient(
+    base_url=settings.PLACES_BASE_URL,
+    api_key=settings.MAPS_KEY,
+    timeout=settings.PLACES_TIMEOUT_SECONDS,
+    max_connections=settings.PLACES_MAX_CONNECTIONS,
+    cache=TTLCache(maxsize=settings.PLACES_CACHE_SIZE, ttl=settings.PLACES_CACHE_TTL_SECONDS),
+)
+metrics.register_cache("places", places_client.cache)
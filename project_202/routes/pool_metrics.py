@@ -0,0 +1,99 @@
+"""Connection pool statistics fed by SQLAlchemy pool events.
+
+``PoolStats.attach(engine)`` counts connects, checkouts, checkins and
+invalidations through the engine's pool events. ``timed_pool_class()`` wraps
+a pool class so the time spent waiting for a connection (and pool timeouts)
+are recorded as well, which is what shows exhaustion under bursts.
+"""
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# engine name ("sync", "async") -> PoolStats
+registry = {}
+
+
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def _count(self, attribute: str):
+        def listener(*args):
+            with self._lock:
+                setattr(self, attribute, getattr(self, attribute) + 1)
+        return listener
+
+    def attach(self, engine):
+        # async engines fire pool events on their sync_engine
+        target = getattr(engine, "sync_engine", engine)
+        self.pool = target.pool
+        event.listen(target, "connect", self._count("connects"))
+        event.listen(target, "checkout", self._count("checkouts"))
+        event.listen(target, "checkin", self._count("checkins"))
+        event.listen(target, "invalidate", self._count("invalidations"))
+        event.listen(target, "engine_disposed", lambda engine: setattr(self, "pool", engine.pool))
+        return self
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        with self._lock:
+            stats = {
+                "pool": type(pool).__name__ if pool is not None else None,
+                "checked_out": self.checkouts - self.checkins,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_total / self.waits * 1000, 3) if self.waits else 0.0,
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+            }
+        # sizing is only meaningful for queue pools; NullPool opens one connection per checkout
+        if pool is not None and hasattr(pool, "overflow"):
+            stats.update(size=pool.size(), idle=pool.checkedin(), overflow=max(pool.overflow(), 0))
+        return stats
+
+
+def timed_pool_class(pool_class, stats: PoolStats):
+    """``pool_class`` with checkout wait time and timeouts recorded on ``stats``.
+
+    Pools recreate themselves with ``self.__class__`` on dispose, so the timing
+    survives engine.dispose() and invalidation.
+    """
+    class TimedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                stats.record_timeout()
+                raise
+            finally:
+                stats.record_wait(time.perf_counter() - start)
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def snapshot() -> dict:
+    return {name: stats.snapshot() for name, stats in registry.items()}
@@ -0,0 +1,240 @@
+"""Request profiling: on demand for admins, and 1-in-N sampling.
+
+An admin can profile a single request by sending ``X-Profile: 1`` (or adding
+``?profile=1``). The flag is honoured only when the bearer token resolves,
+through oauth2.get_current_user, to a user whose user_type is "admin"; for
+everyone else it is ignored. With PROFILE_SAMPLE_EVERY = N > 0, every Nth
+request to each route template is also profiled, so rarely hit routes are
+sampled as often, relative to their traffic, as hot ones.
+
+Profiles come from a sampling profiler. A background thread records the stack
+of the thread running the request's handler every PROFILE_INTERVAL_SECONDS.
+Async handlers run on the event loop, and a loop sample only counts while this
+request's task is the one running there, so concurrent requests stay out of
+each other's profiles. Sync handlers run in a threadpool worker; the wrapper
+follow_handler_threads() installs points the sampler at that worker for the
+duration of the call. The samples are wall-clock, kept in collapsed form
+("outer;inner;leaf count"), the input format of flamegraph.pl and speedscope.
+Sync dependencies run in other workers and are not sampled. Profiles go into a
+ring buffer of the last PROFILE_BUFFER_SIZE. On-demand responses carry
+``X-Profile-Id``; admins list and fetch profiles through /owner/profiles.
+"""
+import asyncio
+import functools
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+from config import settings
+import db_config, oauth2
+
+MAX_STACK_DEPTH = 128
+
+# most recent profiles, oldest dropped first
+profiles = deque(maxlen=settings.PROFILE_BUFFER_SIZE)
+# requests seen per route template, for 1-in-N sampling
+route_counts = Counter()
+# the sampler of the request being profiled; copied into threadpool workers with the context
+active_sampler = ContextVar("active_sampler", default=None)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = code.co_filename.rsplit("/", 1)[-1]
+    return f"{code.co_name} ({module}:{code.co_firstlineno})"
+
+
+def collapse(frame) -> str:
+    """``frame``'s stack as "root;...;leaf", the line format of collapsed flamegraph input."""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Samples one thread's stack from a daemon thread until stopped (or PROFILE_MAX_SECONDS).
+
+    With ``task``, a sample is only kept while that task is the one running on
+    its event loop. ``target`` is swapped as a whole (one attribute store) when
+    a sync handler moves the request onto a worker thread.
+    """
+
+    def __init__(self, thread_id: int, interval: float, task: asyncio.Task | None = None):
+        self.target = (thread_id, task)
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        deadline = time.monotonic() + settings.PROFILE_MAX_SECONDS
+        while not self._stopped.wait(self.interval) and time.monotonic() < deadline:
+            thread_id, task = self.target
+            if task is not None and asyncio.current_task(task.get_loop()) is not task:
+                continue
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self._thread.join()
+        return self.stacks
+
+
+def _in_handler_thread(call):
+    """Wrap a sync endpoint so a profiled request's sampler follows it onto its worker thread."""
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        sampler = active_sampler.get()
+        if sampler is None:
+            return call(*args, **kwargs)
+        previous = sampler.target
+        sampler.target = (threading.get_ident(), None)
+        try:
+            return call(*args, **kwargs)
+        finally:
+            sampler.target = previous
+
+    return wrapper
+
+
+def follow_handler_threads(app):
+    """Point profiles of ``app``'s sync routes at the threadpool worker running the handler.
+
+    Call after every router is included. Only the endpoint is wrapped, not its
+    dependencies, so dependency_overrides keep matching on the original callables.
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not asyncio.iscoroutinefunction(route.dependant.call):
+            route.dependant.call = _in_handler_thread(route.dependant.call)
+
+
+def route_template(scope) -> str | None:
+    """The path template of the route ``scope`` will be dispatched to, before routing runs."""
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", None)
+    return None
+
+
+def sample_due(scope) -> bool:
+    """Every PROFILE_SAMPLE_EVERY-th request to the same route template."""
+    key = route_template(scope)
+    route_counts[key] += 1
+    return route_counts[key] % settings.PROFILE_SAMPLE_EVERY == 0
+
+
+def profile_requested(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value not in (b"", b"0", b"false")
+    return b"profile=1" in scope.get("query_string", b"").split(b"&")
+
+
+async def is_admin(scope) -> bool:
+    """Whether the request's bearer token belongs to an admin, as get_current_user resolves it."""
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+
+    # the same session dependency the routes get, test overrides included
+    get_db = scope["app"].dependency_overrides.get(db_config.get_db, db_config.get_db)
+
+    def resolve():
+        sessions = get_db()
+        db = next(sessions)
+        try:
+            return oauth2.get_current_user(token, db)
+        finally:
+            sessions.close()
+
+    try:
+        current_user = await run_in_threadpool(resolve)
+    except HTTPException:
+        return False
+    return current_user.user_type == "admin"
+
+
+def summary(profile: dict) -> dict:
+    return {key: value for key, value in profile.items() if key != "stacks"}
+
+
+def find(profile_id: str) -> dict | None:
+    return next((profile for profile in profiles if profile["id"] == profile_id), None)
+
+
+def collapsed(profile: dict) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].most_common())
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware; add it outermost so the admin check is not counted against the request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if profile_requested(scope) and await is_admin(scope):
+            trigger = "on-demand"
+        elif settings.PROFILE_SAMPLE_EVERY > 0 and sample_due(scope):
+            trigger = "sampled"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:16]
+        status = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trigger == "on-demand":
+                    headers = [*message.get("headers", []), (b"x-profile-id", profile_id.encode("ascii"))]
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), settings.PROFILE_INTERVAL_SECONDS, asyncio.current_task())
+        created = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        sampler.start()
+        token = active_sampler.set(sampler)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            active_sampler.reset(token)
+            duration = time.perf_counter() - start
+            # joining the sampler thread takes up to one interval; keep it off the loop
+            stacks = await asyncio.to_thread(sampler.stop)
+            profiles.append({
+                "id": profile_id,
+                "trigger": trigger,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status,
+                "duration_ms": round(duration * 1000, 3),
+                "samples": sum(stacks.values()),
+                "created": created.isoformat(),
+                "stacks": stacks,
+            })
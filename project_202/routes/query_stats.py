@@ -0,0 +1,159 @@
+"""Per-request database query instrumentation.
+
+``QueryStatsMiddleware`` gives each request a ``QueryStats`` (in a context
+variable, so it follows the request into the threadpool and into
+``AsyncSession.run_sync``) and the cursor-execute hooks below, registered on
+every Engine, count the statements it runs and their time. Each response gets
+a ``Server-Timing`` header:
+
+    Server-Timing: db;dur=3.41;desc="4 queries", db-slowest;dur=1.20, app;dur=9.87
+
+and one log record on the ``query_stats`` logger with the same numbers as
+``extra`` fields (plus the slowest statement).
+
+Every route has a query budget, ``QUERY_BUDGETS`` or settings.QUERY_BUDGET by
+default, and no statement shape may repeat more than QUERY_REPEAT_LIMIT times
+in a request (the signature of an N+1 loop). Violations are logged, or raised
+as ``QueryBudgetExceeded`` when QUERY_BUDGET_MODE is "raise", as in the tests.
+"""
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config import settings
+
+logger = logging.getLogger("query_stats")
+
+# Route path template -> most statements one request may run
+QUERY_BUDGETS = {
+    "/restaurants": 1,
+    "/restaurants/{restaurant_id}": 3,
+    "/restaurants/{restaurant_id}/menu": 3,
+    "/restaurants/{restaurant_id}/page": 6,
+    "/restaurants/{restaurant_id}/reviews": 1,
+    "/restaurants/{restaurant_id}/rating": 1,
+    "/restaurants/{restaurant_id}/create_review": 5,
+    "/users/{uid}/reviews": 1,
+}
+
+# Bind-parameter lists (IN (?, ?, ?), multi-row VALUES) collapse to one shape
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+current = contextvars.ContextVar("query_stats", default=None)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAM_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+        self.shapes = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        if seconds >= self.slowest:
+            self.slowest = seconds
+            self.slowest_statement = statement
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self) -> list:
+        """(shape, count) for statement shapes run more than QUERY_REPEAT_LIMIT times."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > settings.QUERY_REPEAT_LIMIT]
+
+    def server_timing(self, elapsed: float) -> str:
+        metrics = [f'db;dur={self.seconds * 1000:.2f};desc="{self.count} queries"']
+        if self.count:
+            metrics.append(f"db-slowest;dur={self.slowest * 1000:.2f}")
+        metrics.append(f"app;dur={elapsed * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current.get()
+    starts = conn.info.get("query_start")
+    if stats is not None and starts:
+        stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def budget_problems(route: str | None, stats: QueryStats) -> list:
+    budget = QUERY_BUDGETS.get(route, settings.QUERY_BUDGET)
+    problems = []
+    if stats.count > budget:
+        problems.append(f"{stats.count} queries, budget {budget}")
+    for shape, n in stats.repeated():
+        problems.append(f"{n} x same statement (possible N+1): {shape[:200]}")
+    return problems
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware; add it outermost so ``app`` covers the whole stack."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                message = self._finish(scope, message, stats, time.perf_counter() - start)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current.reset(token)
+
+    def _finish(self, scope, message, stats, elapsed):
+        route = getattr(scope.get("route"), "path", None)
+        logger.info("request", extra={
+            "method": scope["method"],
+            "route": route,
+            "status": message["status"],
+            "duration_ms": round(elapsed * 1000, 3),
+            "db_queries": stats.count,
+            "db_ms": round(stats.seconds * 1000, 3),
+            "db_slowest_ms": round(stats.slowest * 1000, 3),
+            "db_slowest_statement": stats.slowest_statement,
+        })
+
+        if settings.QUERY_BUDGET_MODE != "off":
+            problems = budget_problems(route, stats)
+            if problems:
+                detail = f"{scope['method']} {route or scope['path']}: " + "; ".join(problems)
+                if settings.QUERY_BUDGET_MODE == "raise":
+                    raise QueryBudgetExceeded(detail)
+                logger.warning("query budget exceeded: %s", detail)
+
+        if not settings.SERVER_TIMING:
+            return message
+        headers = list(message.get("headers", []))
+        headers.append((b"server-timing", stats.server_timing(elapsed).encode("latin-1")))
+        return {**message, "headers": headers}
@@ -0,0 +1,120 @@
+"""Review aggregates stored on the restaurant row.
+
+create_review keeps ``review_count``/``rating_sum`` up to date in the same
+transaction as the insert, so ratings never need a rescan of the review table.
+Run this module to add the columns to an existing database and backfill them:
+
+    python rating_aggregates.py            # add missing columns, fix drifted rows
+    python rating_aggregates.py --check    # report drift only, exit 1 if any
+"""
+import argparse
+import sys
+from sqlalchemy import Numeric, cast, func, inspect, text
+from sqlalchemy.orm import Session
+import models
+
+AGGREGATE_COLUMNS = {
+    "review_count": "INTEGER NOT NULL DEFAULT 0",
+    "rating_sum": "FLOAT NOT NULL DEFAULT 0",
+}
+
+
+def overall_rating_expr():
+    # Numeric cast so ROUND(x, 1) is valid on Postgres as well as MySQL/SQLite.
+    return func.round(cast(models.Restaurant.rating_sum / models.Restaurant.review_count, Numeric), 1)
+
+
+def record_review(db: Session, restaurant_id: int, rating: float):
+    record_reviews(db, restaurant_id, 1, rating)
+
+
+def record_reviews(db: Session, restaurant_id: int, count: int, rating_total: float):
+    # Two single-row UPDATEs instead of one: MySQL evaluates SET clauses left to
+    # right, so deriving overall_rating in the same statement is not portable.
+    restaurant = db.query(models.Restaurant).filter(models.Restaurant.rid == restaurant_id)
+    restaurant.update({
+        models.Restaurant.review_count: models.Restaurant.review_count + count,
+        models.Restaurant.rating_sum: models.Restaurant.rating_sum + rating_total,
+    }, synchronize_session=False)
+    restaurant.update({
+        models.Restaurant.overall_rating: overall_rating_expr(),
+    }, synchronize_session=False)
+
+
+def find_drift(db: Session) -> list:
+    totals = db.query(
+        models.Review.rid.label("rid"),
+        func.count(models.Review.rvid).label("review_count"),
+        func.sum(models.Review.rating).label("rating_sum"),
+    ).group_by(models.Review.rid).subquery()
+
+    rows = db.query(
+        models.Restaurant.rid,
+        models.Restaurant.review_count,
+        models.Restaurant.rating_sum,
+        func.coalesce(totals.c.review_count, 0).label("actual_count"),
+        func.coalesce(totals.c.rating_sum, 0).label("actual_sum"),
+    ).outerjoin(totals, totals.c.rid == models.Restaurant.rid).all()
+
+    drift = []
+    for row in rows:
+        if row.review_count != row.actual_count or abs((row.rating_sum or 0) - float(row.actual_sum)) > 1e-6:
+            drift.append({
+                "rid": row.rid,
+                "review_count": row.review_count,
+                "rating_sum": row.rating_sum,
+                "actual_count": row.actual_count,
+                "actual_sum": float(row.actual_sum),
+            })
+    return drift
+
+
+def backfill(db: Session) -> list:
+    drift = find_drift(db)
+    for entry in drift:
+        count, total = entry["actual_count"], entry["actual_sum"]
+        db.query(models.Restaurant).filter(models.Restaurant.rid == entry["rid"]).update({
+            models.Restaurant.review_count: count,
+            models.Restaurant.rating_sum: total,
+            models.Restaurant.overall_rating: round(total / count, 1) if count else 0,
+        }, synchronize_session=False)
+    db.commit()
+    return drift
+
+
+def ensure_columns(engine):
+    existing = {c["name"] for c in inspect(engine).get_columns(models.Restaurant.__tablename__)}
+    with engine.begin() as conn:
+        for name, ddl in AGGREGATE_COLUMNS.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE {models.Restaurant.__tablename__} ADD COLUMN {name} {ddl}"))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill or check restaurant rating aggregates.")
+    parser.add_argument("--check", action="store_true", help="report drift without writing")
+    args = parser.parse_args(argv)
+
+    import db_config
+    engine = db_config._get_engine()
+    if not args.check:
+        ensure_columns(engine)
+
+    db = db_config._session_local()
+    try:
+        drift = find_drift(db) if args.check else backfill(db)
+    finally:
+        db.close()
+
+    for entry in drift:
+        print(
+            f"restaurant {entry['rid']}: stored {entry['review_count']}/{entry['rating_sum']}, "
+            f"actual {entry['actual_count']}/{entry['actual_sum']}"
+        )
+    verb = "drifted" if args.check else "fixed"
+    print(f"{len(drift)} restaurant(s) {verb}")
+    return 1 if args.check and drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
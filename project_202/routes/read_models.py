@@ -0,0 +1,212 @@
+"""Read models for the hot GET endpoints.
+
+Each query is a Core ``select()`` over just the columns the endpoint returns,
+executed without ORM entity hydration (no identity map, no unused menu or
+description blobs). Rows come back as tuple-backed ``Row`` objects or are
+copied into small ``__slots__`` DTOs. Writes keep using the ORM models.
+
+``python benchmarks/bench_read_models.py`` compares memory per row with the
+ORM path.
+"""
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+import models
+from pagination import decode_cursor, encode_cursor, keyset_after
+
+
+class SlotsDTO:
+    """Fixed-shape row copy; subclasses list their columns in ``COLUMNS``, in slot order."""
+    __slots__ = ()
+    COLUMNS = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def select(cls):
+        return select(*cls.COLUMNS)
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RestaurantDetailView(SlotsDTO):
+    __slots__ = (
+        "rid", "name", "address", "city", "state", "zip_code", "phone", "website",
+        "overall_rating", "price_range", "opentime", "closetime", "description",
+        "status", "menu", "photos",
+    )
+    COLUMNS = tuple(getattr(models.Restaurant, name) for name in __slots__[:-1])
+
+
+class ReviewView(SlotsDTO):
+    __slots__ = ("rvid", "rating", "comment", "rid", "uid", "created", "username")
+    COLUMNS = (
+        models.Review.rvid,
+        models.Review.rating,
+        models.Review.comment,
+        models.Review.rid,
+        models.Review.uid,
+        models.Review.created,
+        models.User.username,
+    )
+
+
+class UserReviewView(SlotsDTO):
+    __slots__ = ("rvid", "rating", "comment", "rid", "restaurant_name", "created")
+    COLUMNS = (
+        models.Review.rvid,
+        models.Review.rating,
+        models.Review.comment,
+        models.Review.rid,
+        models.Restaurant.name,
+        models.Review.created,
+    )
+
+
+class ListingView(SlotsDTO):
+    # The Restaurant attributes owners.listing_out() reads
+    __slots__ = (
+        "rid", "name", "owner_id", "address", "zip_code", "phone", "opentime",
+        "closetime", "description", "price_range", "overall_rating", "status",
+        "menu", "menu_photo", "latitude", "longitude",
+    )
+    COLUMNS = tuple(getattr(models.Restaurant, name) for name in __slots__)
+
+
+def restaurant_list_query(
+    fields,
+    sort: str = "rid",
+    after=None,
+    limit: int | None = None,
+    price_band: str | None = None,
+    max_dish_price: float | None = None,
+) -> Select:
+    """Select ``fields`` (plus a trailing sort_rating when sorting by rating), in keyset order.
+
+    ``after`` is the decoded cursor; ``limit`` rows are fetched plus one, so the
+    caller can tell whether another page exists.
+    """
+    rid_col = models.Restaurant.rid
+    stmt = select(*(getattr(models.Restaurant, f) for f in fields))
+
+    if price_band:
+        stmt = stmt.where(models.Restaurant.price_range == price_band)
+    if max_dish_price is not None:
+        # restaurants with at least one dish at or under the given price
+        stmt = stmt.where(
+            select(models.MenuItem.miid).where(
+                models.MenuItem.rid == rid_col,
+                models.MenuItem.price <= max_dish_price,
+            ).exists()
+        )
+
+    # Keyset pagination: order by a unique key and seek past the last row
+    # of the previous page instead of using OFFSET.
+    if sort == "rating":
+        rating_key = func.coalesce(models.Restaurant.overall_rating, 0)
+        stmt = stmt.add_columns(rating_key.label("sort_rating"))
+        if after:
+            stmt = stmt.where(keyset_after([(rating_key, True), (rid_col, False)], after))
+        stmt = stmt.order_by(rating_key.desc(), rid_col.asc())
+    else:
+        if after:
+            stmt = stmt.where(rid_col > after[0])
+        stmt = stmt.order_by(rid_col.asc())
+
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def restaurant_list(db: Session, fields, **options) -> list:
+    return db.execute(restaurant_list_query(fields, **options)).all()
+
+
+def restaurant_detail(db: Session, restaurant_id: int) -> RestaurantDetailView | None:
+    row = db.execute(
+        RestaurantDetailView.select().where(models.Restaurant.rid == restaurant_id)
+    ).first()
+    if row is None:
+        return None
+    photos = db.execute(
+        select(models.Photo.pid, models.Photo.url).where(models.Photo.rid == restaurant_id)
+    ).all()
+    return RestaurantDetailView(*row, [{"pid": p.pid, "url": p.url} for p in photos])
+
+
+# Review orderings as (column, descending). Each ends in (created, rvid), which
+# the review(rid, created) and review(uid, created) indexes serve directly.
+REVIEW_ORDERS = {
+    "newest": ((models.Review.created, True), (models.Review.rvid, True)),
+    "highest": ((models.Review.rating, True), (models.Review.created, True), (models.Review.rvid, True)),
+    "lowest": ((models.Review.rating, False), (models.Review.created, True), (models.Review.rvid, True)),
+}
+
+
+def review_cursor(review, sort: str) -> str:
+    values = [review.created.isoformat() if review.created else None, review.rvid]
+    if sort != "newest":
+        values.insert(0, review.rating)
+    return encode_cursor(values)
+
+
+def decode_review_cursor(cursor: str, sort: str) -> list:
+    values = decode_cursor(cursor, len(REVIEW_ORDERS[sort]))
+    try:
+        # created is sent as ISO text; bind it back as a datetime
+        values[-2] = datetime.fromisoformat(values[-2])
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+
+def _review_page(db: Session, dto, stmt, sort: str, after, limit: int | None) -> list:
+    order = REVIEW_ORDERS[sort]
+    if after:
+        stmt = stmt.where(keyset_after(order, after))
+    stmt = stmt.order_by(*(column.desc() if descending else column.asc() for column, descending in order))
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return [dto(*row) for row in db.execute(stmt).all()]
+
+
+def restaurant_reviews(db: Session, restaurant_id: int, limit: int | None = None, sort: str = "newest", after=None) -> list:
+    """Reviews with usernames in ``sort`` order; ``limit`` rows are fetched plus one, as in restaurant_list."""
+    stmt = ReviewView.select()\
+        .join(models.User, models.Review.uid == models.User.uid)\
+        .where(models.Review.rid == restaurant_id)
+    return _review_page(db, ReviewView, stmt, sort, after, limit)
+
+
+def user_reviews(db: Session, uid: int, limit: int | None = None, sort: str = "newest", after=None) -> list:
+    stmt = UserReviewView.select()\
+        .join(models.Restaurant, models.Review.rid == models.Restaurant.rid)\
+        .where(models.Review.uid == uid)
+    return _review_page(db, UserReviewView, stmt, sort, after, limit)
+
+
+def review_page(reviews: list, limit: int, sort: str) -> dict:
+    """Trim the extra row fetched by restaurant_reviews/user_reviews into a page and next cursor."""
+    next_cursor = None
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        next_cursor = review_cursor(reviews[-1], sort)
+    return {"reviews": [review.as_dict() for review in reviews], "next_cursor": next_cursor}
+
+
+def restaurant_cuisines(db: Session, restaurant_id: int) -> list:
+    return db.execute(
+        select(models.Cuisine.name).where(models.Cuisine.rid == restaurant_id).order_by(models.Cuisine.cid)
+    ).scalars().all()
+
+
+def owner_listings(db: Session, owner_id: int) -> list:
+    rows = db.execute(ListingView.select().where(models.Restaurant.owner_id == owner_id)).all()
+    return [ListingView(*row) for row in rows]
@@ -0,0 +1,76 @@
+import hashlib
+from fastapi import Request, Response
+from cache import TTLCache
+from config import settings
+import http_cache
+import metrics
+import serialization
+
+# Detail responses that vary per restaurant; invalidate() drops all of them.
+RESTAURANT_KINDS = ("detail", "menu", "page")
+
+# (kind, rid) -> (version, body bytes, etag)
+encoded_responses = TTLCache(
+    maxsize=settings.RESPONSE_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
+metrics.register_cache("encoded_responses", encoded_responses)
+
+
+def encode_json(content) -> bytes:
+    # Same encoding as the app's default FastJSONResponse
+    return serialization.dumps(content)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def etag_response(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached_json(request: Request, kind: str, rid: int, version, build) -> Response:
+    """Serve the already-encoded body for (kind, rid) if it is still at ``version``.
+
+    ``build`` is only called on a miss and must return the JSON-able content.
+    """
+    entry = encoded_responses.get((kind, rid))
+    if entry is None or entry[0] != version:
+        body = encode_json(build())
+        entry = (version, body, make_etag(body))
+        encoded_responses.set((kind, rid), entry)
+    return etag_response(request, entry[1], entry[2])
+
+
+def invalidate(rid: int):
+    for kind in RESTAURANT_KINDS:
+        encoded_responses.pop((kind, rid))
+
+
+def clear():
+    encoded_responses.clear()
+
+
+@http_cache.register_purge_handler
+def _purge(keys):
+    # Surrogate-key purges from write routes also drop the encoded bodies
+    if keys is None:
+        clear()
+        return
+    for key in keys:
+        if key.startswith("restaurant-"):
+            invalidate(int(key.removeprefix("restaurant-")))
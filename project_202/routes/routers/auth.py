@@ -16,14 +16,21 @@ def login(user_credentials: OAuth2PasswordRequestForm = Depends(), db: Session =
     if not user:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Wrong creds!")
     
-    if not utils.verify_password(user_credentials.password, user.password):
+    if not utils.offload(utils.verify_password, user_credentials.password, user.password):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Wrong credentials!")
+
+    # Transparently move the stored hash to the configured bcrypt cost
+    if utils.needs_rehash(user.password):
+        user.password = utils.offload(utils.get_password_hash, user_credentials.password)
+        db.commit()
     
     access_token = oauth2.create_access_token(data={"uid": user.uid, "user_type": user.user_type})
+    refresh_token = oauth2.create_refresh_token(data={"uid": user.uid, "ver": user.token_version})
     
     # Return user info along with token
     return {
         "login_access_token": access_token, 
+        "refresh_token": refresh_token,
         "token_type": "bearer",
         "user_info": {
             "uid": user.uid,
@@ -34,3 +41,36 @@ def login(user_credentials: OAuth2PasswordRequestForm = Depends(), db: Session =
             "photo": user.photo
         }
     }
+
+# exchange a refresh token for a new access token without re-checking the password
+@router.post("/refresh")
+def refresh(body: schemas.RefreshRequest, db: Session = Depends(get_db)):
+    credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+    # user_type is re-read so role changes take effect on the next refresh
+    user = oauth2.verify_refresh_token(body.refresh_token, db, credentials_exception)
+
+    access_token = oauth2.create_access_token(data={"uid": user.uid, "user_type": user.user_type})
+    return {
+        "login_access_token": access_token,
+        "refresh_token": oauth2.create_refresh_token(data={"uid": user.uid, "ver": user.token_version}),
+        "token_type": "bearer",
+    }
+
+# revokes every refresh token the user holds; access tokens still run to their short expiry
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(current_user: schemas.CurrentUser = Depends(oauth2.get_current_user), db: Session = Depends(get_db)):
+    user = db.query(models.User).filter(models.User.uid == current_user.uid).first()
+    oauth2.revoke_refresh_tokens(user)
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.put("/password", status_code=status.HTTP_204_NO_CONTENT)
+def change_password(body: schemas.PasswordChange, current_user: schemas.CurrentUser = Depends(oauth2.get_current_user), db: Session = Depends(get_db)):
+    user = db.query(models.User).filter(models.User.uid == current_user.uid).first()
+    if not utils.offload(utils.verify_password, body.current_password, user.password):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Wrong credentials!")
+
+    user.password = utils.offload(utils.get_password_hash, body.new_password)
+    oauth2.revoke_refresh_tokens(user)
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
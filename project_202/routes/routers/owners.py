@@ -1,10 +1,14 @@
 
 import json
-from fastapi import APIRouter, Depends, HTTPException, status
-import pymysql
+import io
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
-import models, schemas, oauth2
+import models, schemas, oauth2, dedupe, bulk_import, menus, http_cache, read_models, pool_metrics, profiling
+from serialization import restaurants_out
 from db_config import get_db
+from search_index import restaurant_index
+from geo_index import restaurant_geo_index
 from datetime import datetime
 from typing import List
 
@@ -14,11 +18,40 @@ router = APIRouter(
     tags=['Owners']
 )
 
+# RestaurantOut/RestaurantUpdate field names -> Restaurant column names
+LISTING_COLUMNS = {
+    "zip": "zip_code",
+    "price": "price_range",
+}
+
+
+def listing_out(restaurant) -> dict:
+    # a models.Restaurant or a read_models.ListingView
+    zip_code = restaurant.zip_code or ""
+    return {
+        "rid": restaurant.rid,
+        "name": restaurant.name,
+        "owner": restaurant.owner_id,
+        "address": restaurant.address or "",
+        "zip": int(zip_code) if zip_code.isdigit() else 0,
+        "phone": restaurant.phone or 0,
+        "opentime": restaurant.opentime or "",
+        "closetime": restaurant.closetime or "",
+        "description": restaurant.description or "",
+        "price": restaurant.price_range or "",
+        "rating": restaurant.overall_rating or 0,
+        "status": restaurant.status or "",
+        "menu": restaurant.menu or "",
+        "menu_photo": restaurant.menu_photo or "",
+        "latitude": restaurant.latitude,
+        "longitude": restaurant.longitude,
+    }
+
 # Business Owner Endpoints
 @router.get("/view-listings", response_model=List[schemas.RestaurantOut])
 def view_owned_listings(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(oauth2.get_current_user)
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
 ):
     if current_user.user_type != "owner":
         raise HTTPException(
@@ -26,48 +59,15 @@ def view_owned_listings(
             detail="Only restaurant owners can view their listings"
         )
     
-    listings = db.query(models.Restaurant).filter(
-        models.Restaurant.owner == current_user.uid
-    ).all()
-
-    # Convert time objects to strings and handle None values
-    for listing in listings:
-        if listing.menu_photo is None:
-            listing.menu_photo = ""
-        if listing.menu is None:
-            listing.menu = ""
+    listings = read_models.owner_listings(db, current_user.uid)
 
-    return listings
-
-def calculate_price_range(menu_items):
-    try:
-        menu_data = json.loads(menu_items)
-        prices = []
-        
-        for category in menu_data:
-            if 'items' in category:
-                for item in category['items']:
-                    if 'price' in item:
-                        prices.append(float(item['price']))
-        
-        if not prices:
-            return "$$"
-            
-        avg_price = sum(prices) / len(prices)
-        
-        if avg_price < 10:
-            return "$"
-        elif avg_price < 20:
-            return "$$"
-        return "$$$"
-    except:
-        return "$$"
+    return restaurants_out.response([listing_out(listing) for listing in listings])
 
 @router.post("/add-listing", response_model=schemas.RestaurantCreate)
 def create_restaurant(
     restaurant: schemas.RestaurantCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(oauth2.get_current_user)
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
 ):
     if current_user.user_type != "owner":
         raise HTTPException(
@@ -75,9 +75,6 @@ def create_restaurant(
             detail="Only restaurant owners can create listings"
         )
 
-    # Calculate price range based on menu
-    price_range = calculate_price_range(restaurant.menu)
-    
     existing_restaurant = db.query(models.Restaurant).filter(
         models.Restaurant.name == restaurant.name,
         models.Restaurant.address == restaurant.address
@@ -107,31 +104,38 @@ def create_restaurant(
     
     new_restaurant = models.Restaurant(
         name=restaurant.name,
-        owner=current_user.uid,
+        owner_id=current_user.uid,
         address=restaurant.address,
-        zip=restaurant.zip,
+        zip_code=str(restaurant.zip),
         phone=restaurant.phone,
-        opentime=opentime,
-        closetime=closetime,
+        opentime=opentime.strftime("%H:%M"),
+        closetime=closetime.strftime("%H:%M"),
         description=restaurant.description,
         status="1",  # Default value
-        rating=0.0,     # Default value
-        price=price_range,     
+        overall_rating=0.0,     # Default value
         menu=restaurant.menu, 
-        menu_photo=restaurant.menu_photo   
+        menu_photo=restaurant.menu_photo,
+        latitude=restaurant.latitude,
+        longitude=restaurant.longitude,
     )
     
     db.add(new_restaurant)
+    db.flush()
+    # Normalize the menu into menu_item rows and store its price stats/band
+    menus.replace_menu_items(db, new_restaurant.rid, restaurant.menu)
     db.commit()
     db.refresh(new_restaurant)
-    return new_restaurant
+    restaurant_index.upsert(new_restaurant)
+    restaurant_geo_index.upsert(new_restaurant)
+    http_cache.purge_restaurant(new_restaurant.rid, current_user.uid)
+    return listing_out(new_restaurant)
 
 @router.put("/update-listing/{listing_id}", response_model=schemas.RestaurantOut)
 def update_restaurant(
     listing_id: int,
     restaurant: schemas.RestaurantUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(oauth2.get_current_user)
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
 ):
     if current_user.user_type != "owner":
         raise HTTPException(
@@ -141,7 +145,7 @@ def update_restaurant(
     
     restaurant_query = db.query(models.Restaurant).filter(
         models.Restaurant.rid == listing_id,
-        models.Restaurant.owner == current_user.uid
+        models.Restaurant.owner_id == current_user.uid
     )
     
     existing_restaurant = restaurant_query.first()
@@ -154,14 +158,10 @@ def update_restaurant(
     
     update_data = restaurant.dict(exclude_unset=True)
 
-    # Update price range if menu is being updated
-    if 'menu' in update_data:
-        update_data['price'] = calculate_price_range(update_data['menu'])
-    
-    # Convert time strings to Time objects if they exist
+    # Validate time strings if they exist
     if 'opentime' in update_data:
         try:
-            update_data['opentime'] = datetime.strptime(update_data['opentime'], "%H:%M").time()
+            update_data['opentime'] = datetime.strptime(update_data['opentime'], "%H:%M").strftime("%H:%M")
         except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -170,7 +170,7 @@ def update_restaurant(
     
     if 'closetime' in update_data:
         try:
-            update_data['closetime'] = datetime.strptime(update_data['closetime'], "%H:%M").time()
+            update_data['closetime'] = datetime.strptime(update_data['closetime'], "%H:%M").strftime("%H:%M")
         except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -181,17 +181,29 @@ def update_restaurant(
         update_data['menu_photo'] = ""
     if 'menu' in update_data and update_data['menu'] is None:
         update_data['menu'] = ""
-    
+    if 'zip' in update_data:
+        update_data['zip'] = str(update_data['zip'])
+    if 'status' in update_data:
+        update_data['status'] = str(update_data['status'])
+
+    update_data = {LISTING_COLUMNS.get(k, k): v for k, v in update_data.items()}
     restaurant_query.update(update_data, synchronize_session=False)
+    # Re-normalize the menu (and price stats/band) if it is being updated
+    if 'menu' in update_data:
+        menus.replace_menu_items(db, listing_id, update_data['menu'])
     db.commit()
-    
-    return restaurant_query.first()
+
+    http_cache.purge_restaurant(listing_id, current_user.uid)
+    updated_restaurant = restaurant_query.first()
+    restaurant_index.upsert(updated_restaurant)
+    restaurant_geo_index.upsert(updated_restaurant)
+    return listing_out(updated_restaurant)
 
 @router.delete("/delete-listing/{listing_id}")
 def delete_restaurant(
     listing_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(oauth2.get_current_user)
+    current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)
 ):
     if current_user.user_type != "owner":
         raise HTTPException(
@@ -201,7 +213,7 @@ def delete_restaurant(
     
     restaurant = db.query(models.Restaurant).filter(
         models.Restaurant.rid == listing_id,
-        models.Restaurant.owner == current_user.uid
+        models.Restaurant.owner_id == current_user.uid
     ).first()
     
     if not restaurant:
@@ -210,22 +222,26 @@ def delete_restaurant(
             detail="Restaurant not found or you don't have permission to delete it"
         )
     
-    if restaurant.owner != current_user.uid:
+    if restaurant.owner_id != current_user.uid:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to delete this restaurant"
         )
 
-    db.query(models.Review).filter(models.Review.restaurant == listing_id).delete()
+    db.query(models.Review).filter(models.Review.rid == listing_id).delete()
+    db.query(models.MenuItem).filter(models.MenuItem.rid == listing_id).delete()
 
     db.delete(restaurant)
     db.commit()
-    
+    restaurant_index.remove(listing_id)
+    restaurant_geo_index.remove(listing_id)
+    http_cache.purge_restaurant(listing_id, current_user.uid)
+
     return {"message": "Restaurant deleted successfully"}
 	
 # delete listing by id if user_type = "admin" and signed in
 @router.delete("/admin-delete-listing/{listing_id}")
-def delete_listing(listing_id: int, db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
+def delete_listing(listing_id: int, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)):
 	# Fetch the existing restaurant
 	existing_restaurant = db.query(models.Restaurant).filter(models.Restaurant.rid == listing_id).first()
 
@@ -243,13 +259,32 @@ def delete_listing(listing_id: int, db: Session = Depends(get_db), current_user:
 		)
 
 	# Delete the record
+	db.query(models.MenuItem).filter(models.MenuItem.rid == listing_id).delete()
 	db.query(models.Restaurant).filter(models.Restaurant.rid == listing_id).delete()
 	db.commit()
+	restaurant_index.remove(listing_id)
+	restaurant_geo_index.remove(listing_id)
+	http_cache.purge_restaurant(listing_id, existing_restaurant.owner_id)
 	return {"message": "Listing deleted successfully"}
 
+# report duplicate listings without deleting anything, only as admin
+@router.get("/duplicates")
+def report_duplicates(fuzzy: bool = False, threshold: float = Query(0.8, ge=0.5, le=1.0), db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)):
+	if current_user.user_type != "admin":
+		raise HTTPException(
+			status_code=403,
+			detail="Not authorized to view duplicates",
+		)
+
+	clusters = dedupe.find_duplicates(db, fuzzy=fuzzy, threshold=threshold)
+	return {
+		"clusters": clusters,
+		"duplicate_count": sum(len(c["remove"]) for c in clusters),
+	}
+
 # remove duplicate listings and keep the one created first only as admin
 @router.delete("/remove-duplicates")
-def remove_duplicates(db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
+def remove_duplicates(fuzzy: bool = False, threshold: float = Query(0.8, ge=0.5, le=1.0), db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)):
 	# Ensure the current user is an admin
 	if current_user.user_type != "admin":
 		raise HTTPException(
@@ -257,24 +292,79 @@ def remove_duplicates(db: Session = Depends(get_db), current_user: int = Depends
 			detail="Not authorized to remove duplicates",
 		)
 
-	# Fetch all listings
-	listings = db.query(models.Restaurant).all()
+	clusters = dedupe.find_duplicates(db, fuzzy=fuzzy, threshold=threshold)
+	removed = [rid for cluster in clusters for rid in cluster["remove"]]
 
-	# Group listings by name
-	listing_groups = {}
-	for listing in listings:
-		if listing.name not in listing_groups:
-			listing_groups[listing.name] = []
-		listing_groups[listing.name].append(listing)
+	owners = dedupe.listing_owners(db, removed)
+	# Batched delete that also removes the duplicates' reviews, photos and cuisines
+	deleted = dedupe.delete_listings(db, removed)
+	for rid in removed:
+		restaurant_index.remove(rid)
+		restaurant_geo_index.remove(rid)
+	http_cache.purge(
+		*(f"restaurant-{rid}" for rid in removed),
+		*(f"owner-{owner_id}" for owner_id in sorted(owners)),
+		http_cache.LIST_KEY,
+	)
+	return {"message": "Duplicates removed successfully", "removed": deleted}
 
-	# Remove duplicates
-	for group in listing_groups.values():
-		if len(group) > 1:
-			# Sort by rid in ascending order
-			group.sort(key=lambda x: x.rid)
-			# Delete all but the first
-			for listing in group[1:]:
-				db.delete(listing)
-	
-	db.commit()
-	return {"message": "Duplicates removed successfully"}
+# stream a CSV/NDJSON upload of restaurants or reviews into the database, only as admin
+@router.post("/import/{kind}")
+def import_listings(
+	kind: str,
+	file: UploadFile = File(...),
+	format: str | None = Query(None, pattern="^(csv|ndjson)$"),
+	batch_size: int = Query(bulk_import.DEFAULT_BATCH_SIZE, ge=1, le=10000),
+	db: Session = Depends(get_db),
+	current_user: schemas.CurrentUser = Depends(oauth2.get_current_user),
+):
+	if current_user.user_type != "admin":
+		raise HTTPException(
+			status_code=403,
+			detail="Not authorized to import listings",
+		)
+	if kind not in bulk_import.IMPORTERS:
+		raise HTTPException(
+			status_code=404,
+			detail=f"Unknown import kind {kind}",
+		)
+
+	fmt = format or bulk_import.detect_format(file.filename)
+	lines = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+	return bulk_import.import_records(db, kind, bulk_import.iter_records(lines, fmt), batch_size)
+
+# connection pool statistics per engine (checked out, overflow, checkout wait), only as admin
+@router.get("/pool-stats")
+def pool_stats(current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)):
+	if current_user.user_type != "admin":
+		raise HTTPException(
+			status_code=403,
+			detail="Not authorized to view pool statistics",
+		)
+	return pool_metrics.snapshot()
+
+# request profiles in this worker's ring buffer (X-Profile: 1 or 1-in-N sampling), only as admin
+@router.get("/profiles")
+def list_profiles(current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)):
+	if current_user.user_type != "admin":
+		raise HTTPException(
+			status_code=403,
+			detail="Not authorized to view profiles",
+		)
+	return [profiling.summary(profile) for profile in reversed(profiling.profiles)]
+
+# one profile as collapsed stacks ("outer;inner count" lines) for flamegraph.pl or speedscope
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str, current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)):
+	if current_user.user_type != "admin":
+		raise HTTPException(
+			status_code=403,
+			detail="Not authorized to view profiles",
+		)
+	profile = profiling.find(profile_id)
+	if profile is None:
+		raise HTTPException(
+			status_code=404,
+			detail=f"Profile {profile_id} not found",
+		)
+	return profiling.collapsed(profile)
@@ -1,17 +1,18 @@
 from datetime import datetime
-from http.client import HTTPException
 import json
-from typing import Optional, Text
-from fastapi import FastAPI, APIRouter, Depends, status, requests
+from typing import TYPE_CHECKING, Optional
+from fastapi import APIRouter, Depends, Query, Request, status
 from fastapi.exceptions import HTTPException
-import requests
-import pymysql.cursors
-import pymysql
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-import googlemaps
-import models, schemas, oauth2
-from db_config import get_db
-from config import settings
+import models, schemas, oauth2, rating_aggregates, menus, response_cache, http_cache, read_models
+from db_config import get_async_db, get_db
+from search_index import restaurant_index
+from geo_index import restaurant_geo_index
+from places_client import places_client
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 # Create a router object
 router = APIRouter(
@@ -19,80 +20,184 @@ router = APIRouter(
     tags=['Restaurants']
 )
 
-# fetch restaurant details from database using restaurant_id
-@router.get("/{restaurant_id}")
-def get_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
-    restaurant = db.query(models.Restaurant).filter(models.Restaurant.rid == restaurant_id).first()
-    if not restaurant:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
-    photos = db.query(models.Photo).filter(models.Photo.rid == restaurant_id).all()
+# full-text search over restaurant details and menu items, ranked with BM25
+# (declared before /{restaurant_id} so "search" is not parsed as an id)
+@router.get("/search")
+def search_restaurants(q: str = Query(..., min_length=1), limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    restaurant_index.ensure_loaded(db)
+    hits = restaurant_index.search(q, limit)
+    if not hits:
+        return {"results": []}
+
+    rows = db.query(
+        models.Restaurant.rid,
+        models.Restaurant.name,
+        models.Restaurant.address,
+        models.Restaurant.city,
+        models.Restaurant.zip_code,
+        models.Restaurant.overall_rating,
+        models.Restaurant.price_range,
+    ).filter(models.Restaurant.rid.in_([rid for rid, _ in hits])).all()
+    by_rid = {row.rid: row._mapping for row in rows}
+
     return {
-        "rid": restaurant.rid,
-        "name": restaurant.name,
-        "address": restaurant.address,
-        "city": restaurant.city,
-        "state": restaurant.state,
-        "zip_code": restaurant.zip_code,
-        "phone": restaurant.phone,
-        "website": restaurant.website,
-        "overall_rating": restaurant.overall_rating,
-        "price_range": restaurant.price_range,
-        "opentime": restaurant.opentime,
-        "closetime": restaurant.closetime,
-        "description": restaurant.description,
-        "status": restaurant.status,
-        "menu": restaurant.menu,
-        "photos": [{"pid": p.pid, "url": p.url} for p in photos],
+        "results": [
+            {**by_rid[rid], "score": round(score, 4)}
+            for rid, score in hits if rid in by_rid
+        ]
     }
 
-# fetch menu for a restaurant from database using restaurant_id
-@router.get("/{restaurant_id}/menu")
-def get_menu(restaurant_id: int, db: Session = Depends(get_db)):
-    restaurant = db.query(models.Restaurant).filter(models.Restaurant.rid == restaurant_id).first()
-    if not restaurant:
+# restaurants within radius_km of a point, nearest first
+@router.get("/nearby")
+def nearby_restaurants(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5, gt=0, le=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    restaurant_geo_index.ensure_loaded(db)
+    hits = restaurant_geo_index.nearby(lat, lng, radius_km, limit)
+    if not hits:
+        return {"results": []}
+
+    rows = db.query(
+        models.Restaurant.rid,
+        models.Restaurant.name,
+        models.Restaurant.address,
+        models.Restaurant.city,
+        models.Restaurant.zip_code,
+        models.Restaurant.latitude,
+        models.Restaurant.longitude,
+        models.Restaurant.overall_rating,
+        models.Restaurant.price_range,
+    ).filter(models.Restaurant.rid.in_([rid for rid, _ in hits])).all()
+    by_rid = {row.rid: row._mapping for row in rows}
+
+    return {
+        "results": [
+            {**by_rid[rid], "distance_km": round(distance, 3)}
+            for rid, distance in hits if rid in by_rid
+        ]
+    }
+
+def restaurant_version(db: Session, restaurant_id: int, request: Request = None):
+    # Cheap primary-key lookup that doubles as the existence check
+    row = db.query(models.Restaurant.revision, models.Restaurant.updated, models.Restaurant.owner_id)\
+        .filter(models.Restaurant.rid == restaurant_id).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Restaurant not found")
-    if not restaurant.menu:
+    if request is not None:
+        # Last-Modified and the owner's surrogate key for the HTTP cache
+        http_cache.tag(
+            request,
+            last_modified=row.updated,
+            keys=[f"owner-{row.owner_id}"] if row.owner_id is not None else (),
+        )
+    # changes on every write, so other workers' cached bodies go stale at once
+    return row.revision
+
+
+def restaurant_detail(db: Session, restaurant_id: int) -> dict:
+    restaurant = read_models.restaurant_detail(db, restaurant_id)
+    if restaurant is None:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    return restaurant.as_dict()
+
+
+def menu_document(menu_json):
+    if not menu_json:
         return {}
     try:
-        return json.loads(restaurant.menu)
+        return json.loads(menu_json)
     except json.JSONDecodeError:
         return {}
 
+
+def restaurant_menu(db: Session, restaurant_id: int):
+    menu = menus.load_menu(db, restaurant_id)
+    if menu is not None:
+        return menu
+
+    # Not normalized yet (see menus.py backfill): fall back to the JSON document
+    restaurant = db.query(models.Restaurant.menu).filter(models.Restaurant.rid == restaurant_id).first()
+    if not restaurant:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    return menu_document(restaurant.menu)
+
+def cached_restaurant_json(db: Session, request: Request, kind: str, restaurant_id: int, build):
+    version = restaurant_version(db, restaurant_id, request)
+    return response_cache.cached_json(request, kind, restaurant_id, version, lambda: build(db, restaurant_id))
+
+# fetch restaurant details from database using restaurant_id
+# (served from pre-encoded bytes with an ETag; 304 when If-None-Match matches)
+@router.get("/{restaurant_id}")
+async def get_restaurant(restaurant_id: int, request: Request, db: "AsyncSession" = Depends(get_async_db)):
+    return await db.run_sync(cached_restaurant_json, request, "detail", restaurant_id, restaurant_detail)
+
+# fetch menu for a restaurant from database using restaurant_id
+@router.get("/{restaurant_id}/menu")
+async def get_menu(restaurant_id: int, request: Request, db: "AsyncSession" = Depends(get_async_db)):
+    return await db.run_sync(cached_restaurant_json, request, "menu", restaurant_id, restaurant_menu)
+
+# everything the restaurant page shows, in one response: details with photos,
+# cuisines, menu and the newest reviews. Built in a fixed number of queries
+# and cached like the detail/menu responses (one version lookup when warm).
+PAGE_REVIEWS = 10
+MAX_REVIEWS_PAGE = 100
+
+
+def restaurant_page(db: Session, restaurant_id: int) -> dict:
+    restaurant = restaurant_detail(db, restaurant_id)
+    menu = menus.load_menu(db, restaurant_id)
+    reviews = read_models.review_page(
+        read_models.restaurant_reviews(db, restaurant_id, PAGE_REVIEWS), PAGE_REVIEWS, "newest"
+    )
+    return {
+        "restaurant": restaurant,
+        "cuisines": read_models.restaurant_cuisines(db, restaurant_id),
+        # the detail row already carries the JSON document if there are no menu_item rows
+        "menu": menu if menu is not None else menu_document(restaurant["menu"]),
+        "reviews": reviews["reviews"],
+        # continue with /{restaurant_id}/reviews?cursor=
+        "reviews_next_cursor": reviews["next_cursor"],
+    }
+
+
+@router.get("/{restaurant_id}/page")
+async def get_restaurant_page(restaurant_id: int, request: Request, db: "AsyncSession" = Depends(get_async_db)):
+    return await db.run_sync(cached_restaurant_json, request, "page", restaurant_id, restaurant_page)
+
 # fetch reviews for a restaurant from database using restaurant_id
+# (keyset pages ordered by (created, rvid), optionally by rating first)
 @router.get("/{restaurant_id}/reviews")
-def get_reviews(restaurant_id: int, db: Session = Depends(get_db)):
-    reviews = db.query(models.Review, models.User.username)\
-        .join(models.User, models.Review.uid == models.User.uid)\
-        .filter(models.Review.rid == restaurant_id)\
-        .all()
-    
-    return [
-        {
-            "rvid": review.rvid,
-            "rating": review.rating,
-            "comment": review.comment,
-            "rid": review.rid,
-            "uid": review.uid,
-            "created": review.created,
-            "username": username,
-        } for review, username in reviews
-    ]
+async def get_reviews(
+    restaurant_id: int,
+    limit: int = Query(20, ge=1, le=MAX_REVIEWS_PAGE),
+    cursor: Optional[str] = None,
+    sort: str = Query("newest", pattern="^(newest|highest|lowest)$"),
+    db: "AsyncSession" = Depends(get_async_db),
+):
+    after = read_models.decode_review_cursor(cursor, sort) if cursor else None
+    reviews = await db.run_sync(read_models.restaurant_reviews, restaurant_id, limit, sort, after)
+    return read_models.review_page(reviews, limit, sort)
 
 
 # get average rating for a restaurant using restaurant_id
 @router.get("/{restaurant_id}/rating")
-def get_rating(restaurant_id: int, db: Session = Depends(get_db)):
-    reviews = db.query(models.Review).filter(models.Review.rid == restaurant_id).all()
-    total_rating = 0
-    for review in reviews:
-        total_rating += review.rating
-    if len(reviews) == 0:
+async def get_rating(restaurant_id: int, db: "AsyncSession" = Depends(get_async_db)):
+    result = await db.execute(
+        select(models.Restaurant.review_count, models.Restaurant.rating_sum)
+        .where(models.Restaurant.rid == restaurant_id)
+    )
+    aggregate = result.first()
+    if aggregate is None or not aggregate.review_count:
         return 0
-    return total_rating / len(reviews)
+    return aggregate.rating_sum / aggregate.review_count
 
 # create a review while logged in, owners and admins cannot create reviews, only users
 @router.post("/{restaurant_id}/create_review")
-def create_review(restaurant_id: int, review: schemas.ReviewCreate, db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):   
+def create_review(restaurant_id: int, review: schemas.ReviewCreate, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(oauth2.get_current_user)):   
     if current_user.user_type == "owner" or current_user.user_type == "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -101,31 +206,24 @@ def create_review(restaurant_id: int, review: schemas.ReviewCreate, db: Session
     
     new_review = models.Review(rid=restaurant_id, uid=current_user.uid, rating=review.rating, comment=review.comment, created=datetime.now())
     db.add(new_review)
-    db.flush()  # flush so new review is included in the count
 
-    # Recalculate overall_rating as average of all reviews for this restaurant
-    all_reviews = db.query(models.Review).filter(models.Review.rid == restaurant_id).all()
-    total = sum(r.rating for r in all_reviews)
-    avg_rating = round(total / len(all_reviews), 1) if all_reviews else 0
-
-    restaurant = db.query(models.Restaurant).filter(models.Restaurant.rid == restaurant_id).first()
-    if restaurant:
-        restaurant.overall_rating = avg_rating
+    # Fold the new rating into the stored aggregates in the same transaction
+    rating_aggregates.record_review(db, restaurant_id, review.rating)
 
     db.commit()
+    http_cache.purge(*http_cache.restaurant_keys(restaurant_id), f"user-{current_user.uid}")
     db.refresh(new_review)
     return new_review
 
 
 @router.get("/google-places/{zipcode}")
 async def google_places_proxy(zipcode: int):
-    api_key = settings.MAPS_KEY
-    zip_code_int = int(zipcode)
-    url = f"https://maps.googleapis.com/maps/api/place/textsearch/json?query=restaurants+in+{zip_code_int}&key={api_key}"
-
+    # httpx is imported on first use rather than on the cold-start import path
+    import httpx
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        return await places_client.text_search(int(zipcode))
+    except httpx.TimeoutException as e:
+        raise HTTPException(status_code=504, detail=f"Google Places timed out: {e}")
+    except (httpx.HTTPError, ValueError) as e:
+        # ValueError: the upstream answered with a body that is not JSON
+        raise HTTPException(status_code=500, detail=str(e))
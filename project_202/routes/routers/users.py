@@ -1,52 +1,76 @@
 
 from datetime import datetime
-from fastapi import HTTPException, Response, status, Depends, APIRouter
+from typing import TYPE_CHECKING, Optional
+from fastapi import HTTPException, Query, Response, status, Depends, APIRouter
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-import models, schemas
-from db_config import get_db
+import models, schemas, read_models
+from serialization import user_out, users_out
+from db_config import get_async_db, get_db
 import utils
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 # Create a router object
 router = APIRouter(
     prefix="/users",
     tags=['Users']
 )
 
+# one query for both the email and username uniqueness checks
+def ensure_unique_user(db: Session, user: schemas.UserCreate):
+    taken = db.query(models.User.email, models.User.username).filter(
+        or_(models.User.email == user.email, models.User.username == user.username)
+    ).limit(2).all()
+    if any(row.email == user.email for row in taken):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    if taken:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already taken"
+        )
+
 #get all users
 @router.get("/", response_model=list[schemas.UserOut])
 def get_users(db: Session = Depends(get_db)):
-    users = db.query(models.User).all()
-    return users
+    # Only the UserOut columns, encoded by the precompiled serializer
+    users = db.query(models.User.uid, models.User.email, models.User.username, models.User.created).all()
+    return users_out.response(users)
 
 #get user by id
 @router.get("/{uid}", response_model=schemas.UserOut)
 def get_user_by_id(uid: int, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.uid == uid).first()
+    user = db.query(models.User.uid, models.User.email, models.User.username, models.User.created)\
+        .filter(models.User.uid == uid).first()
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User with id {uid} not found")
-    return user
+    return user_out.response(user)
+
+
+# a user's review history, newest first by default, in keyset pages
+@router.get("/{uid}/reviews")
+async def get_user_reviews(
+    uid: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    sort: str = Query("newest", pattern="^(newest|highest|lowest)$"),
+    db: "AsyncSession" = Depends(get_async_db),
+):
+    after = read_models.decode_review_cursor(cursor, sort) if cursor else None
+    reviews = await db.run_sync(read_models.user_reviews, uid, limit, sort, after)
+    return read_models.review_page(reviews, limit, sort)
 
 
 @router.post("/create_users", status_code=status.HTTP_201_CREATED, response_model=schemas.UserOut)
 def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    # Check if email already exists
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Check if username already exists
-    existing_username = db.query(models.User).filter(models.User.username == user.username).first()
-    if existing_username:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken"
-        )
+    ensure_unique_user(db, user)
 
     # Hash password
-    hashed_password = utils.get_password_hash(user.password)
+    hashed_password = utils.offload(utils.get_password_hash, user.password)
     
     # Create new user
     new_user = models.User(
@@ -66,24 +90,10 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/create_owner", status_code=status.HTTP_201_CREATED, response_model=schemas.UserOut)
 def create_owner(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    # Check if email already exists
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Check if username already exists
-    existing_username = db.query(models.User).filter(models.User.username == user.username).first()
-    if existing_username:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken"
-        )
+    ensure_unique_user(db, user)
 
     # Hash password
-    hashed_password = utils.get_password_hash(user.password)
+    hashed_password = utils.offload(utils.get_password_hash, user.password)
     
     # Create new owner
     new_user = models.User(
@@ -104,7 +114,7 @@ def create_owner(user: schemas.UserCreate, db: Session = Depends(get_db)):
 # create admin
 @router.post("/create_admin", status_code=status.HTTP_201_CREATED, response_model=schemas.UserOut)
 def create_admin(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    hashed_password = utils.get_password_hash(user.password)
+    hashed_password = utils.offload(utils.get_password_hash, user.password)
     user.password = hashed_password
     new_user = models.User(email=user.email, password=user.password, username=user.username, user_type="admin", created=datetime.now())
     db.add(new_user)
@@ -53,11 +53,32 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
+
 class TokenData(BaseModel):
     uid: Optional[int] = None
     user_type: Optional[str] = None
 
 
+class CurrentUser(BaseModel):
+    # Authenticated principal resolved from a bearer token; cached between requests
+    uid: int
+    username: str
+    email: str
+    user_type: Optional[str] = None
+    status: Optional[str] = None
+    photo: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
+
 class RestaurantCreate(BaseModel):
     name: str
     address: str
@@ -70,6 +91,8 @@ class RestaurantCreate(BaseModel):
     status: int = 1    # Default to open (1=open, 0=closed)
     menu: Optional[str] 
     menu_photo: str = ""  # Default empty string
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -80,6 +103,13 @@ class RestaurantCreate(BaseModel):
             return v.strftime("%H:%M")
         return v
 
+class RestaurantImport(RestaurantCreate):
+    # Bulk import rows may also carry columns owners cannot set through the API
+    owner_id: Optional[int] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    website: Optional[str] = None
+
 class RestaurantOut(BaseModel):
     rid: int
     name: str
@@ -116,6 +146,8 @@ class RestaurantUpdate(BaseModel):
     status: Optional[int] = None
     menu: Optional[str] = None
     menu_photo: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -124,6 +156,10 @@ class ReviewCreate(BaseModel):
     rating: int
     comment: Optional[str] = None
 
+class ReviewImport(ReviewCreate):
+    rid: int
+    uid: int
+
 class ReviewOut(BaseModel):
     rvid: int
     restaurant: int
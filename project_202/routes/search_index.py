@@ -0,0 +1,148 @@
+import heapq
+import json
+import math
+import re
+from bisect import bisect_left
+from collections import Counter
+from sqlalchemy.orm import Session
+import models
+from listing_index import ListingIndex
+from config import settings
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Restaurant columns that feed the index; name matches count more than body text.
+INDEXED_COLUMNS = ("rid", "name", "address", "city", "zip_code", "description", "menu")
+NAME_WEIGHT = 3
+
+
+def tokenize(text) -> list:
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def menu_text(menu: str | None) -> list:
+    # Menu is stored as a JSON list of {"category", "items": [{"name", "description", ...}]}
+    if not menu:
+        return []
+    try:
+        menu_data = json.loads(menu)
+    except (TypeError, ValueError):
+        return []
+    if isinstance(menu_data, dict):
+        menu_data = list(menu_data.values())
+    parts = []
+    for category in menu_data if isinstance(menu_data, list) else []:
+        if not isinstance(category, dict):
+            continue
+        parts.append(category.get("category"))
+        for item in category.get("items") or []:
+            if isinstance(item, dict):
+                parts.append(item.get("name"))
+                parts.append(item.get("description"))
+    return [p for p in parts if isinstance(p, str)]
+
+
+def restaurant_terms(restaurant) -> Counter:
+    terms = Counter()
+    for token in tokenize(restaurant.name):
+        terms[token] += NAME_WEIGHT
+    for value in (restaurant.address, restaurant.city, restaurant.zip_code, restaurant.description):
+        terms.update(tokenize(value))
+    for value in menu_text(restaurant.menu):
+        terms.update(tokenize(value))
+    return terms
+
+
+class SearchIndex(ListingIndex):
+    """In-process inverted index over restaurants, ranked with Okapi BM25.
+
+    Built from the database on first use and kept current by the write routes;
+    ``listing_index.ListingIndex`` covers how a stale copy is refreshed.
+    """
+
+    _state = ("_postings", "_doc_terms", "_doc_len", "_total_len", "_vocabulary")
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_age: float = 300):
+        self.k1 = k1
+        self.b = b
+        super().__init__(max_age)
+
+    def _reset(self):
+        self._postings = {}   # term -> {rid: term frequency}
+        self._doc_terms = {}  # rid -> Counter of terms, needed for removal
+        self._doc_len = {}
+        self._total_len = 0
+        self._vocabulary = None
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def _read(self, db: Session) -> list:
+        return db.query(*[getattr(models.Restaurant, c) for c in INDEXED_COLUMNS]).all()
+
+    def _entry(self, restaurant) -> Counter:
+        return restaurant_terms(restaurant)
+
+    def _add(self, rid: int, terms: Counter):
+        self._doc_terms[rid] = terms
+        self._doc_len[rid] = sum(terms.values())
+        self._total_len += self._doc_len[rid]
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._vocabulary = None
+            postings[rid] = tf
+
+    def _remove(self, rid: int):
+        terms = self._doc_terms.pop(rid, None)
+        if terms is None:
+            return
+        self._total_len -= self._doc_len.pop(rid)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(rid, None)
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+
+    def _expand(self, token: str) -> list:
+        # The last query token is treated as a prefix so results update as the user types.
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        matches = []
+        i = bisect_left(vocabulary, token)
+        while i < len(vocabulary) and vocabulary[i].startswith(token):
+            matches.append(vocabulary[i])
+            i += 1
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> list:
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        with self._lock:
+            n_docs = len(self._doc_terms)
+            if n_docs == 0:
+                return []
+            avg_len = self._total_len / n_docs
+            scores = {}
+            for position, token in enumerate(tokens):
+                if position == len(tokens) - 1:
+                    terms = self._expand(token)
+                else:
+                    terms = [token] if token in self._postings else []
+                for term in terms:
+                    postings = self._postings[term]
+                    idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for rid, tf in postings.items():
+                        doc_len = self._doc_len[rid]
+                        norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * doc_len / avg_len))
+                        scores[rid] = scores.get(rid, 0.0) + idf * norm
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+restaurant_index = SearchIndex(max_age=settings.LISTING_INDEX_MAX_AGE_SECONDS)
@@ -0,0 +1,93 @@
+"""Fast JSON encoding for API responses.
+
+``FastJSONResponse`` renders with orjson when it is installed (stdlib json
+otherwise) and is the app's default response class. Returning one directly
+from a route also skips FastAPI's ``jsonable_encoder`` pass over the content.
+
+For routes with a response model, the module-level serializers build the
+models from database rows without re-validating them (the data was validated
+on the way in; EmailStr validation alone dominates a response_model round
+trip) and encode them with a precompiled pydantic-core TypeAdapter:
+
+    return users_out.response(rows)
+
+``python benchmarks/bench_serialization.py`` compares the paths.
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+import schemas
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, same output shape
+    orjson = None
+
+
+def _default(value):
+    # Types orjson does not handle natively, converted the way jsonable_encoder does
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return _default(value)
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_json_default,
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class ModelSerializer:
+    """Precompiled JSON serializer for ``model`` (or a list of it when ``many``)."""
+
+    def __init__(self, model, many: bool = False):
+        self.model = model
+        self.many = many
+        self.fields = tuple(model.model_fields)
+        self.adapter = TypeAdapter(list[model] if many else model)
+
+    def _construct(self, row):
+        if isinstance(row, dict):
+            values = {f: row[f] for f in self.fields if f in row}
+        else:
+            # ORM instances and Row tuples both expose columns as attributes
+            values = {f: getattr(row, f) for f in self.fields if hasattr(row, f)}
+        return self.model.model_construct(**values)
+
+    def dump_json(self, data) -> bytes:
+        if self.many:
+            return self.adapter.dump_json([self._construct(row) for row in data])
+        return self.adapter.dump_json(self._construct(data))
+
+    def response(self, data, status_code: int = 200) -> Response:
+        return Response(content=self.dump_json(data), status_code=status_code, media_type="application/json")
+
+
+# Precompiled serializers for the hot response shapes
+user_out = ModelSerializer(schemas.UserOut)
+users_out = ModelSerializer(schemas.UserOut, many=True)
+restaurant_out = ModelSerializer(schemas.RestaurantOut)
+restaurants_out = ModelSerializer(schemas.RestaurantOut, many=True)
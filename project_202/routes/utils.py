@@ -1,4 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
 import bcrypt
+from config import settings
+
+# bcrypt releases the GIL, so a small dedicated pool hashes in parallel while
+# capping how many cores a login/signup storm can take from other requests.
+# It limits CPU only: see offload() for what it does not free.
+_hash_pool = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -8,8 +18,29 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: int | None = None) -> str:
     return bcrypt.hashpw(
         password.encode("utf-8"),
-        bcrypt.gensalt()
-    ).decode("utf-8")
\ No newline at end of file
+        bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
+    ).decode("utf-8")
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    # bcrypt hashes look like $2b$<cost>$<salt+hash>
+    try:
+        cost = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return cost != settings.BCRYPT_ROUNDS
+
+
+def offload(fn, *args):
+    """Run a password hashing call on the bounded pool and wait for the result.
+
+    This is a concurrency limiter, not a way to free threads: the calling
+    AnyIO threadpool worker stays blocked for the whole bcrypt run, so a login
+    storm can still occupy every worker. The login/signup handlers stay sync
+    because their ORM queries use the sync session and must not run on the
+    event loop.
+    """
+    return _hash_pool.submit(fn, *args).result()
@@ -0,0 +1,81 @@
+"""Warm-up hook for cold starts.
+
+The app import is kept lean: engines are created on the first request and
+SQLAlchemy configures the mappers on the first query. ``warm_up()`` does
+that work ahead of time so the first request does not pay for it.
+
+Where it runs:
+
+- uvicorn and other servers that run the ASGI lifespan: main.py's lifespan
+  calls it (WARM_UP_ON_STARTUP) before the worker accepts requests.
+- Serverless bundles: the import, mapper and engine steps only help the
+  process they run in, so running them at build time does nothing for a fresh
+  instance. What does carry over is bytecode; a read-only bundle cannot write
+  it at runtime and recompiles routes/ on every cold start. Run
+
+      python warmup.py --compile
+
+  in the build that packages the bundle. ``--connect`` additionally opens
+  (and returns to the pool) one sync connection.
+"""
+import argparse
+import compileall
+import json
+import os
+import re
+import time
+
+ROUTES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def compile_bytecode() -> bool:
+    return compileall.compile_dir(ROUTES_DIR, quiet=1, rx=re.compile(r"[/\\](venv|\.venv|node_modules)[/\\]"))
+
+
+def warm_up(connect: bool = False, bytecode: bool = False) -> dict:
+    """Run each warm-up step and return how long it took, in milliseconds."""
+    timings = {}
+
+    def step(name, fn):
+        start = time.perf_counter()
+        fn()
+        timings[name] = round((time.perf_counter() - start) * 1000, 3)
+
+    if bytecode:
+        step("compile", compile_bytecode)
+
+    def import_app():
+        import main  # noqa: F401
+
+    def configure_mappers():
+        from sqlalchemy.orm import configure_mappers
+        configure_mappers()
+
+    def create_engines():
+        import db_config
+        db_config._get_engine()
+        db_config._get_async_engine()
+
+    def open_connection():
+        import db_config
+        with db_config._get_engine().connect():
+            pass
+
+    step("import", import_app)
+    step("mappers", configure_mappers)
+    step("engines", create_engines)
+    if connect:
+        step("connect", open_connection)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm up the API ahead of the first request.")
+    parser.add_argument("--compile", action="store_true", help="write bytecode for routes/")
+    parser.add_argument("--connect", action="store_true", help="open one database connection")
+    args = parser.parse_args(argv)
+    print(json.dumps(warm_up(connect=args.connect, bytecode=args.compile)))
+
+
+if __name__ == "__main__":
+    main()
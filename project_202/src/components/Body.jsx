@@ -86,6 +86,7 @@ const Body = () => {
   const [error, setError] = useState(null);
   const [isZipCode, setIsZipCode] = useState(false);
   const [apiResults, setApiResults] = useState([]);
+  const [searchMatches, setSearchMatches] = useState(null);
   const [filters, setFilters] = useState({
     is_open: false,
     price_range: '',
@@ -188,29 +189,9 @@ const Body = () => {
           fetchGooglePlaces();
       } else {
         setApiResults([]);
-        filtered = filtered.filter((restaurant) => {
-          const searchTermLower = searchTerm.toLowerCase();
-          const nameMatch = restaurant.name.toLowerCase().includes(searchTermLower);
-          const addressMatch = restaurant.address.toLowerCase().includes(searchTermLower);
-          const descriptionMatch = restaurant.description.toLowerCase().includes(searchTermLower);
-
-          let menuMatch = false;
-          if (restaurant.menu) {
-            try {
-              const menuItems = JSON.parse(restaurant.menu);
-              menuMatch = menuItems.some(category => 
-                category.items.some(item => 
-                  item.name.toLowerCase().includes(searchTermLower) ||
-                  item.description.toLowerCase().includes(searchTermLower)
-                )
-              );
-            } catch (error) {
-              console.error("Error parsing menu:", error);
-            }
-          }
-
-          return nameMatch || addressMatch || descriptionMatch || menuMatch;
-        });
+        // Text search runs server-side; keep only the rids it matched.
+        const matched = new Set(searchMatches || []);
+        filtered = filtered.filter((restaurant) => matched.has(restaurant.rid));
       }
     }
   
@@ -229,7 +210,7 @@ const Body = () => {
     // Price range filter
     if (filters.price_range) {
       filtered = filtered.filter(restaurant => {
-        const calculatedPrice = getPriceRange(restaurant.menu);
+        const calculatedPrice = restaurant.price_range || getPriceRange(restaurant.menu);
         return calculatedPrice === filters.price_range;
       });
     }
@@ -247,7 +228,33 @@ const Body = () => {
     }
   
     setFilteredRestaurants(filtered);
-  }, [searchTerm, filters, restaurants]);
+  }, [searchTerm, filters, restaurants, searchMatches]);
+
+  useEffect(() => {
+    if (!searchTerm || /^\d{5}$/.test(searchTerm)) {
+      setSearchMatches(null);
+      return undefined;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const response = await fetch(
+          apiUrl(`/restaurants/search?q=${encodeURIComponent(searchTerm)}&limit=100`),
+          { signal: controller.signal }
+        );
+        const data = await response.json();
+        setSearchMatches((data.results || []).map((result) => result.rid));
+      } catch (error) {
+        if (error.name !== 'AbortError') {
+          console.error('Error searching restaurants:', error);
+        }
+      }
+    }, 200);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [searchTerm]);
 
   useEffect(() => {
     const q = searchParams.get('q') || '';
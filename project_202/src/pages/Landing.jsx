@@ -49,7 +49,8 @@ const Landing = () => {
   const [topRestaurants, setTopRestaurants] = useState([]);
 
   useEffect(() => {
-    fetch(apiUrl('/restaurants'), { headers: { Accept: 'application/json' } })
+    const listFields = 'name,address,overall_rating,price_range,status,opentime,closetime';
+    fetch(apiUrl(`/restaurants?sort=rating&limit=3&fields=${listFields}`), { headers: { Accept: 'application/json' } })
       .then(r => r.json())
       .then(data => {
         const sorted = [...(data.restaurants || [])]
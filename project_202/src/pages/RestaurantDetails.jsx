@@ -8,6 +8,7 @@ const RestaurantDetails = () => {
   const [restaurant, setRestaurant] = useState(null);
   const [menu, setMenu] = useState(null);
   const [reviews, setReviews] = useState([]);
+  const [reviewsCursor, setReviewsCursor] = useState(null);
   const [rating, setRating] = useState(0);
   const [isLoading, setIsLoading] = useState(true);
 
@@ -41,22 +42,18 @@ const RestaurantDetails = () => {
   useEffect(() => {
     const fetchRestaurantData = async () => {
       try {
-        // Fetch basic restaurant details
-        const restaurantResponse = await fetch(apiUrl(`/restaurants/${rid}`));
-        const restaurantData = await restaurantResponse.json();
-        setRating(restaurantData.overall_rating || 0);
-        setRestaurant(restaurantData);
-
-        // Fetch menu
-        const menuResponse = await fetch(apiUrl(`/restaurants/${rid}/menu`));
-        const menuData = await menuResponse.json();
-        console.log('Menu data:', menuData);
-        setMenu(menuData);
-
-        // Fetch reviews
-        const reviewsResponse = await fetch(apiUrl(`/restaurants/${rid}/reviews`));
-        const reviewsData = await reviewsResponse.json();
-        setReviews(reviewsData);
+        // Details, photos, menu and the newest reviews in one round trip
+        const pageResponse = await fetch(apiUrl(`/restaurants/${rid}/page`));
+        if (!pageResponse.ok) {
+          setIsLoading(false);
+          return;
+        }
+        const pageData = await pageResponse.json();
+        setRating(pageData.restaurant.overall_rating || 0);
+        setRestaurant({ ...pageData.restaurant, cuisines: pageData.cuisines });
+        setMenu(pageData.menu);
+        setReviews(pageData.reviews);
+        setReviewsCursor(pageData.reviews_next_cursor);
 
         setIsLoading(false);
       } catch (error) {
@@ -68,6 +65,17 @@ const RestaurantDetails = () => {
     fetchRestaurantData();
   }, [rid]);
 
+  const loadMoreReviews = async () => {
+    try {
+      const response = await fetch(apiUrl(`/restaurants/${rid}/reviews?cursor=${reviewsCursor}`));
+      const data = await response.json();
+      setReviews((current) => [...current, ...data.reviews]);
+      setReviewsCursor(data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching reviews:', error);
+    }
+  };
+
   if (isLoading) return <div className="rf-page pt-8">Loading...</div>;
   if (!restaurant) return <div className="rf-page pt-8">Restaurant not found</div>;
 
@@ -146,6 +154,9 @@ const RestaurantDetails = () => {
         ) : (
             <NoReviews>No reviews yet</NoReviews>
         )}
+        {reviewsCursor && (
+            <SubmitButton type="button" onClick={loadMoreReviews}>More reviews</SubmitButton>
+        )}
         </ReviewsSection>
     </DetailContainer>
   );
@@ -22,34 +22,73 @@ os.environ.setdefault("SECRET_KEY", "test-secret-key-for-ci-1234567890")
 os.environ.setdefault("MAPS_KEY", "test-maps-key")
 os.environ.setdefault("ALGORITHM", "HS256")
 os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Fail a test when a route goes over its query budget or issues N+1 statements
+os.environ.setdefault("QUERY_BUDGET_MODE", "raise")
 
 import pytest
+import tempfile
+from contextlib import contextmanager
 from datetime import datetime
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
-from db_config import get_db
+from db_config import get_async_db, get_db
 from main import app
 from models import Base, User
 import utils
 import oauth2
+from search_index import restaurant_index
+from geo_index import restaurant_geo_index
+import response_cache
 
-TEST_DATABASE_URL = "sqlite://"
+# A database file rather than sqlite:// so the sync and the async (aiosqlite)
+# engines see the same data; WAL lets async reads run beside an open sync write.
+TEST_DATABASE_PATH = f"{tempfile.mkdtemp(prefix='restaurant-finder-tests-')}/test.db"
 
 engine = create_engine(
-    TEST_DATABASE_URL,
+    f"sqlite:///{TEST_DATABASE_PATH}",
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+with engine.connect() as conn:
+    conn.exec_driver_sql("PRAGMA journal_mode=WAL")
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DATABASE_PATH}", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+@contextmanager
+def recorded_statements():
+    """Collect (statement, parameters) for every query either engine runs inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters[0] if executemany else parameters))
+
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", record)
+
 
 @pytest.fixture(scope="function")
 def db_session():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    restaurant_index.clear()
+    restaurant_geo_index.clear()
+    oauth2.principal_cache.clear()
+    oauth2.token_cache.clear()
+    response_cache.clear()
 
     db = TestingSessionLocal()
     try:
@@ -66,7 +105,12 @@ def client(db_session):
         finally:
             pass
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
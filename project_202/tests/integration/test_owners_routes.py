@@ -0,0 +1,222 @@
+import models
+from conftest import make_user, auth_headers
+
+
+def _add(db_session, name, zip_code="78701"):
+    restaurant = models.Restaurant(name=name, address="1 Main St", zip_code=zip_code)
+    db_session.add(restaurant)
+    db_session.commit()
+    return restaurant.rid
+
+
+def test_duplicates_report_is_admin_only(client, db_session):
+    user = make_user(db_session)
+
+    response = client.get("/owner/duplicates", headers=auth_headers(user))
+
+    assert response.status_code == 403
+
+
+def test_duplicates_report_is_a_dry_run(client, db_session):
+    admin = make_user(db_session, email="admin@example.com", username="admin", user_type="admin")
+    keep = _add(db_session, "Noodle Bar")
+    duplicate = _add(db_session, "Noodle Bar")
+
+    response = client.get("/owner/duplicates", headers=auth_headers(admin))
+
+    assert response.status_code == 200
+    assert response.json()["clusters"] == [{"keep": keep, "remove": [duplicate], "score": 1.0}]
+    assert db_session.query(models.Restaurant).count() == 2
+
+
+def test_remove_duplicates_deletes_exact_and_fuzzy_duplicates(client, db_session):
+    admin = make_user(db_session, email="admin@example.com", username="admin", user_type="admin")
+    keep = _add(db_session, "Joe's Pizza")
+    _add(db_session, "Joe's Pizza")
+    _add(db_session, "Joes Pizza")
+    other = _add(db_session, "Taco Stand")
+
+    exact_only = client.delete("/owner/remove-duplicates", headers=auth_headers(admin))
+    assert exact_only.json()["removed"] == 1
+
+    fuzzy = client.delete("/owner/remove-duplicates", params={"fuzzy": "true"}, headers=auth_headers(admin))
+    assert fuzzy.status_code == 200
+    assert fuzzy.json()["removed"] == 1
+
+    remaining = sorted(rid for (rid,) in db_session.query(models.Restaurant.rid).all())
+    assert remaining == [keep, other]
+
+
+def test_remove_duplicates_purges_the_deleted_listings_owner_keys(client, db_session, monkeypatch):
+    import http_cache
+
+    admin = make_user(db_session, email="admin@example.com", username="admin", user_type="admin")
+    owner = make_user(db_session, email="owner@example.com", username="owner", user_type="owner")
+    keep = _add(db_session, "Noodle Bar")
+    duplicate = models.Restaurant(name="Noodle Bar", address="1 Main St", zip_code="78701", owner_id=owner.uid)
+    db_session.add(duplicate)
+    db_session.commit()
+    duplicate_rid = duplicate.rid
+    purged = []
+    monkeypatch.setattr(http_cache, "_purge_handlers", [purged.append])
+
+    response = client.delete("/owner/remove-duplicates", headers=auth_headers(admin))
+
+    assert response.json()["removed"] == 1
+    assert set(purged[-1]) == {f"restaurant-{duplicate_rid}", f"owner-{owner.uid}", http_cache.LIST_KEY}
+    assert f"restaurant-{keep}" not in purged[-1]
+
+
+def test_import_endpoint_streams_an_ndjson_upload(client, db_session):
+    admin = make_user(db_session, email="admin@example.com", username="admin", user_type="admin")
+    rows = [
+        {"name": f"Imported {i}", "address": f"{i} Main St", "zip": 78701, "phone": 5125550100,
+         "opentime": "09:00", "closetime": "21:00", "description": "Bulk", "menu": "[]"}
+        for i in range(3)
+    ]
+    body = "\n".join(__import__("json").dumps(row) for row in rows)
+
+    response = client.post(
+        "/owner/import/restaurants",
+        files={"file": ("listings.ndjson", body, "application/x-ndjson")},
+        headers=auth_headers(admin),
+    )
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 3
+    assert db_session.query(models.Restaurant).count() == 3
+
+
+def test_import_endpoint_is_admin_only(client, db_session):
+    owner = make_user(db_session, email="owner@example.com", username="owner", user_type="owner")
+
+    response = client.post(
+        "/owner/import/restaurants",
+        files={"file": ("listings.csv", "name\n", "text/csv")},
+        headers=auth_headers(owner),
+    )
+
+    assert response.status_code == 403
+
+
+def _listing(name, menu, zip_code=78701):
+    return {
+        "name": name, "address": f"{name} St", "zip": zip_code, "phone": 5125550100,
+        "opentime": "09:00", "closetime": "21:00", "description": name, "menu": menu,
+    }
+
+
+def test_owner_listing_writes_normalized_menu_and_price_filters(client, db_session):
+    import json
+
+    owner = make_user(db_session, email="owner@example.com", username="owner", user_type="owner")
+    headers = auth_headers(owner)
+    cheap = json.dumps([{"category": "Snacks", "items": [{"name": "Taco", "price": 3}, {"name": "Elote", "price": 5}]}])
+    pricey = json.dumps([{"category": "Dinner", "items": [{"name": "Wagyu", "price": 80}, {"name": "Salad", "price": 12}]}])
+
+    created = client.post("/owner/add-listing", json=_listing("Cheap Eats", cheap), headers=headers)
+    client.post("/owner/add-listing", json=_listing("Fine Dining", pricey), headers=headers)
+    assert created.status_code == 200
+
+    listings = {l["name"]: l["rid"] for l in client.get("/owner/view-listings", headers=headers).json()}
+    menu = client.get(f"/restaurants/{listings['Cheap Eats']}/menu").json()
+    assert menu == [{"category": "Snacks", "items": [
+        {"name": "Taco", "description": None, "price": 3.0},
+        {"name": "Elote", "description": None, "price": 5.0},
+    ]}]
+
+    by_band = client.get("/restaurants", params={"price_band": "$$$", "fields": "name"}).json()["restaurants"]
+    under_15 = client.get("/restaurants", params={"max_dish_price": 15, "fields": "name,min_price"}).json()["restaurants"]
+    under_4 = client.get("/restaurants", params={"max_dish_price": 4, "fields": "name"}).json()["restaurants"]
+    assert [r["name"] for r in by_band] == ["Fine Dining"]
+    assert sorted(r["name"] for r in under_15) == ["Cheap Eats", "Fine Dining"]
+    assert [r["name"] for r in under_4] == ["Cheap Eats"]
+
+    updated = client.put(
+        f"/owner/update-listing/{listings['Fine Dining']}",
+        json={"menu": json.dumps([{"category": "Lunch", "items": [{"name": "Soup", "price": 4}]}])},
+        headers=headers,
+    )
+    assert updated.json()["price"] == "$"
+    assert client.get(f"/restaurants/{listings['Fine Dining']}/menu").json()[0]["items"][0]["name"] == "Soup"
+
+
+def test_owner_writes_purge_surrogate_keys(client, db_session, monkeypatch):
+    import http_cache
+
+    purged = []
+    monkeypatch.setattr(http_cache, "_purge_handlers", [purged.append])
+    owner = make_user(db_session, email="owner@example.com", username="owner", user_type="owner")
+    headers = auth_headers(owner)
+
+    client.post("/owner/add-listing", json=_listing("Purge Cafe", "[]"), headers=headers)
+    rid = client.get("/owner/view-listings", headers=headers).json()[0]["rid"]
+    client.put(f"/owner/update-listing/{rid}", json={"description": "new"}, headers=headers)
+    client.delete(f"/owner/delete-listing/{rid}", headers=headers)
+
+    expected = (f"restaurant-{rid}", "list", f"owner-{owner.uid}")
+    assert purged == [expected, expected, expected]
+
+
+def test_pool_stats_is_admin_only(client, db_session):
+    admin = make_user(db_session, email="admin@example.com", username="admin", user_type="admin")
+
+    assert client.get("/owner/pool-stats", headers=auth_headers(make_user(db_session))).status_code == 403
+    response = client.get("/owner/pool-stats", headers=auth_headers(admin))
+    assert response.status_code == 200
+    assert isinstance(response.json(), dict)
+
+
+def test_admin_can_profile_a_request_on_demand(client, db_session):
+    import profiling
+
+    profiling.profiles.clear()
+    admin = make_user(db_session, email="admin@example.com", username="admin", user_type="admin")
+
+    response = client.get("/restaurants", headers={**auth_headers(admin), "X-Profile": "1"})
+
+    profile_id = response.headers["x-profile-id"]
+    listed = client.get("/owner/profiles", headers=auth_headers(admin)).json()
+    assert listed[0]["id"] == profile_id
+    assert listed[0]["trigger"] == "on-demand"
+    assert listed[0]["route"] == "/restaurants"
+    assert "stacks" not in listed[0]
+    stacks = client.get(f"/owner/profiles/{profile_id}", headers=auth_headers(admin))
+    assert stacks.status_code == 200
+    assert stacks.headers["content-type"].startswith("text/plain")
+
+
+def test_profile_flag_is_ignored_for_non_admins(client, db_session):
+    import profiling
+
+    profiling.profiles.clear()
+    owner = make_user(db_session, email="owner@example.com", username="owner", user_type="owner")
+
+    response = client.get("/restaurants?profile=1", headers=auth_headers(owner))
+
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert len(profiling.profiles) == 0
+
+
+def test_sampled_profiles_are_kept_in_a_ring_buffer(client, db_session, monkeypatch):
+    import profiling
+    from collections import deque
+    from config import settings
+
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_EVERY", 1)
+    monkeypatch.setattr(profiling, "profiles", deque(maxlen=2))
+
+    for _ in range(3):
+        assert "x-profile-id" not in client.get("/restaurants").headers
+
+    assert [profile["trigger"] for profile in profiling.profiles] == ["sampled", "sampled"]
+
+
+def test_profile_endpoints_are_admin_only(client, db_session):
+    headers = auth_headers(make_user(db_session))
+
+    assert client.get("/owner/profiles", headers=headers).status_code == 403
+    assert client.get("/owner/profiles/abc", headers=headers).status_code == 403
+    admin = make_user(db_session, email="admin@example.com", username="admin", user_type="admin")
+    assert client.get("/owner/profiles/missing", headers=auth_headers(admin)).status_code == 404
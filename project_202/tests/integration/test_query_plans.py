@@ -0,0 +1,110 @@
+"""EXPLAIN QUERY PLAN every query a route runs and fail on unexpected full table scans.
+
+Each case lists the tables the route may scan on purpose (an unfiltered,
+paginated walk of the primary key); any other "SCAN <table>" step means a hot
+query lost its index. Routes are also expected to be index-ordered: a "USE
+TEMP B-TREE FOR ORDER BY" step sorts every matching row per request and fails
+the case unless it lists "ORDER BY".
+"""
+import json
+import re
+from datetime import datetime
+
+import pytest
+import models
+from conftest import engine, make_user, auth_headers, recorded_statements
+from search_index import restaurant_index
+from geo_index import restaurant_geo_index
+
+MENU = json.dumps([{"category": "Lunch", "items": [{"name": "Wrap", "price": 11}, {"name": "Soup", "price": 6}]}])
+SCAN = re.compile(r"^SCAN (\w+)")
+TEMP_SORT = re.compile(r"^USE TEMP B-TREE FOR (RIGHT PART OF )?ORDER BY")
+
+
+@pytest.fixture
+def seeded(client, db_session):
+    owner = make_user(db_session, email="owner@example.com", username="owner", user_type="owner")
+    user = make_user(db_session)
+    for i in range(30):
+        client.post("/owner/add-listing", headers=auth_headers(owner), json={
+            "name": f"Kitchen {i}", "address": f"{i} Main St", "zip": 78701 + i % 3, "phone": 5125550100,
+            "opentime": "09:00", "closetime": "21:00", "description": "Tacos and soup", "menu": MENU,
+            "latitude": 30.26 + i / 100, "longitude": -97.74,
+        })
+    rid = db_session.query(models.Restaurant.rid).filter(models.Restaurant.owner_id == owner.uid).first().rid
+    db_session.add_all([
+        models.Photo(url="http://img/1.jpg", rid=rid),
+        models.Cuisine(name="Tex-Mex", rid=rid),
+        *(models.Review(rid=rid, uid=user.uid, rating=1 + i % 5, created=datetime(2024, 1, 1 + i)) for i in range(20)),
+    ])
+    db_session.commit()
+    # build the in-process indexes outside the measured requests
+    restaurant_index.ensure_loaded(db_session)
+    restaurant_geo_index.ensure_loaded(db_session)
+    return {"rid": rid, "owner": owner, "user": user, "uid": user.uid}
+
+
+def _capture(client, method, path, **kwargs):
+    with recorded_statements() as statements:
+        response = client.request(method, path, **kwargs)
+    assert response.status_code < 400, response.text
+    return statements
+
+
+def _full_scans(statements):
+    scans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, tuple(parameters or ())).all()
+            for row in plan:
+                match = SCAN.match(row[3])
+                if match:
+                    scans.append((match.group(1), " ".join(statement.split())[:120]))
+                elif TEMP_SORT.match(row[3]):
+                    scans.append(("ORDER BY", " ".join(statement.split())[:120]))
+    return scans
+
+
+ROUTES = [
+    # (method, path template, request kwargs, tables that may be scanned)
+    ("GET", "/restaurants?limit=20", {}, {"restaurant"}),
+    # sorts on coalesce(overall_rating, 0), which no index covers
+    ("GET", "/restaurants?limit=20&sort=rating", {}, {"restaurant", "ORDER BY"}),
+    ("GET", "/restaurants?limit=20&max_dish_price=8", {}, {"restaurant"}),
+    ("GET", "/restaurants?price_band=$$", {}, set()),
+    ("GET", "/restaurants/search?q=tacos", {}, set()),
+    ("GET", "/restaurants/nearby?lat=30.3&lng=-97.74", {}, set()),
+    ("GET", "/restaurants/{rid}", {}, set()),
+    ("GET", "/restaurants/{rid}/menu", {}, set()),
+    ("GET", "/restaurants/{rid}/page", {}, set()),
+    ("GET", "/restaurants/{rid}/reviews?limit=5", {}, set()),
+    ("GET", "/restaurants/{rid}/reviews?limit=5&sort=highest", {}, set()),
+    ("GET", "/restaurants/{rid}/reviews?limit=5&sort=lowest", {}, set()),
+    ("GET", "/restaurants/{rid}/rating", {}, set()),
+    ("GET", "/users/", {}, {"user"}),
+    ("GET", "/users/{uid}", {}, set()),
+    ("GET", "/users/{uid}/reviews?limit=5", {}, set()),
+    ("GET", "/owner/view-listings", {"as": "owner"}, set()),
+    ("POST", "/owner/add-listing", {"as": "owner", "json": {
+        "name": "New Place", "address": "9 Elm St", "zip": 78701, "phone": 5125550100,
+        "opentime": "09:00", "closetime": "21:00", "description": "", "menu": MENU,
+    }}, set()),
+    ("PUT", "/owner/update-listing/{rid}", {"as": "owner", "json": {"description": "Updated", "menu": MENU}}, set()),
+    ("DELETE", "/owner/delete-listing/{rid}", {"as": "owner"}, set()),
+    ("POST", "/restaurants/{rid}/create_review", {"as": "user", "json": {"rating": 4}}, set()),
+    ("POST", "/auth/login", {"data": {"username": "test@example.com", "password": "TestPass123"}}, set()),
+]
+
+
+@pytest.mark.parametrize("method, path, kwargs, allowed", ROUTES, ids=[f"{m} {p}" for m, p, _, _ in ROUTES])
+def test_route_queries_use_indexes(client, seeded, method, path, kwargs, allowed):
+    kwargs = dict(kwargs)
+    if "as" in kwargs:
+        kwargs["headers"] = auth_headers(seeded[kwargs.pop("as")])
+    statements = _capture(client, method, path.format(**seeded), **kwargs)
+
+    scans = [(table, sql) for table, sql in _full_scans(statements) if table not in allowed]
+
+    assert scans == []
@@ -1,3 +1,7 @@
+from datetime import datetime
+
+import pytest
+
 from conftest import make_user, auth_headers
 
 
@@ -84,7 +88,7 @@ def test_get_reviews_returns_empty_list_when_no_reviews(client, db_session):
     response = client.get(f"/restaurants/{restaurant.rid}/reviews")
 
     assert response.status_code == 200
-    assert response.json() == []
+    assert response.json() == {"reviews": [], "next_cursor": None}
 
 
 def test_create_review_requires_authentication(client, db_session):
@@ -131,3 +135,426 @@ def test_owner_cannot_create_review(client, db_session):
     )
 
     assert response.status_code == 403
+
+
+def test_get_all_restaurants_paginates_with_keyset_cursor(client, db_session):
+    created = [_create_restaurant(db_session, menu="[]") for _ in range(5)]
+
+    first = client.get("/restaurants", params={"limit": 2})
+    assert first.status_code == 200
+    first_body = first.json()
+    assert [r["rid"] for r in first_body["restaurants"]] == [r.rid for r in created[:2]]
+    assert first_body["next_cursor"]
+
+    seen = [r["rid"] for r in first_body["restaurants"]]
+    cursor = first_body["next_cursor"]
+    while cursor:
+        page = client.get("/restaurants", params={"limit": 2, "cursor": cursor}).json()
+        seen.extend(r["rid"] for r in page["restaurants"])
+        cursor = page["next_cursor"]
+
+    assert seen == [r.rid for r in created]
+
+
+def test_get_all_restaurants_projects_requested_fields(client, db_session):
+    _create_restaurant(db_session, menu='[{"items": []}]')
+
+    response = client.get("/restaurants", params={"fields": "name,city"})
+
+    assert response.status_code == 200
+    row = response.json()["restaurants"][0]
+    assert set(row) == {"rid", "name", "city"}
+
+
+def test_get_all_restaurants_sorts_by_rating_across_pages(client, db_session):
+    for rating in (3.0, 5.0, 4.0):
+        restaurant = _create_restaurant(db_session, menu="[]")
+        restaurant.overall_rating = rating
+    db_session.commit()
+
+    first = client.get("/restaurants", params={"sort": "rating", "limit": 2, "fields": "overall_rating"}).json()
+    second = client.get(
+        "/restaurants",
+        params={"sort": "rating", "limit": 2, "fields": "overall_rating", "cursor": first["next_cursor"]},
+    ).json()
+
+    ratings = [r["overall_rating"] for r in first["restaurants"] + second["restaurants"]]
+    assert ratings == [5.0, 4.0, 3.0]
+    assert second["next_cursor"] is None
+
+
+def test_get_all_restaurants_rejects_unknown_field_and_bad_cursor(client):
+    assert client.get("/restaurants", params={"fields": "secret"}).status_code == 400
+    assert client.get("/restaurants", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_search_restaurants_returns_ranked_results(client, db_session):
+    menu = '[{"category": "Mains", "items": [{"name": "Margherita Pizza", "description": "Basil", "price": 14}]}]'
+    pizza = _create_restaurant(db_session, menu=menu)
+    _create_restaurant(db_session, menu="[]")
+
+    response = client.get("/restaurants/search", params={"q": "pizza"})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["rid"] for r in results] == [pizza.rid]
+    assert results[0]["name"] == "Test Kitchen"
+    assert results[0]["score"] > 0
+
+
+def test_search_index_picks_up_new_owner_listing(client, db_session):
+    owner = make_user(db_session, email="owner@example.com", username="owneruser", user_type="owner")
+    assert client.get("/restaurants/search", params={"q": "dumpling"}).json() == {"results": []}
+
+    response = client.post(
+        "/owner/add-listing",
+        json={
+            "name": "Dumpling Palace",
+            "address": "9 Elm St",
+            "zip": 78702,
+            "phone": 5125550100,
+            "opentime": "09:00",
+            "closetime": "21:00",
+            "description": "Hand-made dumplings",
+            "menu": '[{"category": "Steamed", "items": [{"name": "Pork Bao", "price": 8}]}]',
+        },
+        headers=auth_headers(owner),
+    )
+    assert response.status_code == 200
+    assert response.json()["price"] == "$"
+
+    results = client.get("/restaurants/search", params={"q": "dumpling"}).json()["results"]
+    assert [r["name"] for r in results] == ["Dumpling Palace"]
+
+
+def test_nearby_restaurants_returns_closest_first(client, db_session):
+    near = _create_restaurant(db_session, menu="[]")
+    far = _create_restaurant(db_session, menu="[]")
+    near.latitude, near.longitude = 30.2672, -97.7431
+    far.latitude, far.longitude = 30.2849, -97.7341
+    db_session.commit()
+
+    response = client.get("/restaurants/nearby", params={"lat": 30.2670, "lng": -97.7430, "radius_km": 5})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["rid"] for r in results] == [near.rid, far.rid]
+    assert results[0]["distance_km"] < results[1]["distance_km"]
+
+    tight = client.get("/restaurants/nearby", params={"lat": 30.2670, "lng": -97.7430, "radius_km": 0.5})
+    assert [r["rid"] for r in tight.json()["results"]] == [near.rid]
+
+
+def test_nearby_restaurants_validates_coordinates(client):
+    response = client.get("/restaurants/nearby", params={"lat": 120, "lng": 0})
+
+    assert response.status_code == 422
+
+
+def test_create_review_keeps_rating_aggregate_in_step(client, db_session):
+    restaurant = _create_restaurant(db_session, menu="[]")
+    headers = auth_headers(make_user(db_session))
+
+    for rating in (5, 4, 4):
+        response = client.post(
+            f"/restaurants/{restaurant.rid}/create_review",
+            json={"rating": rating},
+            headers=headers,
+        )
+        assert response.status_code == 200
+
+    db_session.refresh(restaurant)
+    assert restaurant.review_count == 3
+    assert restaurant.overall_rating == 4.3
+    assert client.get(f"/restaurants/{restaurant.rid}/rating").json() == 13 / 3
+
+
+def test_google_places_proxy_serves_repeat_lookups_from_cache(client, monkeypatch):
+    import httpx
+    import places_client as places_module
+
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"status": "OK", "results": [{"name": "Taqueria"}]})
+
+    stand_in = places_module.PlacesClient(
+        base_url="http://places.test",
+        api_key="test-key",
+        transport=httpx.MockTransport(handler),
+    )
+    monkeypatch.setattr("routers.restaurants.places_client", stand_in)
+
+    first = client.get("/restaurants/google-places/78701")
+    second = client.get("/restaurants/google-places/78701")
+
+    assert first.status_code == 200
+    assert second.json() == first.json() == {"status": "OK", "results": [{"name": "Taqueria"}]}
+    assert len(calls) == 1
+
+
+def test_google_places_proxy_reports_a_non_json_upstream_body(client, monkeypatch):
+    import httpx
+    import places_client as places_module
+
+    stand_in = places_module.PlacesClient(
+        base_url="http://places.test",
+        api_key="test-key",
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, text="<html>Bad Gateway</html>")),
+    )
+    monkeypatch.setattr("routers.restaurants.places_client", stand_in)
+
+    response = client.get("/restaurants/google-places/78701")
+
+    assert response.status_code == 500
+    assert "detail" in response.json()
+    assert stand_in.cache.get(78701) is None
+
+
+def test_restaurant_detail_and_menu_honor_if_none_match(client, db_session):
+    restaurant = _create_restaurant(db_session, menu='[{"category": "Lunch", "items": []}]')
+
+    for path in (f"/restaurants/{restaurant.rid}", f"/restaurants/{restaurant.rid}/menu"):
+        first = client.get(path)
+        etag = first.headers["etag"]
+        assert first.status_code == 200 and etag.startswith('"')
+
+        revalidated = client.get(path, headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == etag
+        assert revalidated.content == b""
+
+        assert client.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_restaurant_detail_is_served_from_encoded_cache_until_invalidated(client, db_session):
+    import models
+    import response_cache
+
+    restaurant = _create_restaurant(db_session, menu="[]")
+    first = client.get(f"/restaurants/{restaurant.rid}")
+    cached = response_cache.encoded_responses.get(("detail", restaurant.rid))
+    assert client.get(f"/restaurants/{restaurant.rid}").headers["etag"] == first.headers["etag"]
+    assert response_cache.encoded_responses.get(("detail", restaurant.rid)) is cached
+
+    # A write in the same second as the last one, with no purge in this process (as
+    # when another worker handled it), still moves the version on
+    db_session.query(models.Restaurant).filter(models.Restaurant.rid == restaurant.rid).update(
+        {"name": "Renamed", "updated": restaurant.updated}, synchronize_session=False
+    )
+    db_session.commit()
+    second = client.get(f"/restaurants/{restaurant.rid}")
+    assert second.json()["name"] == "Renamed"
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_create_review_invalidates_cached_detail(client, db_session):
+    restaurant = _create_restaurant(db_session, menu="[]")
+    assert client.get(f"/restaurants/{restaurant.rid}").json()["overall_rating"] == 0
+
+    client.post(
+        f"/restaurants/{restaurant.rid}/create_review",
+        json={"rating": 5},
+        headers=auth_headers(make_user(db_session)),
+    )
+
+    assert client.get(f"/restaurants/{restaurant.rid}").json()["overall_rating"] == 5.0
+
+
+
+def test_public_reads_carry_cache_policy_and_surrogate_keys(client, db_session):
+    restaurant = _create_restaurant(db_session, menu="[]")
+
+    detail = client.get(f"/restaurants/{restaurant.rid}")
+    listing = client.get("/restaurants")
+
+    assert detail.headers["cache-control"].startswith("public, max-age=0, s-maxage=600")
+    assert detail.headers["surrogate-key"].split() == [f"restaurant-{restaurant.rid}"]
+    assert detail.headers["last-modified"].endswith(" GMT")
+    assert listing.headers["surrogate-key"] == "list"
+    assert "last-modified" not in listing.headers
+
+    # authenticated responses must not be stored by a shared cache
+    authed = client.get(f"/restaurants/{restaurant.rid}", headers=auth_headers(make_user(db_session)))
+    assert authed.headers["cache-control"] == "private, no-cache"
+    assert "surrogate-key" not in authed.headers
+
+
+def test_restaurant_detail_honors_if_modified_since(client, db_session):
+    restaurant = _create_restaurant(db_session, menu="[]")
+    last_modified = client.get(f"/restaurants/{restaurant.rid}").headers["last-modified"]
+
+    revalidated = client.get(f"/restaurants/{restaurant.rid}", headers={"If-Modified-Since": last_modified})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    stale = client.get(
+        f"/restaurants/{restaurant.rid}",
+        headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"},
+    )
+    assert stale.status_code == 200
+
+
+def test_large_restaurant_list_is_gzipped(client, db_session):
+    for i in range(20):
+        _create_restaurant(db_session, menu='[{"category": "Lunch", "items": [{"name": "Wrap", "price": 11}]}]' * 5)
+
+    compressed = client.get("/restaurants", headers={"Accept-Encoding": "gzip"})
+    plain = client.get("/restaurants", headers={"Accept-Encoding": "identity"})
+
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in compressed.headers["vary"].lower()
+    assert int(compressed.headers["content-length"]) < len(plain.content)
+    assert compressed.json() == plain.json()
+
+
+def test_restaurant_page_combines_detail_menu_and_reviews_in_fixed_queries(client, db_session):
+    import models
+    from conftest import recorded_statements
+
+    menu = '[{"category": "Lunch", "items": [{"name": "Wrap", "price": 11}]}]'
+    restaurant = _create_restaurant(db_session, menu=menu)
+    user = make_user(db_session)
+    db_session.add_all([
+        models.Photo(url="http://img/1.jpg", rid=restaurant.rid),
+        models.Cuisine(name="Tex-Mex", rid=restaurant.rid),
+        *(models.Review(rid=restaurant.rid, uid=user.uid, rating=4, comment=f"Visit {i}", created=datetime(2024, 1, 1 + i))
+          for i in range(12)),
+    ])
+    db_session.commit()
+    path = f"/restaurants/{restaurant.rid}/page"
+
+    with recorded_statements() as statements:
+        page = client.get(path)
+        cold = len(statements)
+        client.get(path)
+        warm = len(statements) - cold
+
+    body = page.json()
+    assert body["restaurant"]["name"] == "Test Kitchen"
+    assert body["restaurant"]["photos"][0]["url"] == "http://img/1.jpg"
+    assert body["cuisines"] == ["Tex-Mex"]
+    assert body["menu"][0]["items"][0]["name"] == "Wrap"
+    assert [r["comment"] for r in body["reviews"]][:2] == ["Visit 11", "Visit 10"]
+    assert len(body["reviews"]) == 10 and body["reviews"][0]["username"] == "testuser"
+    # version, detail, photos, cuisines, menu items, reviews; then only the version check
+    assert cold == 6, statements
+    assert warm == 1
+
+
+def _add_reviews(db_session, restaurant, user, ratings):
+    import models
+
+    for day, rating in enumerate(ratings, start=1):
+        db_session.add(models.Review(
+            rid=restaurant.rid, uid=user.uid, rating=rating, comment=f"day {day}", created=datetime(2024, 1, day),
+        ))
+    db_session.commit()
+
+
+def _all_pages(client, path, max_pages=50, **params):
+    comments, cursor = [], None
+    for _ in range(max_pages):
+        page = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        comments.extend(review["comment"] for review in page["reviews"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return comments
+    raise AssertionError(f"next_cursor still set after {max_pages} pages: {comments}")
+
+
+def test_get_reviews_pages_newest_first_with_keyset_cursor(client, db_session):
+    restaurant = _create_restaurant(db_session, menu="[]")
+    _add_reviews(db_session, restaurant, make_user(db_session), [3, 5, 1, 4, 5])
+    path = f"/restaurants/{restaurant.rid}/reviews"
+
+    first = client.get(path, params={"limit": 2}).json()
+
+    assert [r["comment"] for r in first["reviews"]] == ["day 5", "day 4"]
+    assert first["reviews"][0]["username"] == "testuser"
+    assert _all_pages(client, path, limit=2) == ["day 5", "day 4", "day 3", "day 2", "day 1"]
+    assert _all_pages(client, path, limit=2, sort="highest") == ["day 5", "day 2", "day 4", "day 1", "day 3"]
+    assert _all_pages(client, path, limit=2, sort="lowest") == ["day 3", "day 1", "day 4", "day 5", "day 2"]
+
+
+@pytest.mark.parametrize("sort", ["newest", "highest", "lowest"])
+def test_get_reviews_pages_over_server_default_timestamps(client, db_session, sort):
+    from sqlalchemy import text
+
+    restaurant = _create_restaurant(db_session, menu="[]")
+    user = make_user(db_session)
+    # created left to the column's server default (CURRENT_TIMESTAMP), as in rows written outside the app
+    for i in range(5):
+        db_session.execute(
+            text("INSERT INTO review (rid, uid, rating, comment) VALUES (:rid, :uid, 4, :comment)"),
+            {"rid": restaurant.rid, "uid": user.uid, "comment": f"raw {i}"},
+        )
+    db_session.commit()
+
+    comments = _all_pages(client, f"/restaurants/{restaurant.rid}/reviews", limit=2, sort=sort)
+
+    assert sorted(comments) == [f"raw {i}" for i in range(5)]
+    assert len(comments) == 5
+
+
+def test_get_reviews_rejects_a_cursor_from_another_sort(client, db_session):
+    restaurant = _create_restaurant(db_session, menu="[]")
+    _add_reviews(db_session, restaurant, make_user(db_session), [3, 5, 1])
+    path = f"/restaurants/{restaurant.rid}/reviews"
+    cursor = client.get(path, params={"limit": 1}).json()["next_cursor"]
+
+    assert client.get(path, params={"cursor": cursor, "sort": "highest"}).status_code == 400
+    assert client.get(path, params={"cursor": "garbage"}).status_code == 400
+
+
+def test_user_review_history_is_paginated(client, db_session):
+    first = _create_restaurant(db_session, menu="[]")
+    second = _create_restaurant(db_session, menu="[]")
+    user = make_user(db_session)
+    other = make_user(db_session, email="other@example.com", username="other")
+    _add_reviews(db_session, first, user, [4, 2])
+    _add_reviews(db_session, second, other, [5])
+
+    page = client.get(f"/users/{user.uid}/reviews", params={"limit": 1}).json()
+
+    assert page["reviews"][0]["comment"] == "day 2"
+    assert page["reviews"][0]["restaurant_name"] == "Test Kitchen"
+    assert _all_pages(client, f"/users/{user.uid}/reviews", limit=1) == ["day 2", "day 1"]
+
+
+def test_responses_carry_server_timing_with_query_count(client, db_session):
+    restaurant = _create_restaurant(db_session, menu='[{"items": []}]')
+
+    response = client.get(f"/restaurants/{restaurant.rid}/rating")
+
+    timing = response.headers["server-timing"]
+    assert 'db;dur=' in timing and 'desc="1 queries"' in timing
+    assert "app;dur=" in timing
+
+
+def test_route_over_its_query_budget_raises_in_tests(client, db_session, monkeypatch):
+    import query_stats
+
+    restaurant = _create_restaurant(db_session, menu='[{"items": []}]')
+    monkeypatch.setitem(query_stats.QUERY_BUDGETS, "/restaurants/{restaurant_id}/rating", 0)
+
+    with pytest.raises(query_stats.QueryBudgetExceeded, match="1 queries, budget 0"):
+        client.get(f"/restaurants/{restaurant.rid}/rating")
+
+
+def test_metrics_endpoint_reports_route_latency_in_prometheus_format(client, db_session):
+    restaurant = _create_restaurant(db_session, menu='[{"items": []}]')
+    client.get(f"/restaurants/{restaurant.rid}/rating")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/restaurants/{restaurant_id}/rating",status="200"}'
+        in response.text
+    )
+    assert "http_requests_in_flight 1" in response.text  # the scrape itself
+    assert 'cache_hits_total{cache="auth_token"}' in response.text
@@ -64,3 +64,108 @@ def test_login_fails_for_wrong_password(client):
 
     assert login_response.status_code == 403
     assert login_response.json()["detail"] == "Wrong credentials!"
+
+
+def _signup_and_login(client, email="refresh@example.com", username="refresher"):
+    payload = {"email": email, "password": "StrongPassword123", "username": username}
+    assert client.post("/users/create_users", json=payload).status_code == 201
+    response = client.post(
+        "/auth/login",
+        data={"username": email, "password": payload["password"]},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_refresh_token_issues_a_new_access_token(client):
+    login_body = _signup_and_login(client)
+
+    response = client.post("/auth/refresh", json={"refresh_token": login_body["refresh_token"]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["token_type"] == "bearer"
+    assert body["refresh_token"]
+
+    import oauth2
+    assert oauth2.verify_access_token(body["login_access_token"]).uid == login_body["user_info"]["uid"]
+
+
+def test_tokens_cannot_be_used_in_place_of_each_other(client):
+    login_body = _signup_and_login(client)
+
+    as_refresh = client.post("/auth/refresh", json={"refresh_token": login_body["login_access_token"]})
+    as_bearer = client.post(
+        "/restaurants/1/create_review",
+        json={"rating": 5},
+        headers={"Authorization": f"Bearer {login_body['refresh_token']}"},
+    )
+
+    assert as_refresh.status_code == 401
+    assert as_bearer.status_code == 401
+
+
+def test_logout_revokes_refresh_tokens(client):
+    login_body = _signup_and_login(client)
+    headers = {"Authorization": f"Bearer {login_body['login_access_token']}"}
+
+    assert client.post("/auth/logout", headers=headers).status_code == 204
+
+    response = client.post("/auth/refresh", json={"refresh_token": login_body["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_password_change_revokes_refresh_tokens(client):
+    login_body = _signup_and_login(client)
+    headers = {"Authorization": f"Bearer {login_body['login_access_token']}"}
+
+    wrong = client.put("/auth/password", json={"current_password": "nope", "new_password": "NewPassword456"}, headers=headers)
+    changed = client.put(
+        "/auth/password",
+        json={"current_password": "StrongPassword123", "new_password": "NewPassword456"},
+        headers=headers,
+    )
+
+    assert wrong.status_code == 403
+    assert changed.status_code == 204
+    assert client.post("/auth/refresh", json={"refresh_token": login_body["refresh_token"]}).status_code == 401
+    relogin = client.post(
+        "/auth/login",
+        data={"username": "refresh@example.com", "password": "NewPassword456"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert client.post("/auth/refresh", json={"refresh_token": relogin.json()["refresh_token"]}).status_code == 200
+
+
+def test_refresh_is_rejected_for_disabled_users(client, db_session):
+    import models
+
+    login_body = _signup_and_login(client)
+    user = db_session.query(models.User).filter(models.User.uid == login_body["user_info"]["uid"]).first()
+    user.status = "disabled"
+    db_session.commit()
+
+    response = client.post("/auth/refresh", json={"refresh_token": login_body["refresh_token"]})
+
+    assert response.status_code == 401
+
+
+def test_login_rehashes_password_stored_with_an_outdated_cost(client, db_session, monkeypatch):
+    import models
+    import utils
+
+    login_body = _signup_and_login(client)
+    monkeypatch.setattr(utils.settings, "BCRYPT_ROUNDS", 5)
+
+    response = client.post(
+        "/auth/login",
+        data={"username": "refresh@example.com", "password": "StrongPassword123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+
+    assert response.status_code == 200
+    user = db_session.query(models.User).filter(models.User.uid == login_body["user_info"]["uid"]).first()
+    db_session.refresh(user)
+    assert user.password.startswith("$2b$05$")
+    assert utils.verify_password("StrongPassword123", user.password)
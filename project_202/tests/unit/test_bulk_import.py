@@ -0,0 +1,74 @@
+import io
+import json
+
+import models
+import bulk_import
+from conftest import make_user
+
+CSV_HEADER = "name,address,zip,phone,opentime,closetime,description,menu,city\n"
+CHEAP_MENU = json.dumps([{"category": "Snacks", "items": [{"name": "Fries", "price": 4}]}]).replace('"', '""')
+
+
+def _csv(*rows):
+    return io.StringIO(CSV_HEADER + "".join(rows))
+
+
+def test_iter_records_parses_csv_and_ndjson_with_line_numbers():
+    csv_records = list(bulk_import.iter_records(_csv("A,1 Main,78701,5,09:00,17:00,d,,\n"), "csv"))
+    ndjson_records = list(bulk_import.iter_records(io.StringIO('{"name": "A"}\n\nnot json\n[1]\n'), "ndjson"))
+
+    assert csv_records == [(2, {"name": "A", "address": "1 Main", "zip": "78701", "phone": "5",
+                                "opentime": "09:00", "closetime": "17:00", "description": "d",
+                                "menu": None, "city": None})]
+    assert ndjson_records[0] == (1, {"name": "A"})
+    assert ndjson_records[1][0] == 3 and ndjson_records[1][1].startswith("Invalid JSON")
+    assert ndjson_records[2] == (4, "Expected a JSON object")
+
+
+def test_import_restaurants_inserts_valid_rows_and_reports_bad_ones(db_session):
+    source = _csv(
+        f'Fry Shack,1 Main,78701,5125550100,09:00,17:00,Fries,"{CHEAP_MENU}",Austin\n',
+        "Late Opener,2 Main,78701,5125550101,18:00,09:00,Backwards hours,,Austin\n",
+        "No Zip,3 Main,,5125550102,09:00,17:00,Missing zip,,Austin\n",
+        "Fry Shack,1 Main,78701,5125550100,09:00,17:00,Repeat,,Austin\n",
+        "Taco Stand,4 Main,78702,5125550103,10:00,22:00,Tacos,,Austin\n",
+    )
+
+    report = bulk_import.import_records(db_session, "restaurants", bulk_import.iter_records(source, "csv"), batch_size=3)
+
+    assert (report["inserted"], report["failed"]) == (2, 3)
+    assert [b["batch"] for b in report["batches"]] == [1, 2]
+    error_lines = sorted(e["line"] for b in report["batches"] for e in b["errors"])
+    assert error_lines == [3, 4, 5]
+
+    shack = db_session.query(models.Restaurant).filter(models.Restaurant.name == "Fry Shack").one()
+    assert (shack.price_range, shack.zip_code, shack.city, shack.review_count) == ("$", "78701", "Austin", 0)
+
+
+def test_import_reviews_updates_rating_aggregates(db_session):
+    restaurant = models.Restaurant(name="Reviewed", address="1 Main St")
+    db_session.add(restaurant)
+    db_session.commit()
+    user = make_user(db_session)
+    lines = [json.dumps({"rid": restaurant.rid, "uid": user.uid, "rating": r}) for r in (5, 4, 9)]
+
+    report = bulk_import.import_records(db_session, "reviews", bulk_import.iter_records(io.StringIO("\n".join(lines)), "ndjson"))
+
+    db_session.refresh(restaurant)
+    assert (report["inserted"], report["failed"]) == (2, 1)
+    assert (restaurant.review_count, restaurant.rating_sum, restaurant.overall_rating) == (2, 9, 4.5)
+
+
+def test_import_reviews_reports_rows_for_missing_restaurants(db_session):
+    restaurant = models.Restaurant(name="Reviewed", address="1 Main St")
+    db_session.add(restaurant)
+    db_session.commit()
+    user = make_user(db_session)
+    missing = restaurant.rid + 100
+    lines = [json.dumps({"rid": rid, "uid": user.uid, "rating": 4}) for rid in (restaurant.rid, missing)]
+
+    report = bulk_import.import_records(db_session, "reviews", bulk_import.iter_records(io.StringIO("\n".join(lines)), "ndjson"))
+
+    assert (report["inserted"], report["failed"]) == (1, 1)
+    assert report["batches"][0]["errors"] == [{"line": 2, "error": f"Restaurant {missing} does not exist"}]
+    assert db_session.query(models.Review).filter(models.Review.rid == missing).count() == 0
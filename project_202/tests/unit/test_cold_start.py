@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import warmup
+
+ROUTES_DIR = Path(__file__).resolve().parents[2] / "routes"
+
+# Generous enough for a slow CI runner; the baseline locally is ~500ms.
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+# Only needed by specific endpoints, never on the cold-start path
+DEFERRED_MODULES = ("httpx", "googlemaps", "requests", "pymysql", "sqlalchemy.ext.asyncio")
+
+
+def _import_times(module: str) -> dict:
+    """Cumulative import time in ms per module, from ``python -X importtime``."""
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    # the first run writes bytecode; measure the second, as a deployed bundle would
+    subprocess.run(command, cwd=ROUTES_DIR, capture_output=True, check=True)
+    result = subprocess.run(command, cwd=ROUTES_DIR, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times.setdefault(name.strip(), int(cumulative) / 1000)
+    return times
+
+
+def test_app_import_stays_within_budget():
+    times = _import_times("main")
+    assert times["main"] < IMPORT_BUDGET_MS
+
+
+def test_app_import_defers_endpoint_only_dependencies():
+    times = _import_times("main")
+    assert not [name for name in DEFERRED_MODULES if name in times]
+
+
+def test_warm_up_reports_each_step():
+    timings = warmup.warm_up()
+    assert set(timings) == {"import", "mappers", "engines"}
+    assert all(ms >= 0 for ms in timings.values())
+
+
+def test_lifespan_startup_runs_the_warm_up(monkeypatch):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    calls = []
+    monkeypatch.setattr(warmup, "warm_up", lambda: calls.append("warm_up") or {})
+
+    with TestClient(app):
+        pass
+
+    assert calls == ["warm_up"]
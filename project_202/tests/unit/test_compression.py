@@ -0,0 +1,67 @@
+import asyncio
+import gzip
+
+import compression
+from compression import CompressionMiddleware, accepted_encodings, choose_encoding
+
+
+def _run(app, accept_encoding="gzip"):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(app(scope, None, send))
+    return sent
+
+
+def _json_app(body, headers=()):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *headers,
+        ]})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+
+def test_accepted_encodings_skips_zero_quality():
+    assert accepted_encodings("gzip;q=0, br;q=0.5, deflate") == {"br", "deflate"}
+    assert choose_encoding("identity") is None
+    assert choose_encoding("deflate, gzip;q=0.8") == "gzip"
+
+
+def test_small_bodies_are_sent_uncompressed():
+    start, body = _run(CompressionMiddleware(_json_app(b"[]"), minimum_size=100))
+
+    assert body["body"] == b"[]"
+    assert all(k != b"content-encoding" for k, _ in start["headers"])
+
+
+def test_large_bodies_are_gzipped_with_a_weak_etag():
+    payload = b'{"name": "Test Kitchen"}' * 200
+    app = CompressionMiddleware(_json_app(payload, [(b"etag", b'"abc"')]), minimum_size=100, offload_size=1)
+
+    start, body = _run(app)
+    headers = dict(start["headers"])
+
+    assert gzip.decompress(body["body"]) == payload
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"content-length"] == str(len(body["body"])).encode()
+    assert headers[b"etag"] == b'W/"abc"'
+    assert headers[b"vary"] == b"Accept-Encoding"
+
+
+def test_cacheable_bodies_are_compressed_once(monkeypatch):
+    compression.compressed_bodies.clear()
+    calls = []
+    real_compress = compression.compress
+    monkeypatch.setattr(compression, "compress", lambda body, enc: calls.append(enc) or real_compress(body, enc))
+    payload = b"x" * 5000
+    app = CompressionMiddleware(_json_app(payload, [(b"cache-control", b"public, max-age=30")]), minimum_size=100)
+
+    first = _run(app)[1]["body"]
+    second = _run(app)[1]["body"]
+
+    assert first == second
+    assert calls == ["gzip"]
@@ -0,0 +1,19 @@
+import pytest
+
+from db_config import async_database_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("sqlite:///./app.db", "sqlite+aiosqlite:///./app.db"),
+    ("mysql+pymysql://u:p@db:3306/app", "mysql+aiomysql://u:p@db:3306/app"),
+    ("postgres://u:p@db/app", "postgresql+asyncpg://u:p@db/app"),
+    ("postgresql://u:p@db/app?sslmode=require", "postgresql+asyncpg://u:p@db/app?ssl=require"),
+    ("sqlite+aiosqlite://", "sqlite+aiosqlite://"),
+])
+def test_async_database_url_swaps_in_an_asyncio_driver(url, expected):
+    assert async_database_url(url) == expected
+
+
+def test_async_database_url_rejects_unknown_drivers():
+    with pytest.raises(RuntimeError):
+        async_database_url("oracle://u:p@db/app")
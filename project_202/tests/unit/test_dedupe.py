@@ -0,0 +1,69 @@
+import models
+import dedupe
+
+
+def _add(db_session, name, address="1 Main St", zip_code="78701", lat=None, lng=None, city=None):
+    restaurant = models.Restaurant(name=name, address=address, zip_code=zip_code, city=city, latitude=lat, longitude=lng)
+    db_session.add(restaurant)
+    db_session.commit()
+    return restaurant.rid
+
+
+def test_normalize_name_drops_punctuation_and_stopwords():
+    assert dedupe.normalize_name("The Joe's Pizza & Grill") == "joes pizza"
+    assert dedupe.normalize_name("Cafe") == "cafe"
+
+
+def test_similarity_tolerates_small_typos():
+    assert dedupe.similarity("joes pizza", "joe pizza") > 0.6
+    assert dedupe.similarity("joes pizza", "taco stand") < 0.2
+
+
+def test_exact_duplicates_keeps_the_first_created_listing(db_session):
+    first = _add(db_session, "Noodle Bar")
+    second = _add(db_session, "Noodle Bar")
+    _add(db_session, "Taco Stand")
+    third = _add(db_session, "Noodle Bar")
+
+    assert sorted(dedupe.exact_duplicates(db_session)) == [(second, first), (third, first)]
+
+
+def test_exact_duplicates_keep_same_name_listings_in_other_places(db_session):
+    austin = _add(db_session, "Joe's Pizza", zip_code="78701", city="Austin")
+    _add(db_session, "Joe's Pizza", zip_code="10001", city="New York")
+    _add(db_session, "Joe's Pizza", zip_code=None, city="Dallas")
+    same_city = _add(db_session, "Joe's Pizza", zip_code="78701", city="austin")
+    _add(db_session, "Joe's Pizza", zip_code=None)
+    _add(db_session, "Joe's Pizza", zip_code=None)
+
+    assert dedupe.exact_duplicates(db_session) == [(same_city, austin)]
+
+
+def test_fuzzy_duplicates_require_similar_name_and_same_place(db_session):
+    original = _add(db_session, "Joe's Pizza", zip_code="78701")
+    typo = _add(db_session, "Joes Pizza Restaurant", zip_code="78701")
+    other_city = _add(db_session, "Joe's Pizza", address="350 5th Ave", zip_code="10001")  # same chain, different city
+    nearby = _add(db_session, "Sushi Zen", zip_code=None, lat=30.2672, lng=-97.7431)
+    same_spot = _add(db_session, "Sushi Zen Bar", zip_code=None, lat=30.2673, lng=-97.7432)
+
+    clusters = dedupe.find_duplicates(db_session, fuzzy=True, threshold=0.7)
+    by_keep = {c["keep"]: c["remove"] for c in clusters}
+
+    assert by_keep[nearby] == [same_spot]
+    assert by_keep[original] == [typo]
+    assert other_city not in by_keep
+
+
+def test_delete_listings_cascades_children_in_batches(db_session):
+    rids = [_add(db_session, f"Listing {i}") for i in range(5)]
+    for rid in rids:
+        db_session.add(models.Review(rid=rid, rating=4))
+        db_session.add(models.Photo(rid=rid, url="http://example.com/p.jpg"))
+    db_session.commit()
+
+    deleted = dedupe.delete_listings(db_session, rids[:4], batch_size=2)
+
+    assert deleted == 4
+    assert db_session.query(models.Restaurant).count() == 1
+    assert db_session.query(models.Review).count() == 1
+    assert db_session.query(models.Photo).count() == 1
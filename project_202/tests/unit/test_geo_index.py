@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+from geo_index import GeoIndex, haversine_km
+
+
+def _point(rid, lat, lng):
+    return SimpleNamespace(rid=rid, latitude=lat, longitude=lng)
+
+
+def _loaded_index(*points, cell_degrees=0.1):
+    index = GeoIndex(cell_degrees=cell_degrees)
+    index._loaded_at = 0  # mark as built without touching the database
+    for point in points:
+        index.upsert(point)
+    return index
+
+
+def test_haversine_km_matches_known_distance():
+    # Austin to Dallas is roughly 292 km as the crow flies.
+    assert haversine_km(30.2672, -97.7431, 32.7767, -96.7970) == pytest.approx(292, abs=3)
+
+
+def test_nearby_returns_points_within_radius_sorted_by_distance():
+    index = _loaded_index(
+        _point(1, 30.2672, -97.7431),   # downtown Austin
+        _point(2, 30.2849, -97.7341),   # UT campus, ~2 km away
+        _point(3, 32.7767, -96.7970),   # Dallas
+    )
+
+    hits = index.nearby(30.2672, -97.7431, radius_km=5)
+
+    assert [rid for rid, _ in hits] == [1, 2]
+    assert hits[0][1] == pytest.approx(0, abs=1e-6)
+
+
+def test_nearby_finds_points_across_cell_and_antimeridian_boundaries():
+    index = _loaded_index(_point(1, 0.0, 179.99), _point(2, 0.0, -179.99), cell_degrees=0.01)
+
+    assert sorted(rid for rid, _ in index.nearby(0.0, 179.995, radius_km=5)) == [1, 2]
+
+
+def test_upsert_moves_and_remove_drops_points():
+    index = _loaded_index(_point(1, 30.2672, -97.7431))
+
+    index.upsert(_point(1, 32.7767, -96.7970))
+    assert index.nearby(30.2672, -97.7431, radius_km=5) == []
+    assert [rid for rid, _ in index.nearby(32.7767, -96.7970, radius_km=5)] == [1]
+
+    index.remove(1)
+    assert len(index) == 0
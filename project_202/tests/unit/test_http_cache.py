@@ -0,0 +1,43 @@
+from datetime import datetime
+
+import http_cache
+from http_cache import CachePolicy, http_date, not_modified_since
+
+
+def test_cache_policy_builds_cache_control():
+    assert CachePolicy(60, s_maxage=600, stale_while_revalidate=30).cache_control == \
+        "public, max-age=60, s-maxage=600, stale-while-revalidate=30"
+    assert CachePolicy(30).cache_control == "public, max-age=30"
+    assert CachePolicy(0, public=False).cache_control == "private, no-store"
+
+
+def test_restaurant_routes_are_only_cached_by_purgeable_shared_caches():
+    for template in ("/restaurants/{restaurant_id}", "/restaurants/{restaurant_id}/page",
+                     "/restaurants/{restaurant_id}/rating", "/users/{uid}/reviews"):
+        policy = http_cache.POLICIES[template]
+        assert policy.keys
+        assert policy.cache_control.startswith("public, max-age=0, s-maxage=")
+
+
+def test_http_date_treats_naive_timestamps_as_utc():
+    assert http_date(datetime(2024, 3, 1, 12, 30, 15, 999)) == "Fri, 01 Mar 2024 12:30:15 GMT"
+
+
+def test_not_modified_since_compares_at_second_precision():
+    last_modified = datetime(2024, 3, 1, 12, 30, 15, 500000)
+
+    assert not_modified_since("Fri, 01 Mar 2024 12:30:15 GMT", last_modified)
+    assert not not_modified_since("Fri, 01 Mar 2024 12:30:14 GMT", last_modified)
+    assert not not_modified_since("not a date", last_modified)
+    assert not not_modified_since(None, last_modified)
+
+
+def test_purge_restaurant_sends_restaurant_owner_and_list_keys(monkeypatch):
+    purged = []
+    monkeypatch.setattr(http_cache, "_purge_handlers", [])
+    http_cache.register_purge_handler(purged.append)
+
+    http_cache.purge_restaurant(7, owner_id=3)
+    http_cache.purge_all()
+
+    assert purged == [("restaurant-7", "list", "owner-3"), None]
@@ -0,0 +1,63 @@
+import json
+
+import models
+import menus
+
+MENU = json.dumps([
+    {"category": "Starters", "items": [
+        {"name": "Soup", "description": "Daily", "price": 6},
+        {"name": "Bread", "price": "3.5"},
+    ]},
+    {"category": "Mains", "items": [
+        {"name": "Steak", "price": 31},
+        {"name": "Special"},
+    ]},
+])
+
+
+def test_parse_menu_flattens_items_in_order():
+    items = menus.parse_menu(MENU)
+
+    assert [(i["position"], i["category"], i["name"], i["price"]) for i in items] == [
+        (0, "Starters", "Soup", 6.0),
+        (1, "Starters", "Bread", 3.5),
+        (2, "Mains", "Steak", 31.0),
+        (3, "Mains", "Special", None),
+    ]
+    assert menus.parse_menu("not-json") == []
+    assert menus.parse_menu(None) == []
+
+
+def test_price_stats_ignores_unpriced_items():
+    stats = menus.price_stats(menus.parse_menu(MENU))
+
+    assert stats == {"min_price": 3.5, "avg_price": 13.5, "max_price": 31.0, "price_range": "$$"}
+    assert menus.price_stats([])["price_range"] == "$$"
+
+
+def test_replace_menu_items_stores_rows_and_stats_and_load_menu_round_trips(db_session):
+    restaurant = models.Restaurant(name="Menu House", address="1 Main St")
+    db_session.add(restaurant)
+    db_session.commit()
+
+    menus.replace_menu_items(db_session, restaurant.rid, MENU)
+    menus.replace_menu_items(db_session, restaurant.rid, MENU)  # replaces, does not append
+    db_session.commit()
+    db_session.refresh(restaurant)
+
+    assert db_session.query(models.MenuItem).filter(models.MenuItem.rid == restaurant.rid).count() == 4
+    assert (restaurant.min_price, restaurant.max_price, restaurant.price_range) == (3.5, 31.0, "$$")
+    loaded = menus.load_menu(db_session, restaurant.rid)
+    assert [c["category"] for c in loaded] == ["Starters", "Mains"]
+    assert loaded[0]["items"][0] == {"name": "Soup", "description": "Daily", "price": 6.0}
+
+
+def test_backfill_normalizes_existing_json_menus(db_session):
+    db_session.add_all([
+        models.Restaurant(name="Legacy A", menu=MENU),
+        models.Restaurant(name="Legacy B", menu="not-json"),
+    ])
+    db_session.commit()
+
+    assert menus.backfill(db_session, batch_size=1) == 2
+    assert db_session.query(models.MenuItem).count() == 4
@@ -0,0 +1,91 @@
+import json
+
+import metrics
+from cache import TTLCache
+from config import settings
+
+
+def _family(metric):
+    return {metric.name: {**metric.family(), "values": {tuple(l): v for l, v in metric.family()["values"]}}}
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    histogram = metrics.Histogram("t_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0), register=False)
+    histogram.observe(("/a",), 0.05)
+    histogram.observe(("/a",), 0.5)
+    histogram.observe(("/a",), 3.0)
+
+    text = metrics.render_families(_family(histogram))
+
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{route="/a",le="1.0"} 2' in text
+    assert 't_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 't_seconds_sum{route="/a"} 3.55' in text
+    assert 't_seconds_count{route="/a"} 3' in text
+
+
+def test_label_values_are_escaped():
+    counter = metrics.Counter("t_total", "Test.", ("path",), register=False)
+    counter.inc(('say "hi"\\',))
+
+    assert 't_total{path="say \\"hi\\"\\\\"} 1' in metrics.render_families(_family(counter))
+
+
+def test_cache_collector_reports_hits_misses_and_entries(monkeypatch):
+    cache = TTLCache()
+    monkeypatch.setitem(metrics.caches, "test", cache)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    text = metrics.render()
+
+    assert 'cache_hits_total{cache="test"} 1' in text
+    assert 'cache_misses_total{cache="test"} 1' in text
+    assert 'cache_entries{cache="test"} 1' in text
+
+
+def test_merge_sums_workers_and_drops_gauges_of_exited_ones(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_DIR", str(tmp_path))
+    dead_pid = 2 ** 22 + 1  # above the default pid_max, so never a live process
+    counter = metrics.Counter("t_requests_total", "Test.", register=False)
+    gauge = metrics.Gauge("t_in_flight", "Test.", register=False)
+    counter.inc((), 5)
+    gauge.set((), 3)
+    (tmp_path / f"metrics-{dead_pid}.json").write_text(json.dumps({
+        "pid": dead_pid, "families": [counter.family(), gauge.family()],
+    }))
+    monkeypatch.setattr(metrics, "snapshot", lambda: [counter.family(), gauge.family()])
+
+    merged = metrics.merge(metrics._read_snapshots())
+
+    assert merged["t_requests_total"]["values"][()] == 10
+    assert merged["t_in_flight"]["values"][()] == 3
+
+
+def test_snapshot_of_an_earlier_worker_with_the_same_pid_is_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_DIR", str(tmp_path))
+    counter = metrics.Counter("t_requests_total", "Test.", register=False)
+    gauge = metrics.Gauge("t_in_flight", "Test.", register=False)
+    counter.inc((), 5)
+    gauge.set((), 3)
+    monkeypatch.setattr(metrics, "snapshot", lambda: [counter.family(), gauge.family()])
+    monkeypatch.setattr(metrics, "STARTED_NS", 1)
+    metrics.write_snapshot()
+    monkeypatch.setattr(metrics, "STARTED_NS", 2)  # restarted worker, same PID
+
+    merged = metrics.merge(metrics._read_snapshots())
+
+    assert merged["t_requests_total"]["values"][()] == 10
+    assert merged["t_in_flight"]["values"][()] == 3
+
+
+def test_write_snapshot_round_trips(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_DIR", str(tmp_path))
+
+    metrics.write_snapshot()
+
+    (snapshot_file,) = tmp_path.glob("metrics-*.json")
+    families = json.loads(snapshot_file.read_text())["families"]
+    assert "http_request_duration_seconds" in {family["name"] for family in families}
@@ -0,0 +1,56 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+import migrations
+import models
+
+
+def _engine_without_index_pack():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name in (*migrations.INDEX_PACK, *migrations.REVIEW_RATING_INDEXES):
+            conn.execute(text(f"DROP INDEX {name}"))
+    return engine
+
+
+def _index_names(engine):
+    inspector = inspect(engine)
+    return {index["name"] for table in inspector.get_table_names() for index in inspector.get_indexes(table)}
+
+
+def test_migrate_creates_missing_indexes_and_records_versions():
+    engine = _engine_without_index_pack()
+    assert not set(migrations.INDEX_PACK) & _index_names(engine)
+
+    applied = migrations.migrate(engine)
+
+    assert applied == [1, 2, 3, 4, 5, 6, 7]
+    assert set(migrations.INDEX_PACK) <= _index_names(engine)
+    assert set(migrations.REVIEW_RATING_INDEXES) <= _index_names(engine)
+    assert migrations.applied_versions(engine) == {1, 2, 3, 4, 5, 6, 7}
+
+
+def test_migrate_is_a_no_op_once_applied():
+    engine = _engine_without_index_pack()
+    migrations.migrate(engine)
+
+    assert migrations.pending(engine) == []
+    assert migrations.migrate(engine) == []
+
+
+def test_index_pack_names_are_all_declared_on_the_models():
+    declared = {index.name for table in models.Base.metadata.sorted_tables for index in table.indexes}
+
+    assert set(migrations.INDEX_PACK) | set(migrations.REVIEW_RATING_INDEXES) <= declared
+
+
+def test_backfill_gives_every_review_a_created_timestamp():
+    engine = _engine_without_index_pack()
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO review (rid, uid, rating, created, updated) VALUES (1, 1, 4, NULL, NULL)"))
+
+    migrations.migrate(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM review WHERE created IS NULL")).scalar() == 0
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+import oauth2
+from conftest import make_user
+
+
+def _token(user, **kwargs):
+    return oauth2.create_access_token({"uid": user.uid, "user_type": user.user_type}, **kwargs)
+
+
+def test_verify_access_token_memoizes_decoded_claims():
+    token = oauth2.create_access_token({"uid": 7, "user_type": "user"})
+
+    first = oauth2.verify_access_token(token)
+
+    assert oauth2.verify_access_token(token) is first
+    assert first.uid == 7
+
+
+def test_verify_access_token_does_not_cache_expired_tokens():
+    token = oauth2.create_access_token({"uid": 7, "user_type": "user"}, expires_delta=timedelta(seconds=-1))
+
+    with pytest.raises(HTTPException):
+        oauth2.verify_access_token(token)
+    assert oauth2.token_cache.get(token) is None
+
+
+def test_get_current_user_serves_repeat_calls_from_cache(db_session):
+    user = make_user(db_session)
+    token = _token(user)
+
+    first = oauth2.get_current_user(token, db_session)
+    # Bypass the ORM so no invalidation fires; the cached principal is returned.
+    db_session.execute(text("UPDATE user SET username = 'renamed' WHERE uid = :uid"), {"uid": user.uid})
+    second = oauth2.get_current_user(token, db_session)
+
+    assert second is first
+    assert second.username == "testuser"
+
+
+def test_orm_write_to_user_invalidates_cached_principal(db_session):
+    user = make_user(db_session, user_type="owner")
+    token = _token(user)
+    assert oauth2.get_current_user(token, db_session).status == "active"
+
+    user.status = "suspended"
+    db_session.commit()
+
+    assert oauth2.get_current_user(token, db_session).status == "suspended"
+
+
+def test_get_current_user_rejects_tokens_for_deleted_users(db_session):
+    user = make_user(db_session)
+    token = _token(user)
+    db_session.delete(user)
+    db_session.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        oauth2.get_current_user(token, db_session)
+    assert exc.value.status_code == 401
@@ -1,6 +1,6 @@
 import json
 
-from routers.owners import calculate_price_range
+from menus import calculate_price_range
 
 
 def test_calculate_price_range_low_cost_menu_returns_single_dollar():
@@ -0,0 +1,93 @@
+import asyncio
+
+import httpx
+import pytest
+
+from cache import TTLCache
+from places_client import PlacesClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _client(handler, cache=None):
+    return PlacesClient(
+        base_url="http://places.test/api",
+        api_key="test-key",
+        cache=cache,
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, timer=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+
+
+def test_text_search_caches_by_zip_and_coalesces_concurrent_calls():
+    requests_seen = []
+
+    async def handler(request):
+        requests_seen.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"status": "OK", "results": [{"name": "Cafe"}]})
+
+    client = _client(handler)
+
+    async def run():
+        results = await asyncio.gather(*(client.text_search(78701) for _ in range(5)))
+        again = await client.text_search(78701)
+        await client.aclose()
+        return results, again
+
+    results, again = asyncio.run(run())
+
+    assert len(requests_seen) == 1
+    assert requests_seen[0].url.path == "/api/textsearch/json"
+    assert requests_seen[0].url.params["query"] == "restaurants in 78701"
+    assert all(r["results"][0]["name"] == "Cafe" for r in results)
+    assert again == results[0]
+    assert client.upstream_calls == 1
+
+
+def test_text_search_does_not_cache_upstream_errors():
+    statuses = iter(["REQUEST_DENIED", "OK"])
+
+    def handler(request):
+        return httpx.Response(200, json={"status": next(statuses), "results": []})
+
+    client = _client(handler)
+
+    async def run():
+        first = await client.text_search(10001)
+        second = await client.text_search(10001)
+        await client.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert (first["status"], second["status"]) == ("REQUEST_DENIED", "OK")
+    assert client.upstream_calls == 2
+
+
+def test_text_search_raises_on_http_errors():
+    client = _client(lambda request: httpx.Response(503))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(client.text_search(94103))
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool
+
+import db_config
+import pool_metrics
+from config import settings
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'pool.db'}"
+
+
+def test_server_profile_uses_tuned_queue_pool(database_url, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 3)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 1)
+
+    options = db_config.pool_options(database_url, "server")
+
+    assert options["pool_size"] == 3 and options["max_overflow"] == 1
+    assert db_config.pool_options("sqlite://", "server") == {}
+
+
+def test_serverless_profile_uses_null_pool_unless_sized(database_url, monkeypatch):
+    assert db_config.pool_options(database_url, "serverless") == {"poolclass": NullPool}
+
+    monkeypatch.setattr(settings, "SERVERLESS_POOL_SIZE", 1)
+    assert db_config.pool_options(database_url, "serverless")["max_overflow"] == 0
+
+
+def test_auto_profile_detects_serverless_platforms(monkeypatch):
+    monkeypatch.delenv("VERCEL", raising=False)
+    monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+    assert db_config.pool_profile() == "server"
+
+    monkeypatch.setenv("VERCEL", "1")
+    assert db_config.pool_profile() == "serverless"
+
+
+def test_pool_stats_track_checkouts_waits_and_timeouts(database_url, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 0.05)
+    monkeypatch.setattr(pool_metrics, "registry", {})
+    engine = db_config.create_db_engine(database_url, "test", profile="server")
+
+    held = engine.connect()
+    held.execute(text("SELECT 1"))
+    busy = pool_metrics.snapshot()["test"]
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    held.close()
+    idle = pool_metrics.snapshot()["test"]
+
+    assert busy["checked_out"] == 1 and busy["size"] == 1 and busy["pool"] == "TimedQueuePool"
+    assert idle["checked_out"] == 0 and idle["idle"] == 1
+    assert idle["timeouts"] == 1
+    assert idle["wait_ms_max"] >= 50
+    engine.dispose()
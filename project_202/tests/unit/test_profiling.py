@@ -0,0 +1,92 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import profiling
+from config import settings
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_collapse_lists_frames_root_first():
+    stack = profiling.collapse(sys._getframe())
+
+    assert stack.split(";")[-1].startswith("test_collapse_lists_frames_root_first (test_profiling.py:")
+
+
+def test_stack_sampler_records_the_target_thread():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,))
+    worker.start()
+    sampler = profiling.StackSampler(worker.ident, interval=0.001)
+    sampler.start()
+    time.sleep(0.05)
+    stacks = sampler.stop()
+    stop.set()
+    worker.join()
+
+    assert sum(stacks.values()) > 0
+    assert all("_busy_loop (test_profiling.py:" in stack for stack in stacks)
+
+
+def test_profile_requested_by_header_or_query_flag():
+    assert profiling.profile_requested({"headers": [(b"x-profile", b"1")], "query_string": b""})
+    assert profiling.profile_requested({"headers": [], "query_string": b"limit=5&profile=1"})
+    assert not profiling.profile_requested({"headers": [(b"x-profile", b"0")], "query_string": b""})
+    assert not profiling.profile_requested({"headers": [], "query_string": b""})
+
+
+def test_collapsed_output_is_sorted_by_sample_count():
+    profile = {"stacks": Counter({"main;a": 1, "main;b": 3})}
+
+    assert profiling.collapsed(profile) == "main;b 3\nmain;a 1\n"
+
+
+def _profiled_app():
+    app = FastAPI()
+
+    @app.get("/slow")
+    def slow_handler():
+        time.sleep(0.05)
+        return {}
+
+    @app.get("/fast")
+    def fast_handler():
+        return {}
+
+    app.add_middleware(profiling.ProfilingMiddleware)
+    profiling.follow_handler_threads(app)
+    return app
+
+
+def test_sync_route_profile_samples_the_handler_thread(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_EVERY", 1)
+    monkeypatch.setattr(profiling, "route_counts", Counter())
+    profiling.profiles.clear()
+
+    with TestClient(_profiled_app()) as client:
+        client.get("/slow")
+
+    stacks = profiling.profiles[-1]["stacks"]
+    top_stack, _ = stacks.most_common(1)[0]
+    assert "slow_handler (test_profiling.py:" in top_stack
+
+
+def test_sampling_counts_requests_per_route(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_EVERY", 3)
+    monkeypatch.setattr(profiling, "route_counts", Counter())
+    profiling.profiles.clear()
+
+    with TestClient(_profiled_app()) as client:
+        for _ in range(3):
+            client.get("/fast")
+        client.get("/slow")
+
+    assert [profile["route"] for profile in profiling.profiles] == ["/fast"]
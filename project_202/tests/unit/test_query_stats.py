@@ -0,0 +1,49 @@
+import query_stats
+from config import settings
+
+
+def test_statement_shape_collapses_whitespace_and_parameter_lists():
+    first = query_stats.statement_shape("SELECT rid FROM restaurant\n  WHERE rid IN (?, ?, ?)")
+    second = query_stats.statement_shape("SELECT rid FROM restaurant WHERE rid IN (?)")
+
+    assert first == second == "SELECT rid FROM restaurant WHERE rid IN (?)"
+
+
+def test_record_tracks_count_time_and_slowest_statement():
+    stats = query_stats.QueryStats()
+    stats.record("SELECT 1", 0.002)
+    stats.record("SELECT 2", 0.005)
+    stats.record("SELECT 3", 0.001)
+
+    assert stats.count == 3
+    assert round(stats.seconds, 6) == 0.008
+    assert stats.slowest_statement == "SELECT 2"
+
+
+def test_server_timing_lists_db_and_app_metrics():
+    stats = query_stats.QueryStats()
+    stats.record("SELECT 1", 0.0015)
+
+    assert stats.server_timing(0.01) == 'db;dur=1.50;desc="1 queries", db-slowest;dur=1.50, app;dur=10.00'
+
+
+def test_budget_problems_reports_overrun_and_repeated_statements(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_REPEAT_LIMIT", 2)
+    stats = query_stats.QueryStats()
+    for rid in range(3):
+        stats.record("SELECT * FROM review WHERE rid = ?", 0.001)
+
+    problems = query_stats.budget_problems("/restaurants/{restaurant_id}/rating", stats)
+
+    assert problems[0] == "3 queries, budget 1"
+    assert problems[1].startswith("3 x same statement (possible N+1)")
+
+
+def test_budget_problems_uses_default_budget_for_unlisted_routes(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BUDGET", 1)
+    stats = query_stats.QueryStats()
+    stats.record("SELECT 1", 0.001)
+
+    assert query_stats.budget_problems("/unlisted", stats) == []
+    stats.record("SELECT 2", 0.001)
+    assert query_stats.budget_problems("/unlisted", stats) == ["2 queries, budget 1"]
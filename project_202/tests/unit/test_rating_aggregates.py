@@ -0,0 +1,59 @@
+from sqlalchemy import create_engine, inspect, text
+
+import models
+import rating_aggregates
+from conftest import make_user
+
+
+def _restaurant(db_session):
+    restaurant = models.Restaurant(name="Aggregate Diner", address="1 Main St")
+    db_session.add(restaurant)
+    db_session.commit()
+    return restaurant
+
+
+def test_record_review_updates_count_sum_and_rounded_rating(db_session):
+    restaurant = _restaurant(db_session)
+
+    for rating in (4, 5, 5):
+        rating_aggregates.record_review(db_session, restaurant.rid, rating)
+    db_session.commit()
+    db_session.refresh(restaurant)
+
+    assert restaurant.review_count == 3
+    assert restaurant.rating_sum == 14
+    assert restaurant.overall_rating == 4.7
+
+
+def test_backfill_repairs_drifted_aggregates(db_session):
+    restaurant = _restaurant(db_session)
+    user = make_user(db_session)
+    db_session.add_all([
+        models.Review(rid=restaurant.rid, uid=user.uid, rating=2),
+        models.Review(rid=restaurant.rid, uid=user.uid, rating=3),
+    ])
+    db_session.commit()
+
+    assert [d["rid"] for d in rating_aggregates.find_drift(db_session)] == [restaurant.rid]
+
+    fixed = rating_aggregates.backfill(db_session)
+    db_session.refresh(restaurant)
+
+    assert len(fixed) == 1
+    assert (restaurant.review_count, restaurant.rating_sum, restaurant.overall_rating) == (2, 5, 2.5)
+    assert rating_aggregates.find_drift(db_session) == []
+
+
+def test_ensure_columns_adds_missing_aggregate_columns():
+    legacy = create_engine("sqlite://")
+    with legacy.begin() as conn:
+        conn.execute(text("CREATE TABLE restaurant (rid INTEGER PRIMARY KEY, name VARCHAR(100))"))
+        conn.execute(text("INSERT INTO restaurant (name) VALUES ('Legacy')"))
+
+    rating_aggregates.ensure_columns(legacy)
+    rating_aggregates.ensure_columns(legacy)  # idempotent
+
+    columns = {c["name"] for c in inspect(legacy).get_columns("restaurant")}
+    assert {"review_count", "rating_sum"} <= columns
+    with legacy.connect() as conn:
+        assert conn.execute(text("SELECT review_count, rating_sum FROM restaurant")).one() == (0, 0)
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pytest
+
+import models
+import read_models
+from conftest import make_user
+
+
+def _restaurant(db_session, name, owner_id=None, rating=0.0):
+    restaurant = models.Restaurant(name=name, address=f"{name} St", owner_id=owner_id, overall_rating=rating, menu="[]")
+    db_session.add(restaurant)
+    db_session.commit()
+    return restaurant.rid
+
+
+def test_dtos_use_slots_and_round_trip_to_dicts():
+    review = read_models.ReviewView(1, 5, "Great", 2, 3, datetime(2024, 1, 1), "alice")
+
+    assert not hasattr(review, "__dict__")
+    with pytest.raises(AttributeError):
+        review.extra = 1
+    assert review.as_dict() == {
+        "rvid": 1, "rating": 5, "comment": "Great", "rid": 2, "uid": 3,
+        "created": datetime(2024, 1, 1), "username": "alice",
+    }
+
+
+def test_restaurant_detail_includes_photos(db_session):
+    rid = _restaurant(db_session, "Kitchen")
+    db_session.add(models.Photo(url="http://img/1.jpg", rid=rid))
+    db_session.commit()
+
+    detail = read_models.restaurant_detail(db_session, rid)
+
+    assert detail.name == "Kitchen"
+    assert detail.photos == [{"pid": 1, "url": "http://img/1.jpg"}]
+    assert read_models.restaurant_detail(db_session, rid + 1) is None
+
+
+def test_restaurant_list_returns_tuples_in_field_order_with_keyset(db_session):
+    for name, rating in (("A", 3.0), ("B", 5.0), ("C", 4.0)):
+        _restaurant(db_session, name, rating=rating)
+
+    first = read_models.restaurant_list(db_session, ("rid", "name"), sort="rating", limit=2)
+    after = (first[1].sort_rating, first[1].rid)
+    rest = read_models.restaurant_list(db_session, ("rid", "name"), sort="rating", after=after, limit=2)
+
+    assert [tuple(row)[:2] for row in first] == [(2, "B"), (3, "C"), (1, "A")]
+    assert [row.name for row in rest] == ["A"]
+
+
+def test_reviews_and_owner_listings(db_session):
+    owner = make_user(db_session, email="owner@example.com", username="owner", user_type="owner")
+    user = make_user(db_session)
+    rid = _restaurant(db_session, "Mine", owner_id=owner.uid)
+    _restaurant(db_session, "Theirs")
+    db_session.add(models.Review(rid=rid, uid=user.uid, rating=4, comment="Nice", created=datetime(2024, 1, 1)))
+    db_session.commit()
+
+    reviews = read_models.restaurant_reviews(db_session, rid)
+    listings = read_models.owner_listings(db_session, owner.uid)
+
+    assert [(r.rating, r.username) for r in reviews] == [(4, "testuser")]
+    assert [(l.name, l.owner_id) for l in listings] == [("Mine", owner.uid)]
@@ -0,0 +1,107 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import models
+from search_index import SearchIndex, menu_text, tokenize
+
+
+def _restaurant(rid, name, description="", menu=None):
+    return SimpleNamespace(
+        rid=rid,
+        name=name,
+        address="1 Main St",
+        city="Austin",
+        zip_code="78701",
+        description=description,
+        menu=menu,
+    )
+
+
+def _loaded_index(*restaurants):
+    index = SearchIndex()
+    index._loaded_at = 0  # mark as built without touching the database
+    for restaurant in restaurants:
+        index.upsert(restaurant)
+    return index
+
+
+def test_tokenize_lowercases_and_splits_on_punctuation():
+    assert tokenize("Joe's Pizza-Bar, 2nd St.") == ["joe", "s", "pizza", "bar", "2nd", "st"]
+
+
+def test_menu_text_extracts_categories_item_names_and_descriptions():
+    menu = json.dumps([
+        {"category": "Mains", "items": [{"name": "Pad Thai", "description": "Rice noodles", "price": 12}]}
+    ])
+
+    assert menu_text(menu) == ["Mains", "Pad Thai", "Rice noodles"]
+    assert menu_text("not-json") == []
+
+
+def test_search_ranks_name_matches_above_description_matches():
+    index = _loaded_index(
+        _restaurant(1, "Corner Cafe", description="We also serve sushi"),
+        _restaurant(2, "Sushi House", description="Fresh fish daily"),
+    )
+
+    assert [rid for rid, _ in index.search("sushi")] == [2, 1]
+
+
+def test_search_matches_menu_items_and_prefixes():
+    menu = json.dumps([{"category": "Noodles", "items": [{"name": "Ramen", "description": "Tonkotsu broth"}]}])
+    index = _loaded_index(_restaurant(1, "Noodle Bar", menu=menu), _restaurant(2, "Taco Stand"))
+
+    assert [rid for rid, _ in index.search("tonkotsu")] == [1]
+    assert [rid for rid, _ in index.search("ram")] == [1]
+
+
+def test_upsert_and_remove_update_the_index_incrementally():
+    index = _loaded_index(_restaurant(1, "Taco Stand"))
+
+    index.upsert(_restaurant(1, "Burrito Stand"))
+    assert index.search("taco") == []
+    assert [rid for rid, _ in index.search("burrito")] == [1]
+
+    index.remove(1)
+    assert index.search("burrito") == []
+    assert len(index) == 0
+
+
+def test_index_max_age_still_reads_the_old_setting_name(monkeypatch):
+    from config import Settings
+
+    monkeypatch.delenv("LISTING_INDEX_MAX_AGE_SECONDS", raising=False)
+    monkeypatch.setenv("SEARCH_INDEX_MAX_AGE_SECONDS", "42")
+
+    assert Settings(_env_file=None).LISTING_INDEX_MAX_AGE_SECONDS == 42
+
+
+def test_stale_index_is_served_while_it_rebuilds_in_the_background(db_session, monkeypatch):
+    db_session.add(models.Restaurant(name="Taco Stand", address="1 Main St"))
+    db_session.commit()
+    index = SearchIndex()
+    index.ensure_loaded(db_session)
+    # written by another worker, so this index only learns of it by rebuilding
+    db_session.add(models.Restaurant(name="Burrito Stand", address="2 Main St"))
+    db_session.commit()
+
+    release = threading.Event()
+    read = index._read
+    monkeypatch.setattr(index, "_read", lambda db: release.wait(5) and read(db))
+    index.invalidate()
+    index.ensure_loaded(db_session)
+    refresh = index._refresh_thread
+    index.ensure_loaded(db_session)
+
+    assert index._refresh_thread is refresh
+    assert index.search("burrito") == []
+    assert len(index.search("taco")) == 1
+    index.upsert(_restaurant(99, "Pizza Place"))  # lands while the rebuild is reading
+
+    release.set()
+    refresh.join(5)
+
+    assert not index.stale
+    assert len(index.search("burrito")) == 1
+    assert [rid for rid, _ in index.search("pizza")] == [99]
@@ -0,0 +1,41 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import serialization
+from serialization import FastJSONResponse, dumps, users_out, restaurants_out
+
+
+def test_dumps_matches_fastapi_encoding_for_common_types():
+    content = {"created": datetime(2024, 1, 2, 3, 4, 5), "rating": Decimal("4.5"), "name": "Café", "n": None}
+
+    assert json.loads(dumps(content)) == {"created": "2024-01-02T03:04:05", "rating": 4.5, "name": "Café", "n": None}
+    assert FastJSONResponse(content).body == dumps(content)
+
+
+def test_dumps_falls_back_to_stdlib_json(monkeypatch):
+    monkeypatch.setattr(serialization, "orjson", None)
+
+    assert dumps({"created": datetime(2024, 1, 2), "ids": [1, 2]}) == b'{"created":"2024-01-02T00:00:00","ids":[1,2]}'
+
+
+def test_users_out_serializes_rows_without_extra_columns():
+    rows = [SimpleNamespace(uid=1, email="a@example.com", username="a", created=datetime(2024, 1, 1), password="hash")]
+
+    assert json.loads(users_out.dump_json(rows)) == [
+        {"uid": 1, "email": "a@example.com", "username": "a", "created": "2024-01-01T00:00:00"}
+    ]
+
+
+def test_restaurants_out_fills_defaults_and_drops_unknown_keys():
+    listing = {
+        "rid": 1, "name": "Kitchen", "owner": 2, "address": "1 Main", "zip": 78701, "phone": 0,
+        "opentime": "09:00", "closetime": "21:00", "description": "", "price": "$", "rating": 0,
+        "status": "1", "latitude": 30.2,
+    }
+
+    body = json.loads(restaurants_out.response([listing]).body)
+
+    assert body[0]["menu"] == "" and body[0]["menu_photo"] == ""
+    assert "latitude" not in body[0]
@@ -14,3 +14,24 @@ def test_verify_password_fails_for_wrong_password():
     hashed_password = utils.get_password_hash("correct-password")
 
     assert utils.verify_password("wrong-password", hashed_password) is False
+
+
+def test_get_password_hash_uses_requested_cost():
+    hashed_password = utils.get_password_hash("pw", rounds=5)
+
+    assert hashed_password.startswith("$2b$05$")
+    assert utils.verify_password("pw", hashed_password) is True
+
+
+def test_needs_rehash_flags_hashes_with_a_different_cost(monkeypatch):
+    monkeypatch.setattr(utils.settings, "BCRYPT_ROUNDS", 5)
+
+    assert utils.needs_rehash(utils.get_password_hash("pw", rounds=4)) is True
+    assert utils.needs_rehash(utils.get_password_hash("pw", rounds=5)) is False
+    assert utils.needs_rehash("not-a-bcrypt-hash") is True
+
+
+def test_offload_runs_hashing_on_the_worker_pool():
+    hashed_password = utils.offload(utils.get_password_hash, "pooled")
+
+    assert utils.offload(utils.verify_password, "pooled", hashed_password) is True